@@ -1,18 +1,231 @@
 """The Tuya BLE integration."""
 from __future__ import annotations
 
+import logging
+import time
+
+import voluptuous as vol
+
+from homeassistant.components import bluetooth
+from homeassistant.components.bluetooth.match import (
+    ADDRESS,
+    BluetoothCallbackMatcher,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_ADDRESS, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+
+# Platforms register their mappings on import, before entries are set up
+from . import (  # noqa: F401
+    binary_sensor,
+    button,
+    climate,
+    light,
+    number,
+    select,
+    sensor,
+    switch,
+    text,
+)
+from .cloud import HASSTuyaBLEDeviceManager
+from .const import (
+    CONF_IDLE_TIMEOUTS,
+    CONF_PROMETHEUS,
+    CONF_REFRESH_CATEGORIES,
+    DATA_CONFIG,
+    DATA_FLEET,
+    DOMAIN,
+)
+from .devices import (
+    TuyaBLECoordinator,
+    TuyaBLEData,
+    get_device_product_info,
+    mapping_registry,
+)
+from .tuya_ble import TuyaBLEDevice, TuyaBLEFleet
+
+_LOGGER = logging.getLogger(__name__)
+
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(CONF_PROMETHEUS, default=False): cv.boolean,
+                vol.Optional(CONF_IDLE_TIMEOUTS): {
+                    cv.string: cv.positive_int
+                },
+                vol.Optional(CONF_REFRESH_CATEGORIES): vol.All(
+                    cv.ensure_list, [cv.string]
+                ),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+PLATFORMS: list[Platform] = [
+    Platform.BINARY_SENSOR,
+    Platform.BUTTON,
+    Platform.CLIMATE,
+    Platform.LIGHT,
+    Platform.NUMBER,
+    Platform.SELECT,
+    Platform.SENSOR,
+    Platform.SWITCH,
+    Platform.TEXT,
+]
+
+
+def get_device_platforms(device: TuyaBLEDevice) -> list[Platform]:
+    """Return the platforms having entities for the device."""
+    platforms = mapping_registry.get_platforms(device.category, device.product_id)
+    if not platforms:
+        # Unknown products get the light this integration started with
+        platforms.add(Platform.LIGHT)
+    # Every device has a signal strength sensor
+    platforms.add(Platform.SENSOR)
+    return [platform for platform in PLATFORMS if platform in platforms]
+
+
+def get_fleet(hass: HomeAssistant) -> TuyaBLEFleet:
+    """Return the fleet owning all Tuya BLE devices of this instance."""
+    fleet: TuyaBLEFleet | None = hass.data.get(DATA_FLEET)
+    if fleet is None:
+        config = hass.data.get(DATA_CONFIG, {})
+        fleet = TuyaBLEFleet(
+            idle_timeouts=config.get(CONF_IDLE_TIMEOUTS),
+            refresh_categories=config.get(CONF_REFRESH_CATEGORIES),
+        )
+        hass.data[DATA_FLEET] = fleet
+
+        # Every adapter and proxy seeing a device is a path to connect it
+        fleet.set_ble_device_provider(
+            lambda address: [
+                (scanner_device.ble_device, scanner_device.advertisement.rssi)
+                for scanner_device in bluetooth.async_scanner_devices_by_address(
+                    hass, address, True
+                )
+            ]
+        )
+
+        async def _async_stop(event: Event) -> None:
+            await fleet.stop()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop)
+    return fleet
 
-from .const import DOMAIN
 
-PLATFORMS: list[str] = ["light"]
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up Tuya BLE, serving the metrics to Prometheus if opted in."""
+    hass.data[DATA_CONFIG] = config.get(DOMAIN, {})
+    if config.get(DOMAIN, {}).get(CONF_PROMETHEUS):
+        if hass.http is None:
+            _LOGGER.warning("Prometheus metrics need the http integration")
+        else:
+            # Imported here, the http integration is only needed for the export
+            from .prometheus import TuyaBLEMetricsView
+
+            hass.http.register_view(TuyaBLEMetricsView())
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Tuya BLE from a config entry."""
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    address: str = entry.data[CONF_ADDRESS]
+    ble_device = bluetooth.async_ble_device_from_address(
+        hass, address.upper(), True
+    )
+    if not ble_device:
+        raise ConfigEntryNotReady(
+            f"Could not find Tuya BLE device with address {address}"
+        )
+
+    setup_times: dict[str, float] = {}
+    started = time.monotonic()
+
+    await mapping_registry.async_load_products(hass)
+    fleet = get_fleet(hass)
+    manager = HASSTuyaBLEDeviceManager(hass, {**entry.data, **entry.options})
+    device = fleet.create_device(manager, ble_device)
+    try:
+        await device.initialize()
+    except Exception as err:  # pylint: disable=broad-except
+        # The next attempt creates the device again, with its own manager
+        await fleet.remove_device(device.address)
+        raise ConfigEntryNotReady(
+            f"Could not initialize Tuya BLE device {address}: {err}"
+        ) from err
+    setup_times["initialize"] = time.monotonic() - started
+    # Credentials of all devices of the account in one go, not one per entry
+    entry.async_create_background_task(
+        hass, manager.async_prefetch(), "tuya_ble credentials prefetch"
+    )
+
+    stage_started = time.monotonic()
+    product_info = get_device_product_info(device)
+    platforms = get_device_platforms(device)
+    setup_times["mappings"] = time.monotonic() - stage_started
+    coordinator = TuyaBLECoordinator(hass, device)
+
+    @callback
+    def _async_update_ble(
+        service_info: bluetooth.BluetoothServiceInfoBleak,
+        change: bluetooth.BluetoothChange,
+    ) -> None:
+        """Update from a ble callback."""
+        device.set_ble_device_and_advertisement_data(
+            service_info.device, service_info.advertisement
+        )
+
+    entry.async_on_unload(
+        bluetooth.async_register_callback(
+            hass,
+            _async_update_ble,
+            BluetoothCallbackMatcher({ADDRESS: address}),
+            bluetooth.BluetoothScanningMode.ACTIVE,
+        )
+    )
+
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = TuyaBLEData(
+        entry.title,
+        device,
+        product_info,
+        manager,
+        coordinator,
+        platforms,
+        setup_times,
+    )
+
+    stage_started = time.monotonic()
+    await hass.config_entries.async_forward_entry_setups(entry, platforms)
+    setup_times["platforms"] = time.monotonic() - stage_started
+    setup_times["total"] = time.monotonic() - started
+    fleet.start()
+
+    _LOGGER.debug(
+        "%s: Set up in %.3fs (initialize %.3fs, mappings %.3fs, "
+        "platforms %.3fs), platforms: %s",
+        address,
+        setup_times["total"],
+        setup_times["initialize"],
+        setup_times["mappings"],
+        setup_times["platforms"],
+        ", ".join(platforms),
+    )
     return True
 
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    data: TuyaBLEData = hass.data[DOMAIN][entry.entry_id]
+    if unload_ok := await hass.config_entries.async_unload_platforms(
+        entry, data.platforms
+    ):
+        hass.data[DOMAIN].pop(entry.entry_id)
+        fleet: TuyaBLEFleet | None = hass.data.get(DATA_FLEET)
+        if fleet is not None:
+            await fleet.remove_device(data.device.address)
+    return unload_ok
@@ -1,24 +1,14 @@
 """Tuya Home Assistant Base Device Model."""
 from __future__ import annotations
 
-import base64
 from dataclasses import dataclass
 import json
-import struct
-from typing import Any, Literal, Self, overload
-
-from tuya_iot import TuyaDevice, TuyaDeviceManager
-
-from homeassistant.helpers.device_registry import DeviceInfo
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
-from homeassistant.helpers.entity import Entity
-
-from .const import (
-    DPCode,
-)
 
 from .util import remap_value
 
+# Datapoint of a Tuya BLE device, by its id
+DPCode = int
+
 
 @dataclass
 class IntegerTypeData:
@@ -101,17 +91,17 @@ class IntegerTypeData:
     def from_dict(cls, dpcode: DPCode, data: dict | None) -> IntegerTypeData | None:
         """Load Dict and return a IntegerTypeData object."""
 
-        if not dict:
+        if not data:
             return None
 
         return cls(
             dpcode,
-            min=int(dict.get("min", 0)),
-            max=int(dict.get("max", 0)),
-            scale=float(dict.get("scale", 0)),
-            step=max(float(dict.get("step", 0)), 1),
-            unit=dict.get("unit"),
-            type=dict.get("type"),
+            min=int(data.get("min", 0)),
+            max=int(data.get("max", 0)),
+            scale=float(data.get("scale", 0)),
+            step=max(float(data.get("step", 0)), 1),
+            unit=data.get("unit"),
+            type=data.get("type"),
         )
 
 @dataclass
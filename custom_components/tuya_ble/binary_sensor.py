@@ -12,6 +12,7 @@ from homeassistant.components.binary_sensor import (
     BinarySensorEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -20,7 +21,14 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from .const import (
     DOMAIN,
 )
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo
+from .devices import (
+    TuyaBLEData,
+    TuyaBLEEntity,
+    TuyaBLEProductInfo,
+    get_device_mappings,
+    get_dp_ids,
+    mapping_registry,
+)
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
@@ -70,18 +78,11 @@ mapping: dict[str, TuyaBLECategoryBinarySensorMapping] = {
 }
 
 
+mapping_registry.register_platform(Platform.BINARY_SENSOR, mapping)
+
+
 def get_mapping_by_device(device: TuyaBLEDevice) -> list[TuyaBLEBinarySensorMapping]:
-    category = mapping.get(device.category)
-    if category is not None and category.products is not None:
-        product_mapping = category.products.get(device.product_id)
-        if product_mapping is not None:
-            return product_mapping
-        if category.mapping is not None:
-            return category.mapping
-        else:
-            return []
-    else:
-        return []
+    return get_device_mappings(Platform.BINARY_SENSOR, device)
 
 
 class TuyaBLEBinarySensor(TuyaBLEEntity, BinarySensorEntity):
@@ -98,6 +99,11 @@ class TuyaBLEBinarySensor(TuyaBLEEntity, BinarySensorEntity):
         super().__init__(hass, coordinator, device, product, mapping.description)
         self._mapping = mapping
 
+    @property
+    def dp_ids(self) -> set[int] | None:
+        """Return datapoints the entity depends on."""
+        return get_dp_ids(self._product, self._mapping.dp_id)
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
@@ -130,7 +136,7 @@ class TuyaBLEBinarySensor(TuyaBLEEntity, BinarySensorEntity):
                 else:
                     self._attr_native_value = datapoint.value
                 '''
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     @property
     def available(self) -> bool:
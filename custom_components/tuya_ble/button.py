@@ -11,12 +11,20 @@ from homeassistant.components.button import (
     ButtonEntity,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import DOMAIN
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo
+from .devices import (
+    TuyaBLEData,
+    TuyaBLEEntity,
+    TuyaBLEProductInfo,
+    get_device_mappings,
+    get_dp_ids,
+    mapping_registry,
+)
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
@@ -125,18 +133,11 @@ mapping: dict[str, TuyaBLECategoryButtonMapping] = {
 }
 
 
+mapping_registry.register_platform(Platform.BUTTON, mapping)
+
+
 def get_mapping_by_device(device: TuyaBLEDevice) -> list[TuyaBLECategoryButtonMapping]:
-    category = mapping.get(device.category)
-    if category is not None and category.products is not None:
-        product_mapping = category.products.get(device.product_id)
-        if product_mapping is not None:
-            return product_mapping
-        if category.mapping is not None:
-            return category.mapping
-        else:
-            return []
-    else:
-        return []
+    return get_device_mappings(Platform.BUTTON, device)
 
 
 class TuyaBLEButton(TuyaBLEEntity, ButtonEntity):
@@ -153,6 +154,11 @@ class TuyaBLEButton(TuyaBLEEntity, ButtonEntity):
         super().__init__(hass, coordinator, device, product, mapping.description)
         self._mapping = mapping
 
+    @property
+    def dp_ids(self) -> set[int] | None:
+        """Return datapoints the entity depends on."""
+        return get_dp_ids(self._product, self._mapping.dp_id)
+
     def press(self) -> None:
         """Press the button."""
         datapoint = self._device.datapoints.get_or_create(
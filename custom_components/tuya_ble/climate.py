@@ -3,8 +3,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+from collections.abc import Iterable
 import logging
-from typing import Callable
+from typing import Any, Callable
 
 from homeassistant.components.climate import (
     ClimateEntityDescription,
@@ -18,14 +19,42 @@ from homeassistant.components.climate.const import (
     PRESET_NONE,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature
+from homeassistant.const import (
+    ATTR_TEMPERATURE,
+    PERCENTAGE,
+    Platform,
+    UnitOfTemperature,
+)
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo
-from .tuya_ble import TuyaBLEDataPoint, TuyaBLEDataPointType, TuyaBLEDevice
+from .const import (
+    ATTR_SCHEDULE,
+    ATTR_TIME,
+    DOMAIN,
+    HISTORY_DAILY,
+    HISTORY_HOURLY,
+    HISTORY_MONTHLY,
+    SCHEDULE_DAYS,
+)
+from .devices import (
+    TuyaBLEData,
+    TuyaBLEEntity,
+    TuyaBLEProductInfo,
+    get_device_mappings,
+    get_dp_ids,
+    mapping_registry,
+)
+from .statistics import TuyaBLEHistoryImporter, TuyaBLEHistoryMapping
+from .tuya_ble import (
+    TuyaBLEDataPoint,
+    TuyaBLEDataPointType,
+    TuyaBLEDevice,
+    TuyaBLEError,
+    TuyaBLEWeekSchedule,
+    decode_week_schedule,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -58,6 +87,11 @@ class TuyaBLEClimateMapping:
     target_humidity_max: float = 100.0
     target_humidity_min: float = 0.0
 
+    # Programming data of the days of the week, Monday first
+    schedule_dp_ids: list[int] | None = None
+    # Historical data imported into long-term statistics
+    history: list[TuyaBLEHistoryMapping] | None = None
+
 
 @dataclass
 class TuyaBLECategoryClimateMapping:
@@ -88,26 +122,26 @@ mapping: dict[str, TuyaBLECategoryClimateMapping] = {
                 # - [x] 107 - Programming mode
                 # - [x] 108 - Programming switch
                 # - [ ] 109 - Programming data (deprecated - do not delete)
-                # - [ ] 110 - Historical data protocol (Day-Target temperature)
+                # - [x] 110 - Historical data protocol (Day-Target temperature)
                 # - [ ] 111 - System Time Synchronization
-                # - [ ] 112 - Historical data (Week-Target temperature)
-                # - [ ] 113 - Historical data (Month-Target temperature)
-                # - [ ] 114 - Historical data (Year-Target temperature)
-                # - [ ] 115 - Historical data (Day-Current temperature)
-                # - [ ] 116 - Historical data (Week-Current temperature)
-                # - [ ] 117 - Historical data (Month-Current temperature)
-                # - [ ] 118 - Historical data (Year-Current temperature)
-                # - [ ] 119 - Historical data (Day-motor opening degree)
-                # - [ ] 120 - Historical data (Week-motor opening degree)
-                # - [ ] 121 - Historical data (Month-motor opening degree)
-                # - [ ] 122 - Historical data (Year-motor opening degree)
-                # - [ ] 123 - Programming data (Monday)
-                # - [ ] 124 - Programming data (Tuseday)
-                # - [ ] 125 - Programming data (Wednesday)
-                # - [ ] 126 - Programming data (Thursday)
-                # - [ ] 127 - Programming data (Friday)
-                # - [ ] 128 - Programming data (Saturday)
-                # - [ ] 129 - Programming data (Sunday)
+                # - [x] 112 - Historical data (Week-Target temperature)
+                # - [x] 113 - Historical data (Month-Target temperature)
+                # - [x] 114 - Historical data (Year-Target temperature)
+                # - [x] 115 - Historical data (Day-Current temperature)
+                # - [x] 116 - Historical data (Week-Current temperature)
+                # - [x] 117 - Historical data (Month-Current temperature)
+                # - [x] 118 - Historical data (Year-Current temperature)
+                # - [x] 119 - Historical data (Day-motor opening degree)
+                # - [x] 120 - Historical data (Week-motor opening degree)
+                # - [x] 121 - Historical data (Month-motor opening degree)
+                # - [x] 122 - Historical data (Year-motor opening degree)
+                # - [x] 123 - Programming data (Monday)
+                # - [x] 124 - Programming data (Tuseday)
+                # - [x] 125 - Programming data (Wednesday)
+                # - [x] 126 - Programming data (Thursday)
+                # - [x] 127 - Programming data (Friday)
+                # - [x] 128 - Programming data (Saturday)
+                # - [x] 129 - Programming data (Sunday)
                 # - [x] 130 - Water scale
                 TuyaBLEClimateMapping(
                     description=ClimateEntityDescription(
@@ -124,6 +158,44 @@ mapping: dict[str, TuyaBLECategoryClimateMapping] = {
                     target_temperature_dp_id=103,
                     target_temperature_min=5.0,
                     target_temperature_max=30.0,
+                    schedule_dp_ids=list(range(123, 130)),
+                    history=[
+                        TuyaBLEHistoryMapping(
+                            key="target_temperature",
+                            name="Target temperature",
+                            unit=UnitOfTemperature.CELSIUS,
+                            dp_ids={
+                                110: HISTORY_HOURLY,
+                                112: HISTORY_DAILY,
+                                113: HISTORY_DAILY,
+                                114: HISTORY_MONTHLY,
+                            },
+                            coefficient=10.0,
+                        ),
+                        TuyaBLEHistoryMapping(
+                            key="current_temperature",
+                            name="Current temperature",
+                            unit=UnitOfTemperature.CELSIUS,
+                            dp_ids={
+                                115: HISTORY_HOURLY,
+                                116: HISTORY_DAILY,
+                                117: HISTORY_DAILY,
+                                118: HISTORY_MONTHLY,
+                            },
+                            coefficient=10.0,
+                        ),
+                        TuyaBLEHistoryMapping(
+                            key="valve_opening",
+                            name="Valve opening",
+                            unit=PERCENTAGE,
+                            dp_ids={
+                                119: HISTORY_HOURLY,
+                                120: HISTORY_DAILY,
+                                121: HISTORY_DAILY,
+                                122: HISTORY_MONTHLY,
+                            },
+                        ),
+                    ],
                     ),
                 ],
             ),
@@ -132,18 +204,11 @@ mapping: dict[str, TuyaBLECategoryClimateMapping] = {
 }
 
 
+mapping_registry.register_platform(Platform.CLIMATE, mapping)
+
+
 def get_mapping_by_device(device: TuyaBLEDevice) -> list[TuyaBLECategoryClimateMapping]:
-    category = mapping.get(device.category)
-    if category is not None and category.products is not None:
-        product_mapping = category.products.get(device.product_id)
-        if product_mapping is not None:
-            return product_mapping
-        if category.mapping is not None:
-            return category.mapping
-        else:
-            return []
-    else:
-        return []
+    return get_device_mappings(Platform.CLIMATE, device)
 
 
 class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
@@ -162,6 +227,12 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
         self._attr_hvac_mode = HVACMode.HEAT
         self._attr_preset_mode = PRESET_NONE
         self._attr_hvac_action = HVACAction.HEATING
+        self._schedule: TuyaBLEWeekSchedule | None = None
+        self._history = (
+            TuyaBLEHistoryImporter(hass, device, product, mapping.history)
+            if mapping.history
+            else None
+        )
 
         if mapping.hvac_mode_dp_id and mapping.hvac_modes:
             self._attr_hvac_modes = mapping.hvac_modes
@@ -184,6 +255,46 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
             self._attr_max_humidity = mapping.target_humidity_max
             self._attr_min_humidity = mapping.target_humidity_min
 
+    @property
+    def dp_ids(self) -> set[int] | None:
+        """Return datapoints the entity depends on."""
+        return get_dp_ids(
+            self._product,
+            self._mapping.current_temperature_dp_id,
+            self._mapping.target_temperature_dp_id,
+            self._mapping.current_humidity_dp_id,
+            self._mapping.target_humidity_dp_id,
+            self._mapping.hvac_mode_dp_id,
+            self._mapping.hvac_switch_dp_id,
+            *(self._mapping.preset_mode_dp_ids or {}).values(),
+            *(self._mapping.schedule_dp_ids or []),
+            *(self._history.dp_ids if self._history else []),
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the weekly schedule."""
+        if self._schedule is None:
+            return None
+        coefficient = self._mapping.target_temperature_coefficient
+        return {
+            ATTR_SCHEDULE: {
+                day: [
+                    {
+                        ATTR_TIME: f"{minutes // 60:02d}:{minutes % 60:02d}",
+                        ATTR_TEMPERATURE: temperature / coefficient,
+                    }
+                    for minutes, temperature in periods
+                ]
+                for day, periods in zip(SCHEDULE_DAYS, self._schedule)
+            }
+        }
+
+    def _is_changed(self, dp_ids: Iterable[int]) -> bool:
+        """Return True if the update may be about one of the datapoints."""
+        changed = self._coordinator.changed_dp_ids
+        return changed is None or not changed.isdisjoint(dp_ids)
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
@@ -240,6 +351,24 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
                     break
             self._attr_preset_mode = current_preset_mode
 
+        # Programming and historical data are decoded only when reported,
+        # not on every temperature report
+        if self._mapping.schedule_dp_ids and self._is_changed(
+            self._mapping.schedule_dp_ids
+        ):
+            try:
+                self._schedule = decode_week_schedule(
+                    self._device.datapoints, self._mapping.schedule_dp_ids
+                )
+            except TuyaBLEError:
+                _LOGGER.debug(
+                    "%s: Unexpected programming data", self._device.address
+                )
+                self._schedule = None
+
+        if self._history and self._is_changed(self._history.dp_ids):
+            self._history.async_update()
+
         try:
             if (
                 self._attr_preset_mode == PRESET_AWAY
@@ -252,7 +381,7 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
         except:
             pass
 
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     async def async_set_temperature(self, **kwargs) -> None:
         """Set new target temperature."""
@@ -361,3 +490,4 @@ async def async_setup_entry(
             )
         )
     async_add_entities(entities)
+
@@ -1,46 +1,480 @@
 """Tuya BLE cloud interface."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from collections.abc import Awaitable, Callable
 from typing import Any
 
 from tuya_iot import TuyaOpenAPI, AuthType
+from tuya_iot.openapi import TuyaTokenInfo
 
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_DEVICE_ID
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 
 from .const import (
     CONF_ACCESS_ID,
     CONF_ACCESS_SECRET,
+    CONF_CATEGORY,
+    CONF_DEVICE_NAME,
     CONF_ENDPOINT,
+    CONF_LOCAL_KEY,
+    CONF_PRODUCT_ID,
+    CONF_PRODUCT_MODEL,
+    CONF_PRODUCT_NAME,
+    CONF_UPDATED,
+    CONF_UUID,
+    CREDENTIALS_CACHE_TTL,
+    CREDENTIALS_MISS_TTL,
+    CREDENTIALS_SAVE_DELAY,
+    CREDENTIALS_STORAGE_KEY,
+    CREDENTIALS_STORAGE_VERSION,
+    DATA_CLOUD_SESSIONS,
+    DATA_CREDENTIALS_CACHE,
+    TOKEN_REFRESH_MARGIN,
+    TOKEN_STORAGE_KEY,
+    TOKEN_STORAGE_VERSION,
     TUYA_API_DEVICES_URL,
     TUYA_API_FACTORY_INFO_URL,
+    TUYA_API_REFRESH_TOKEN_URL,
+    TUYA_FACTORY_INFO_BATCH_SIZE,
     TUYA_FACTORY_INFO_MAC,
+    TUYA_MAX_CONCURRENT_REQUESTS,
     TUYA_RESPONSE_SUCCESS,
     TUYA_RESPONSE_RESULT,
 )
+from .tuya_ble import AbstaractTuyaBLEDeviceManager, TuyaBLEDeviceCredentials
 
 _LOGGER = logging.getLogger(__name__)
 
-class HASSTuyaBLEDeviceManager:
-    """Manage Tuya BLE devices."""
+
+def _format_mac(mac: str) -> str:
+    """Format a MAC reported by the cloud as AA:BB:CC:DD:EE:FF."""
+    mac = mac.replace(":", "").replace("-", "").upper()
+    return ":".join(mac[i:i + 2] for i in range(0, len(mac), 2))  # fmt: skip
+
+
+async def async_fetch_credentials(
+    api: TuyaOpenAPI,
+    executor_job: Callable[..., Awaitable[Any]],
+    batch_size: int = TUYA_FACTORY_INFO_BATCH_SIZE,
+    max_concurrent_requests: int = TUYA_MAX_CONCURRENT_REQUESTS,
+) -> dict[str, dict[str, Any]] | None:
+    """Fetch credentials of all devices of the logged in account.
+
+    The device list is read in one call, factory infos holding the MAC
+    addresses are requested in batches running concurrently on the executor.
+    """
+    devices_response = await executor_job(
+        api.get, TUYA_API_DEVICES_URL % (api.token_info.uid)
+    )
+    devices = devices_response.get(TUYA_RESPONSE_RESULT)
+    if not isinstance(devices, list):
+        return None
+
+    devices_by_id: dict[str, dict[str, Any]] = {
+        device["id"]: device for device in devices if device.get("id")
+    }
+    device_ids = list(devices_by_id)
+    semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+    async def _fetch_factory_infos(batch: list[str]) -> list[dict[str, Any]]:
+        async with semaphore:
+            response = await executor_job(
+                api.get, TUYA_API_FACTORY_INFO_URL % (",".join(batch))
+            )
+        return response.get(TUYA_RESPONSE_RESULT) or []
+
+    results = await asyncio.gather(
+        *(
+            _fetch_factory_infos(device_ids[pos:pos + batch_size])  # fmt: skip
+            for pos in range(0, len(device_ids), batch_size)
+        ),
+        return_exceptions=True,
+    )
+
+    credentials: dict[str, dict[str, Any]] = {}
+    for result in results:
+        if isinstance(result, Exception):
+            _LOGGER.warning("Fetching factory infos failed: %s", result)
+            continue
+        for factory_info in result:
+            device = devices_by_id.get(factory_info.get("id"))
+            mac = factory_info.get(TUYA_FACTORY_INFO_MAC)
+            if device is None or not mac:
+                continue
+            credentials[_format_mac(mac)] = {
+                CONF_UUID: device.get("uuid"),
+                CONF_LOCAL_KEY: device.get("local_key"),
+                CONF_DEVICE_ID: device.get("id"),
+                CONF_CATEGORY: device.get("category"),
+                CONF_PRODUCT_ID: device.get("product_id"),
+                CONF_DEVICE_NAME: device.get("name"),
+                CONF_PRODUCT_MODEL: device.get("model"),
+                CONF_PRODUCT_NAME: device.get("product_name"),
+            }
+
+    _LOGGER.debug(
+        "Fetched credentials of %s devices out of %s",
+        len(credentials),
+        len(device_ids),
+    )
+    return credentials
+
+
+class TuyaBLECredentialsCache:
+    """On-disk cache of device credentials keyed by MAC address."""
 
     def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, CREDENTIALS_STORAGE_VERSION, CREDENTIALS_STORAGE_KEY
+        )
+        self._credentials: dict[str, dict[str, Any]] = {}
+        self._misses: dict[str, float] = {}
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+        self.update_lock = asyncio.Lock()
+        self.updated_at: float = 0
+        # Access IDs of the accounts whose devices were all fetched
+        self.prefetched: set[str] = set()
+
+    async def async_load(self) -> None:
+        """Load cached credentials from disk once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            data = await self._store.async_load()
+            if data:
+                self._credentials = data.get("devices", {})
+            self._loaded = True
+            _LOGGER.debug("Loaded %s cached credentials", len(self._credentials))
+
+    def get(self, address: str) -> dict[str, Any] | None:
+        """Return cached credentials of the device."""
+        return self._credentials.get(address)
+
+    def is_expired(self, address: str) -> bool:
+        """Return True if cached credentials should be refreshed."""
+        item = self._credentials.get(address)
+        if item is None:
+            return True
+        return time.time() - item.get(CONF_UPDATED, 0) > CREDENTIALS_CACHE_TTL
+
+    def is_known_miss(self, address: str) -> bool:
+        """Return True if the cloud recently did not know the device."""
+        missed = self._misses.get(address)
+        return missed is not None and time.monotonic() - missed < CREDENTIALS_MISS_TTL
+
+    def add_miss(self, address: str) -> None:
+        self._misses[address] = time.monotonic()
+
+    def update(self, credentials: dict[str, dict[str, Any]]) -> None:
+        """Store freshly fetched credentials."""
+        now = time.time()
+        for address, item in credentials.items():
+            self._credentials[address] = {**item, CONF_UPDATED: now}
+            self._misses.pop(address, None)
+        self.updated_at = time.monotonic()
+
+    async def async_save(self, immediately: bool = False) -> None:
+        """Persist the cache."""
+        if immediately:
+            await self._store.async_save(self._data_to_save())
+        else:
+            self._store.async_delay_save(self._data_to_save, CREDENTIALS_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"devices": self._credentials}
+
+
+def get_credentials_cache(hass: HomeAssistant) -> TuyaBLECredentialsCache:
+    """Return the credentials cache shared by all config entries."""
+    cache: TuyaBLECredentialsCache | None = hass.data.get(DATA_CREDENTIALS_CACHE)
+    if cache is None:
+        cache = TuyaBLECredentialsCache(hass)
+        hass.data[DATA_CREDENTIALS_CACHE] = cache
+    return cache
+
+
+def _refresh_access_token(api: TuyaOpenAPI) -> dict[str, Any]:
+    """Exchange the refresh token for a new access token."""
+    refresh_token = api.token_info.refresh_token
+    # Request must be signed without the access token being refreshed.
+    api.token_info.access_token = ""
+    response = api.post(TUYA_API_REFRESH_TOKEN_URL + refresh_token)
+    if response.get(TUYA_RESPONSE_SUCCESS, False):
+        api.token_info = TuyaTokenInfo(response)
+    return response
+
+
+class TuyaBLECloudSession:
+    """Tuya cloud login shared by all managers using the same account.
+
+    Only one login runs at a time, concurrent callers await its result.
+    The token is persisted with its expiry and refreshed before it expires.
+    """
+
+    def __init__(self, hass: HomeAssistant, auth_data: dict[str, Any]) -> None:
+        """Initialize the session."""
+        self._hass = hass
+        self._auth_data = auth_data
+        self._store: Store[dict[str, Any]] = Store(
+            hass, TOKEN_STORAGE_VERSION, TOKEN_STORAGE_KEY
+        )
+        self._login_task: asyncio.Task[dict[str, Any]] | None = None
+        self._login_forced = False
+        self._unsub_refresh: CALLBACK_TYPE | None = None
+        self.api: TuyaOpenAPI | None = None
+
+    @property
+    def _key(self) -> str:
+        return self._auth_data[CONF_ACCESS_ID]
+
+    def _is_token_valid(self) -> bool:
+        if self.api is None or not self.api.is_connect():
+            return False
+        expires_at = self.api.token_info.expire_time / 1000
+        return expires_at - TOKEN_REFRESH_MARGIN > time.time()
+
+    async def async_login(self, force: bool = False) -> dict[str, Any]:
+        """Return a login response, logging in only if needed."""
+        if not force and self._is_token_valid():
+            return {TUYA_RESPONSE_SUCCESS: True}
+        # A login not forced may keep the token being replaced, let it
+        # finish and log in again
+        while force and self._login_task is not None and not self._login_forced:
+            await asyncio.wait((self._login_task,))
+        if self._login_task is None:
+            self._login_task = self._hass.async_create_background_task(
+                self._async_login(force), "tuya_ble cloud login"
+            )
+            self._login_task.add_done_callback(self._login_done)
+            self._login_forced = force
+        return await asyncio.shield(self._login_task)
+
+    @callback
+    def _login_done(self, _: asyncio.Task) -> None:
+        self._login_task = None
+        self._login_forced = False
+
+    async def _async_login(self, force: bool) -> dict[str, Any]:
+        if self.api is None:
+            self.api = TuyaOpenAPI(
+                self._auth_data[CONF_ENDPOINT],
+                self._auth_data[CONF_ACCESS_ID],
+                self._auth_data[CONF_ACCESS_SECRET],
+                auth_type=AuthType.CUSTOM
+            )
+            if not force and await self._async_restore_token():
+                if self._is_token_valid():
+                    self._schedule_refresh()
+                    return {TUYA_RESPONSE_SUCCESS: True}
+
+        response: dict[str, Any] | None = None
+        if not force and self.api.token_info and self.api.token_info.refresh_token:
+            response = await self._hass.async_add_executor_job(
+                _refresh_access_token, self.api
+            )
+        if not response or not response.get(TUYA_RESPONSE_SUCCESS, False):
+            response = await self._hass.async_add_executor_job(self.api.connect)
+
+        if response.get(TUYA_RESPONSE_SUCCESS, False):
+            await self._async_save_token()
+            self._schedule_refresh()
+        return response
+
+    async def _async_restore_token(self) -> bool:
+        data = await self._store.async_load() or {}
+        token = data.get(self._key)
+        if not token:
+            return False
+        token_info = TuyaTokenInfo({})
+        token_info.access_token = token["access_token"]
+        token_info.refresh_token = token["refresh_token"]
+        token_info.uid = token["uid"]
+        token_info.expire_time = token["expire_time"]
+        self.api.token_info = token_info
+        _LOGGER.debug("Restored Tuya cloud token")
+        return True
+
+    async def _async_save_token(self) -> None:
+        data = await self._store.async_load() or {}
+        token_info = self.api.token_info
+        data[self._key] = {
+            "access_token": token_info.access_token,
+            "refresh_token": token_info.refresh_token,
+            "uid": token_info.uid,
+            "expire_time": token_info.expire_time,
+        }
+        await self._store.async_save(data)
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+        expires_at = self.api.token_info.expire_time / 1000
+        delay = max(expires_at - TOKEN_REFRESH_MARGIN - time.time(), 0)
+        self._unsub_refresh = async_call_later(
+            self._hass,
+            delay,
+            HassJob(self._async_refresh, cancel_on_shutdown=True),
+        )
+
+    @callback
+    def _async_refresh(self, _: Any) -> None:
+        self._unsub_refresh = None
+        if self._login_task is None:
+            self._login_task = self._hass.async_create_background_task(
+                self._async_login(False), "tuya_ble cloud token refresh"
+            )
+            self._login_task.add_done_callback(self._login_done)
+
+
+def get_cloud_session(
+    hass: HomeAssistant, auth_data: dict[str, Any]
+) -> TuyaBLECloudSession:
+    """Return the cloud session of the account."""
+    sessions: dict[str, TuyaBLECloudSession] = hass.data.setdefault(
+        DATA_CLOUD_SESSIONS, {}
+    )
+    session = sessions.get(auth_data[CONF_ACCESS_ID])
+    if session is None:
+        session = TuyaBLECloudSession(hass, auth_data)
+        sessions[auth_data[CONF_ACCESS_ID]] = session
+    return session
+
+
+class HASSTuyaBLEDeviceManager(AbstaractTuyaBLEDeviceManager):
+    """Manage Tuya BLE devices."""
+
+    def __init__(
+        self, hass: HomeAssistant, auth_data: dict[str, Any] | None = None
+    ) -> None:
         """Initialize the manager."""
         self._hass = hass
+        self._auth_data = auth_data or {}
         self._api: TuyaOpenAPI | None = None
+        self._cache = get_credentials_cache(hass)
+        self._refresh_task: asyncio.Task | None = None
 
     async def _login(self, auth_data: dict[str, Any], force: bool = False) -> dict[str, Any]:
         """Login to Tuya IoT Platform."""
-        if not self._api or force:
-            self._api = TuyaOpenAPI(
-                auth_data[CONF_ENDPOINT],
-                auth_data[CONF_ACCESS_ID],
-                auth_data[CONF_ACCESS_SECRET],
-                auth_type=AuthType.CUSTOM
-            )
-            return await self._hass.async_add_executor_job(self._api.connect)
-        return {"success": True}
+        session = get_cloud_session(self._hass, auth_data)
+        response = await session.async_login(force)
+        self._api = session.api
+        return response
 
     def _is_login_success(self, response: dict[str, Any]) -> bool:
         """Check if login was successful."""
         return response.get(TUYA_RESPONSE_SUCCESS, False)
+
+    def _has_auth_data(self) -> bool:
+        return all(
+            self._auth_data.get(key)
+            for key in (CONF_ENDPOINT, CONF_ACCESS_ID, CONF_ACCESS_SECRET)
+        )
+
+    async def _fetch_credentials(self) -> dict[str, dict[str, Any]] | None:
+        """Fetch credentials of all devices of the account from the cloud."""
+        if not self._has_auth_data():
+            return None
+
+        login_response = await self._login(self._auth_data)
+        if not self._is_login_success(login_response):
+            _LOGGER.warning("Tuya cloud login failed: %s", login_response)
+            return None
+
+        return await async_fetch_credentials(
+            self._api, self._hass.async_add_executor_job
+        )
+
+    async def _update_cache(self, save_data: bool = False) -> bool:
+        """Refresh the cache from the cloud, return False if it is unreachable."""
+        requested_at = time.monotonic()
+        async with self._cache.update_lock:
+            if self._cache.updated_at > requested_at:
+                # Concurrent callers share the update which finished meanwhile.
+                return True
+            try:
+                credentials = await self._fetch_credentials()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.warning("Fetching credentials from Tuya cloud failed", exc_info=True)
+                return False
+            if credentials is None:
+                return False
+            self._cache.update(credentials)
+            await self._cache.async_save(save_data)
+            return True
+
+    async def async_prefetch(self) -> bool:
+        """Fill the cache with credentials of all devices of the account.
+
+        Runs once per account, the first entry set up fetches the
+        credentials of the other entries and of bulk onboarding.
+        """
+        if not self._has_auth_data():
+            return False
+        account = self._auth_data[CONF_ACCESS_ID]
+        if account in self._cache.prefetched:
+            return True
+        self._cache.prefetched.add(account)
+        await self._cache.async_load()
+        if not await self._update_cache(save_data=True):
+            self._cache.prefetched.discard(account)
+            return False
+        return True
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self._update_cache()
+        finally:
+            self._refresh_task = None
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None and self._has_auth_data():
+            self._refresh_task = self._hass.async_create_background_task(
+                self._refresh_in_background(), "tuya_ble credentials refresh"
+            )
+
+    async def get_device_credentials(
+        self,
+        address: str,
+        force_update: bool = False,
+        save_data: bool = False,
+    ) -> TuyaBLEDeviceCredentials | None:
+        """Get credentials of the Tuya BLE device.
+
+        Cached credentials are returned immediately and refreshed in the
+        background once expired, force_update goes to the cloud first.
+        """
+        address = _format_mac(address)
+        await self._cache.async_load()
+
+        if force_update:
+            if not await self._update_cache(save_data):
+                _LOGGER.debug("%s: Cloud unreachable, using cached credentials", address)
+        elif self._cache.get(address) is not None:
+            if self._cache.is_expired(address):
+                self._schedule_refresh()
+        elif not self._cache.is_known_miss(address):
+            await self._update_cache(save_data)
+
+        item = self._cache.get(address)
+        if item is None:
+            self._cache.add_miss(address)
+            return None
+
+        return self.check_and_create_device_credentials(
+            item.get(CONF_UUID),
+            item.get(CONF_LOCAL_KEY),
+            item.get(CONF_DEVICE_ID),
+            item.get(CONF_CATEGORY),
+            item.get(CONF_PRODUCT_ID),
+            item.get(CONF_DEVICE_NAME),
+            item.get(CONF_PRODUCT_MODEL),
+            item.get(CONF_PRODUCT_NAME),
+        )
@@ -1,27 +1,73 @@
 """Config flow for Tuya BLE."""
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass
 import logging
 from typing import Any
 
 import voluptuous as vol
-from homeassistant.components.bluetooth import async_discovered_service_info, BluetoothServiceInfoBleak
-from homeassistant.config_entries import ConfigFlow
+from homeassistant.components.bluetooth import (
+    BluetoothChange,
+    BluetoothScanningMode,
+    BluetoothServiceInfoBleak,
+    async_discovered_service_info,
+    async_register_callback,
+)
+from homeassistant.components.bluetooth.match import (
+    MANUFACTURER_ID,
+    BluetoothCallbackMatcher,
+)
+from homeassistant.config_entries import SOURCE_INTEGRATION_DISCOVERY, ConfigFlow
 from homeassistant.const import CONF_ADDRESS, CONF_NAME
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers import config_validation as cv
 
-from .const import DOMAIN, TUYA_BLE_SERVICE, TUYA_MANUFACTURER_ID
+from .cloud import HASSTuyaBLEDeviceManager, get_credentials_cache
+from .const import (
+    CONF_DEVICE_NAME,
+    DISCOVERY_LOOKUP_TIMEOUT,
+    DISCOVERY_MAX_LOOKUPS,
+    DISCOVERY_RSSI_SMOOTHING,
+    DISCOVERY_WINDOW,
+    DOMAIN,
+    TUYA_BLE_SERVICE,
+    TUYA_MANUFACTURER_ID,
+)
+from .devices import get_device_readable_name
+from .onboarding import async_onboard_devices
 
 _LOGGER = logging.getLogger(__name__)
 
-def get_device_info(discovery_info: BluetoothServiceInfoBleak) -> str:
+
+@dataclass
+class TuyaBLEDiscoveredDevice:
+    discovery_info: BluetoothServiceInfoBleak
+    # Smoothed signal strength of the advertisements seen
+    rssi: float
+    name: str | None = None
+
+
+def is_tuya_ble_device(discovery_info: BluetoothServiceInfoBleak) -> bool:
+    """Return True if the advertisement is of an unbound Tuya BLE device."""
+    return TUYA_BLE_SERVICE in discovery_info.service_uuids and (
+        discovery_info.manufacturer_data.get(TUYA_MANUFACTURER_ID, b"").startswith(
+            b"\x00"
+        )
+    )
+
+
+def get_device_info(device: TuyaBLEDiscoveredDevice) -> str:
     """Get formatted device info for display."""
+    discovery_info = device.discovery_info
+    if device.name:
+        return f"{device.name} RSSI: {round(device.rssi)}dBm"
     name = discovery_info.name or "Unknown"
     mac = discovery_info.address
     short_mac = mac[-6:].replace(":", "")
-    rssi = discovery_info.rssi
-    return f"{name} ({short_mac}) RSSI: {rssi}dBm"
+    return f"{name} ({short_mac}) RSSI: {round(device.rssi)}dBm"
+
 
 class TuyaBLEConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Tuya BLE."""
@@ -30,31 +76,178 @@ class TuyaBLEConfigFlow(ConfigFlow, domain=DOMAIN):
 
     def __init__(self) -> None:
         """Initialize the config flow."""
-        self._discovered_devices = []
+        self._discovered_devices: dict[str, TuyaBLEDiscoveredDevice] = {}
+
+    @callback
+    def _async_add_discovery(self, discovery_info: BluetoothServiceInfoBleak) -> None:
+        """Add an advertisement, de-duplicated by address."""
+        if not is_tuya_ble_device(discovery_info):
+            return
+        address = discovery_info.address.upper()
+        if address in self._async_current_ids():
+            return
+        device = self._discovered_devices.get(address)
+        if device is None:
+            self._discovered_devices[address] = TuyaBLEDiscoveredDevice(
+                discovery_info, discovery_info.rssi
+            )
+            _LOGGER.debug(
+                "Found Tuya BLE device: %s, RSSI: %d, Manufacturer Data: %s",
+                discovery_info.address,
+                discovery_info.rssi,
+                discovery_info.manufacturer_data,
+            )
+            return
+        device.discovery_info = discovery_info
+        device.rssi += (discovery_info.rssi - device.rssi) * DISCOVERY_RSSI_SMOOTHING
+
+    async def _async_discover_devices(self) -> None:
+        """Collect advertisements for a short window, then resolve names."""
+        for discovery_info in async_discovered_service_info(self.hass):
+            self._async_add_discovery(discovery_info)
+
+        @callback
+        def _async_discovered(
+            discovery_info: BluetoothServiceInfoBleak, change: BluetoothChange
+        ) -> None:
+            self._async_add_discovery(discovery_info)
+
+        unregister = async_register_callback(
+            self.hass,
+            _async_discovered,
+            BluetoothCallbackMatcher({MANUFACTURER_ID: TUYA_MANUFACTURER_ID}),
+            BluetoothScanningMode.ACTIVE,
+        )
+        try:
+            await asyncio.sleep(DISCOVERY_WINDOW)
+        finally:
+            unregister()
+
+        await self._async_resolve_names()
+
+    async def _async_resolve_names(self) -> None:
+        """Resolve names of the devices concurrently, in bounded time.
+
+        Devices not resolved in time are listed by their advertised name.
+        """
+        manager = HASSTuyaBLEDeviceManager(self.hass)
+        semaphore = asyncio.Semaphore(DISCOVERY_MAX_LOOKUPS)
+
+        async def _async_resolve(device: TuyaBLEDiscoveredDevice) -> None:
+            async with semaphore:
+                device.name = await get_device_readable_name(
+                    device.discovery_info, manager
+                )
+
+        tasks = [
+            asyncio.create_task(_async_resolve(device))
+            for device in self._discovered_devices.values()
+        ]
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, timeout=DISCOVERY_LOOKUP_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        _LOGGER.debug(
+            "Resolved names of %s devices out of %s", len(done), len(tasks)
+        )
+
+    async def _async_get_known_devices(self) -> dict[str, str]:
+        """Return names of the discovered devices with cached credentials."""
+        cache = get_credentials_cache(self.hass)
+        await cache.async_load()
+        known: dict[str, str] = {}
+        for address in self._discovered_devices:
+            item = cache.get(address)
+            if item is not None:
+                known[address] = (
+                    item.get(CONF_DEVICE_NAME) or f"Tuya Light {address[-6:]}"
+                )
+        return known
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Handle device selection."""
-        errors = {}
-
+        """Discover devices, offer to add the known ones at once."""
         if not self._discovered_devices:
-            for discovery_info in async_discovered_service_info(self.hass):
-                if (
-                    TUYA_BLE_SERVICE in discovery_info.service_uuids
-                    and discovery_info.manufacturer_data.get(TUYA_MANUFACTURER_ID, b"").startswith(b"\x00")
-                ):
-                    self._discovered_devices.append(discovery_info)
-                    _LOGGER.debug(
-                        "Found Tuya BLE device: %s, RSSI: %d, Manufacturer Data: %s",
-                        discovery_info.address,
-                        discovery_info.rssi,
-                        discovery_info.manufacturer_data,
-                    )
+            await self._async_discover_devices()
 
         if not self._discovered_devices:
             return self.async_abort(reason="no_unconfigured_devices")
 
+        known_devices = await self._async_get_known_devices()
+        if len(known_devices) < 2:
+            return await self.async_step_device()
+        return self.async_show_menu(
+            step_id="user",
+            menu_options=["device", "bulk"],
+            description_placeholders={"count": str(len(known_devices))},
+        )
+
+    async def async_step_bulk(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Add all discovered devices having cached cloud credentials."""
+        known_devices = await self._async_get_known_devices()
+        if not known_devices:
+            return self.async_abort(reason="no_unconfigured_devices")
+
+        if user_input is None:
+            return self.async_show_form(
+                step_id="bulk",
+                description_placeholders={
+                    "count": str(len(known_devices)),
+                    "devices": "\n".join(
+                        f"- {name} ({address})"
+                        for address, name in known_devices.items()
+                    ),
+                },
+            )
+
+        report = await async_onboard_devices(
+            self.hass,
+            [
+                (name, self._discovered_devices[address].discovery_info)
+                for address, name in known_devices.items()
+            ],
+        )
+        # Entries are created by flows of their own, one entry per flow
+        for result in report.succeeded:
+            await self.hass.config_entries.flow.async_init(
+                DOMAIN,
+                context={"source": SOURCE_INTEGRATION_DISCOVERY},
+                data={CONF_ADDRESS: result.address, CONF_NAME: result.name},
+            )
+        return self.async_abort(
+            reason="bulk_onboarded",
+            description_placeholders={
+                "succeeded": str(len(report.succeeded)),
+                "failed": str(len(report.failed)),
+                "elapsed": f"{report.elapsed:.1f}",
+                "report": report.summary(),
+            },
+        )
+
+    async def async_step_integration_discovery(
+        self, discovery_info: dict[str, Any]
+    ) -> FlowResult:
+        """Create the entry of a device onboarded in bulk."""
+        await self.async_set_unique_id(discovery_info[CONF_ADDRESS])
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title=discovery_info[CONF_NAME],
+            data={
+                CONF_ADDRESS: discovery_info[CONF_ADDRESS],
+                CONF_NAME: discovery_info[CONF_NAME],
+            },
+        )
+
+    async def async_step_device(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle device selection."""
+        errors = {}
+
         if user_input is not None:
             address = user_input[CONF_ADDRESS]
             await self.async_set_unique_id(address)
@@ -67,18 +260,20 @@ class TuyaBLEConfigFlow(ConfigFlow, domain=DOMAIN):
             )
 
         # Sort devices by signal strength
-        self._discovered_devices.sort(key=lambda x: x.rssi, reverse=True)
-        
         devices = {
-            discovery_info.address: get_device_info(discovery_info)
-            for discovery_info in self._discovered_devices
+            device.discovery_info.address: get_device_info(device)
+            for device in sorted(
+                self._discovered_devices.values(),
+                key=lambda device: device.rssi,
+                reverse=True,
+            )
         }
 
         return self.async_show_form(
-            step_id="user",
+            step_id="device",
             data_schema=vol.Schema({
                 vol.Required(CONF_ADDRESS): vol.In(devices),
                 vol.Optional(CONF_NAME): str,
             }),
             errors=errors,
-        )
\ No newline at end of file
+        )
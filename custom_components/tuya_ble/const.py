@@ -1,22 +1,141 @@
 """Constants for Tuya BLE integration."""
-from dataclasses import dataclass
 
 DOMAIN = "tuya_ble"
 
+DATA_FLEET = f"{DOMAIN}_fleet"
+
+# Opt-in export of the protocol metrics to Prometheus, in configuration.yaml
+CONF_PROMETHEUS = "prometheus"
+PROMETHEUS_URL = f"/api/{DOMAIN}/metrics"
+
+# Idle timeouts of the connections by device category, in configuration.yaml
+CONF_IDLE_TIMEOUTS = "idle_timeouts"
+# Categories refreshed periodically even when disconnected
+CONF_REFRESH_CATEGORIES = "refresh_categories"
+DATA_CONFIG = f"{DOMAIN}_config"
+
+DEVICE_DEF_MANUFACTURER = "Tuya"
+SET_DISCONNECTED_DELAY = 10 * 60
+
+FINGERBOT_BUTTON_EVENT = "fingerbot_button_pressed"
+
+FINGERBOT_MODE_PUSH = "push"
+FINGERBOT_MODE_SWITCH = "switch"
+FINGERBOT_MODE_PROGRAM = "program"
+
+BATTERY_STATE_LOW = "low"
+BATTERY_STATE_NORMAL = "normal"
+BATTERY_STATE_HIGH = "high"
+
+BATTERY_NOT_CHARGING = "not_charging"
+BATTERY_CHARGING = "charging"
+BATTERY_CHARGED = "charged"
+
+CO2_LEVEL_NORMAL = "normal"
+CO2_LEVEL_ALARM = "alarm"
+
+# Categories of lighting devices, set up by the light platform
+LIGHT_CATEGORIES = {"dc", "dd", "dj", "fwd", "gyd", "tyndj", "xdd"}
+# Light categories whose standard instruction set has colour and work mode
+LIGHT_COLOUR_CATEGORIES = {"dc", "dd", "dj", "fwd", "xdd"}
+
+# Additional product definitions, in the configuration folder
+PRODUCTS_FILE = f"{DOMAIN}_products.json"
+
+CONF_ACCESS_ID = "access_id"
+CONF_ACCESS_SECRET = "access_secret"
+CONF_ENDPOINT = "endpoint"
+
+CONF_UUID = "uuid"
+CONF_LOCAL_KEY = "local_key"
+CONF_CATEGORY = "category"
+CONF_PRODUCT_ID = "product_id"
+CONF_DEVICE_NAME = "device_name"
+CONF_PRODUCT_MODEL = "product_model"
+CONF_PRODUCT_NAME = "product_name"
+CONF_UPDATED = "updated"
+
+TUYA_API_REFRESH_TOKEN_URL = "/v1.0/iot-03/users/token/"
+TUYA_API_DEVICES_URL = "/v1.0/users/%s/devices"
+TUYA_API_FACTORY_INFO_URL = "/v1.0/iot-03/devices/factory-infos?device_ids=%s"
+TUYA_FACTORY_INFO_MAC = "mac"
+TUYA_FACTORY_INFO_BATCH_SIZE = 20
+TUYA_MAX_CONCURRENT_REQUESTS = 4
+
+TUYA_RESPONSE_CODE = "code"
+TUYA_RESPONSE_MSG = "msg"
+TUYA_RESPONSE_RESULT = "result"
+TUYA_RESPONSE_SUCCESS = "success"
+
+DATA_CREDENTIALS_CACHE = f"{DOMAIN}_credentials_cache"
+
+CREDENTIALS_STORAGE_KEY = f"{DOMAIN}.credentials"
+CREDENTIALS_STORAGE_VERSION = 1
+CREDENTIALS_SAVE_DELAY = 10
+CREDENTIALS_CACHE_TTL = 7 * 24 * 60 * 60
+CREDENTIALS_MISS_TTL = 10 * 60
+
+DATA_CLOUD_SESSIONS = f"{DOMAIN}_cloud_sessions"
+
+TOKEN_STORAGE_KEY = f"{DOMAIN}.tokens"
+TOKEN_STORAGE_VERSION = 1
+TOKEN_REFRESH_MARGIN = 5 * 60
+
 # BLE Service UUID
 TUYA_BLE_SERVICE = "0000fd50-0000-1001-8001-00805f9b07d0"
 TUYA_MANUFACTURER_ID = 2000
 
+# Config flow discovery, advertisements are collected for the window
+# then names are resolved concurrently, for at most the lookup timeout
+DISCOVERY_WINDOW = 0.4
+DISCOVERY_RSSI_SMOOTHING = 0.3
+DISCOVERY_MAX_LOOKUPS = 8
+DISCOVERY_LOOKUP_TIMEOUT = 0.3
+
+# Time the first connection and handshake of a bulk onboarded device may take
+ONBOARDING_CONNECT_TIMEOUT = 60
+
+# Climate specific constants
+ATTR_SCHEDULE = "schedule"
+ATTR_TIME = "time"
+# Days of the weekly schedule, in the order of their datapoints
+SCHEDULE_DAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+# Historical data, by period of the samples
+HISTORY_HOURLY = "hourly"
+HISTORY_DAILY = "daily"
+HISTORY_MONTHLY = "monthly"
+
+# Readings reported this long after the device recorded them, by its clock
+# corrected for its offset, are buffered ones, flushed on reconnection, and
+# backfilled into statistics. Longer delays are taken for a clock reset.
+BACKFILL_MIN_DELAY = 60
+BACKFILL_MAX_DELAY = 10 * 24 * 3600
+# Time collecting the readings of a burst, backfilled in one batch
+BACKFILL_WINDOW = 2.0
+
 # Light specific constants
+SERVICE_STREAM_START = "stream_start"
+SERVICE_STREAM_STOP = "stream_stop"
+ATTR_MAX_FRAME_RATE = "max_frame_rate"
+LIGHT_TRANSITION_MIN_INTERVAL = 0.2
+# Part of the link time a stepped transition leaves to other commands
+LIGHT_TRANSITION_LATENCY_FACTOR = 2.0
 LIGHT_DP_ID = {
     "SWITCH": 0x01,      # Switch
     "BRIGHT": 0x02,      # Brightness
     "TEMP": 0x03,        # Color Temperature
+    # Standard instruction set of Tuya lights
+    "SWITCH_LED": 0x14,  # Switch
+    "WORK_MODE": 0x15,   # Work mode: white, colour, scene, music
+    "BRIGHT_V2": 0x16,   # Brightness
+    "TEMP_V2": 0x17,     # Color Temperature
+    "COLOUR_V2": 0x18,   # Colour, hue, saturation and value
 }
-
-@dataclass
-class TuyaBLEDevice:
-    """Tuya BLE device information."""
-    mac: str
-    name: str
-    model: str | None = None
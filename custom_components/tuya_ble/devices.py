@@ -9,10 +9,12 @@ This module handles:
 """
 
 from __future__ import annotations
+import json
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any
 
-from homeassistant.const import CONF_ADDRESS, CONF_DEVICE_ID
+from homeassistant.const import CONF_ADDRESS, CONF_DEVICE_ID, Platform
 from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity import (
@@ -40,6 +42,7 @@ from .const import (
     DEVICE_DEF_MANUFACTURER,
     DOMAIN,
     FINGERBOT_BUTTON_EVENT,
+    PRODUCTS_FILE,
     SET_DISCONNECTED_DELAY,
 )
 
@@ -82,6 +85,9 @@ class TuyaBLEData:
     product: TuyaBLEProductInfo
     manager: HASSTuyaBLEDeviceManager
     coordinator: "TuyaBLECoordinator"
+    platforms: list[Platform] = field(default_factory=list)
+    # Duration of the setup stages of the entry, in seconds
+    setup_times: dict[str, float] = field(default_factory=dict)
 
 
 # Database of known Tuya BLE devices, keyed by category + product_id
@@ -214,21 +220,229 @@ devices_database: dict[str, TuyaBLECategoryInfo] = {
 }
 
 
+@dataclass
+class TuyaBLEProductMappings:
+    """Product info and entity mappings of a product, by platform."""
+    info: TuyaBLEProductInfo | None = None
+    platforms: dict[Platform, list[Any]] = field(default_factory=dict)
+
+
+class TuyaBLEMappingRegistry:
+    """Index of product infos and entity mappings shared by all platforms.
+
+    Platforms register their mapping tables, which are compiled on first
+    lookup into a single (category, product_id) index.
+    """
+
+    def __init__(self) -> None:
+        self._platform_mappings: dict[Platform, dict[str, Any]] = {}
+        self._extra_products: dict[str, dict[str, dict[str, Any]]] = {}
+        self._products: dict[tuple[str, str], TuyaBLEProductMappings] = {}
+        self._categories: dict[str, TuyaBLEProductMappings] = {}
+        self._compiled = False
+        self._products_loaded = False
+
+    def register_platform(self, platform: Platform, mapping: dict[str, Any]) -> None:
+        """Register the category mappings of a platform."""
+        self._platform_mappings[platform] = mapping
+        self._compiled = False
+
+    def add_products(self, products: dict[str, dict[str, dict[str, Any]]]) -> None:
+        """Add product definitions, keyed by category and product_id.
+
+        A definition may reuse the mappings of a known product of the same
+        category with "same_as", and override its "name", "manufacturer"
+        and "fingerbot" datapoints.
+        """
+        for category, category_products in products.items():
+            self._extra_products.setdefault(category, {}).update(category_products)
+        self._compiled = False
+
+    async def async_load_products(self, hass: HomeAssistant) -> None:
+        """Load additional product definitions from the configuration folder."""
+        if self._products_loaded:
+            return
+        self._products_loaded = True
+        path = hass.config.path(PRODUCTS_FILE)
+        try:
+            products = await hass.async_add_executor_job(_load_products, path)
+        except (OSError, ValueError) as err:
+            _LOGGER.error("Could not load product definitions from %s: %s", path, err)
+            return
+        if products:
+            _LOGGER.debug("Loaded product definitions from %s", path)
+            self.add_products(products)
+
+    def _compile(self) -> None:
+        products: dict[tuple[str, str], TuyaBLEProductMappings] = {}
+        categories: dict[str, TuyaBLEProductMappings] = {}
+
+        for category, category_info in devices_database.items():
+            for product_id, info in category_info.products.items():
+                products.setdefault(
+                    (category, product_id), TuyaBLEProductMappings()
+                ).info = info
+            if category_info.info is not None:
+                categories.setdefault(
+                    category, TuyaBLEProductMappings()
+                ).info = category_info.info
+
+        for platform, platform_mapping in self._platform_mappings.items():
+            for category, category_mapping in platform_mapping.items():
+                for product_id, mappings in (category_mapping.products or {}).items():
+                    products.setdefault(
+                        (category, product_id), TuyaBLEProductMappings()
+                    ).platforms[platform] = mappings
+                if category_mapping.mapping is not None:
+                    categories.setdefault(
+                        category, TuyaBLEProductMappings()
+                    ).platforms[platform] = category_mapping.mapping
+
+        for category, category_products in self._extra_products.items():
+            for product_id, definition in category_products.items():
+                entry = self._compile_product(
+                    products, categories, category, product_id, definition
+                )
+                if entry is not None:
+                    products[(category, product_id)] = entry
+
+        self._products = products
+        self._categories = categories
+        self._compiled = True
+
+    def _compile_product(
+        self,
+        products: dict[tuple[str, str], TuyaBLEProductMappings],
+        categories: dict[str, TuyaBLEProductMappings],
+        category: str,
+        product_id: str,
+        definition: dict[str, Any],
+    ) -> TuyaBLEProductMappings | None:
+        same_as = definition.get("same_as")
+        base: TuyaBLEProductMappings | None = None
+        if same_as is not None:
+            base = products.get((category, same_as))
+            if base is None:
+                _LOGGER.warning(
+                    "Product %s/%s refers to unknown product %s",
+                    category,
+                    product_id,
+                    same_as,
+                )
+                return None
+        base_info = (base.info if base else None) or (
+            categories[category].info if category in categories else None
+        )
+
+        name = definition.get("name", base_info.name if base_info else None)
+        if name is None:
+            _LOGGER.warning("Product %s/%s has no name", category, product_id)
+            return None
+        fingerbot = definition.get("fingerbot")
+        try:
+            info = TuyaBLEProductInfo(
+                name=name,
+                manufacturer=definition.get(
+                    "manufacturer",
+                    base_info.manufacturer if base_info else DEVICE_DEF_MANUFACTURER,
+                ),
+                fingerbot=(
+                    TuyaBLEFingerbotInfo(**fingerbot)
+                    if fingerbot is not None
+                    else base_info.fingerbot if base_info else None
+                ),
+            )
+        except TypeError as err:
+            _LOGGER.warning(
+                "Product %s/%s has invalid fingerbot datapoints: %s",
+                category,
+                product_id,
+                err,
+            )
+            return None
+        return TuyaBLEProductMappings(
+            info=info,
+            platforms=dict(base.platforms) if base else {},
+        )
+
+    def _ensure_compiled(self) -> None:
+        if not self._compiled:
+            self._compile()
+
+    def get_product_info(
+        self, category: str, product_id: str
+    ) -> TuyaBLEProductInfo | None:
+        """Return the product info, defaulting to the category-level info."""
+        self._ensure_compiled()
+        entry = self._products.get((category, product_id))
+        if entry is not None and entry.info is not None:
+            return entry.info
+        category_entry = self._categories.get(category)
+        return category_entry.info if category_entry else None
+
+    def get_mappings(
+        self, platform: Platform, category: str, product_id: str
+    ) -> list[Any]:
+        """Return the platform mappings, defaulting to the category mappings."""
+        self._ensure_compiled()
+        entry = self._products.get((category, product_id))
+        if entry is not None:
+            mappings = entry.platforms.get(platform)
+            if mappings is not None:
+                return mappings
+        category_entry = self._categories.get(category)
+        if category_entry is not None:
+            return category_entry.platforms.get(platform, [])
+        return []
+
+    def get_platforms(self, category: str, product_id: str) -> set[Platform]:
+        """Return the platforms having entities for the product."""
+        return {
+            platform
+            for platform in self._platform_mappings
+            if self.get_mappings(platform, category, product_id)
+        }
+
+
+def _load_products(path: str) -> dict[str, dict[str, dict[str, Any]]] | None:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+mapping_registry = TuyaBLEMappingRegistry()
+
+
 def get_product_info_by_ids(
     category: str, product_id: str
 ) -> TuyaBLEProductInfo | None:
     """Lookup TuyaBLEProductInfo for a given category + product_id."""
-    category_info = devices_database.get(category)
-    if not category_info:
-        return None
+    return mapping_registry.get_product_info(category, product_id)
+
+
+def get_device_mappings(platform: Platform, device: TuyaBLEDevice) -> list[Any]:
+    """Lookup the entity mappings of a platform for the given device."""
+    return mapping_registry.get_mappings(
+        platform, device.category, device.product_id
+    )
+
 
-    # If the product is found by exact match, return it
-    product_info = category_info.products.get(product_id)
-    if product_info is not None:
-        return product_info
+def get_dp_ids(
+    product: TuyaBLEProductInfo | None, *dp_ids: int
+) -> set[int]:
+    """Collect the datapoints an entity state depends on.
 
-    # Otherwise, default to the category-level info
-    return category_info.info
+    Entities of a Fingerbot also depend on its mode and program datapoints,
+    which decide whether they are available.
+    """
+    result = {dp_id for dp_id in dp_ids if dp_id > 0}
+    if product and product.fingerbot:
+        result.add(product.fingerbot.mode)
+        if product.fingerbot.program:
+            result.add(product.fingerbot.program)
+    return result
 
 
 def get_full_address(address: str) -> str:
@@ -348,6 +562,12 @@ class TuyaBLECoordinator(DataUpdateCoordinator[None]):
         self._device = device
         self._disconnected: bool = True
         self._unsub_disconnect: CALLBACK_TYPE | None = None
+        # Number of state writes skipped by entities as their state is unchanged
+        self.suppressed_writes: int = 0
+        # Listeners by datapoint id, None key holds listeners of all datapoints
+        self._dp_listeners: dict[int | None, list[CALLBACK_TYPE]] = {}
+        # Datapoints of the update being dispatched, None for other updates
+        self.changed_dp_ids: frozenset[int] | None = None
 
         device.register_connected_callback(self._async_handle_connect)
         device.register_callback(self._async_handle_update)
@@ -364,6 +584,39 @@ class TuyaBLECoordinator(DataUpdateCoordinator[None]):
         """Return True if the device is currently connected."""
         return not self._disconnected
 
+    @callback
+    def async_add_dp_listener(
+        self, update_callback: CALLBACK_TYPE, dp_ids: set[int] | None
+    ) -> CALLBACK_TYPE:
+        """Listen for updates of the datapoints, of all of them if dp_ids is None."""
+        keys: set[int | None] = {None} if dp_ids is None else set(dp_ids)
+        for key in keys:
+            self._dp_listeners.setdefault(key, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            for key in keys:
+                listeners = self._dp_listeners.get(key)
+                if listeners and update_callback in listeners:
+                    listeners.remove(update_callback)
+                    if not listeners:
+                        del self._dp_listeners[key]
+
+        return remove_listener
+
+    @callback
+    def _async_update_dp_listeners(self, updates: list[TuyaBLEDataPoint]) -> None:
+        """Notify only listeners of the updated datapoints, each one once."""
+        callbacks = dict.fromkeys(self._dp_listeners.get(None, ()))
+        for update in updates:
+            callbacks.update(dict.fromkeys(self._dp_listeners.get(update.id, ())))
+        self.changed_dp_ids = frozenset(update.id for update in updates)
+        try:
+            for update_callback in callbacks:
+                update_callback()
+        finally:
+            self.changed_dp_ids = None
+
     @callback
     def _async_handle_connect(self) -> None:
         """Handle device connected callback."""
@@ -382,7 +635,7 @@ class TuyaBLECoordinator(DataUpdateCoordinator[None]):
     def _async_handle_update(self, updates: list[TuyaBLEDataPoint]) -> None:
         """Handle data updates from the device."""
         self._async_handle_connect()
-        self.async_set_updated_data(None)  # Not passing any structured data
+        self._async_update_dp_listeners(updates)
 
         info = get_device_product_info(self._device)
         if info and info.fingerbot and info.fingerbot.manual_control != 0:
@@ -442,6 +695,7 @@ class TuyaBLEEntity(CoordinatorEntity):
         self._coordinator = coordinator
         self._device = device
         self._product = product
+        self._last_state_fingerprint: tuple[Any, ...] | None = None
 
         if description.translation_key is None:
             self._attr_translation_key = description.key
@@ -463,12 +717,52 @@ class TuyaBLEEntity(CoordinatorEntity):
             self.entity_id
         )
 
+    @property
+    def dp_ids(self) -> set[int] | None:
+        """Return datapoints the entity depends on, None if all of them."""
+        return None
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to updates of the entity datapoints."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._coordinator.async_add_dp_listener(
+                self._handle_coordinator_update, self.dp_ids
+            )
+        )
+
     @property
     def available(self) -> bool:
         """Return True if entity is currently available (connected)."""
         return self._coordinator.connected
 
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        """Return what the written state of the entity is made of."""
+        return (
+            self.available,
+            self.state,
+            self.icon,
+            self.state_attributes,
+            self.extra_state_attributes,
+        )
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state to Home Assistant and remember it."""
+        self._last_state_fingerprint = self._state_fingerprint()
+        super().async_write_ha_state()
+
+    @callback
+    def async_write_ha_state_if_changed(self) -> None:
+        """Write the state, unless it is the same as the last one written."""
+        fingerprint = self._state_fingerprint()
+        if not self.force_update and fingerprint == self._last_state_fingerprint:
+            self._coordinator.suppressed_writes += 1
+            return
+        self._last_state_fingerprint = fingerprint
+        super().async_write_ha_state()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
@@ -0,0 +1,96 @@
+"""Diagnostics support for Tuya BLE."""
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_DEVICE_ID
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_ACCESS_ID,
+    CONF_ACCESS_SECRET,
+    CONF_LOCAL_KEY,
+    CONF_UUID,
+    DOMAIN,
+)
+from .devices import TuyaBLEData
+
+TO_REDACT = {
+    CONF_ACCESS_ID,
+    CONF_ACCESS_SECRET,
+    CONF_DEVICE_ID,
+    CONF_LOCAL_KEY,
+    CONF_UUID,
+}
+
+
+def _datapoint_value(value: bytes | bool | int | str) -> bool | int | str:
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics of the device of the config entry."""
+    data: TuyaBLEData = hass.data[DOMAIN][entry.entry_id]
+    device = data.device
+    fleet = device.fleet
+    stream_stats = device.stream_stats
+    group_report = fleet.last_group_report if fleet else None
+
+    return {
+        "entry": {
+            "title": entry.title,
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "device": {
+            "address": device.address,
+            "category": device.category,
+            "product_id": device.product_id,
+            "product_name": data.product.name if data.product else None,
+            "device_version": device.device_version,
+            "hardware_version": device.hardware_version,
+            "protocol_version": device.protocol_version,
+            "is_connected": device.is_connected,
+            "rssi": device.rssi,
+            "command_latency": device.command_latency,
+            "confirmation_latency": device.confirmation_latency,
+            "is_streaming": device.is_streaming,
+        },
+        "datapoints": [
+            {
+                "id": datapoint.id,
+                "type": datapoint.type.name,
+                "value": _datapoint_value(datapoint.value),
+            }
+            for datapoint in device.datapoints
+        ],
+        "metrics": device.metrics.as_dict(),
+        "stream": asdict(stream_stats) if stream_stats else None,
+        "platforms": list(data.platforms),
+        "setup_times": {
+            stage: round(duration, 3) for stage, duration in data.setup_times.items()
+        },
+        "suppressed_writes": data.coordinator.suppressed_writes,
+        "fleet": asdict(fleet.stats) if fleet else None,
+        "pool": asdict(fleet.pool_stats) if fleet else None,
+        "actuation_time": fleet.actuation_time.as_dict() if fleet else None,
+        "contended_actuation_time": (
+            fleet.contended_actuation_time.as_dict() if fleet else None
+        ),
+        "adapters": (
+            {
+                adapter: asdict(stats)
+                for adapter, stats in fleet.adapter_stats.items()
+            }
+            if fleet
+            else None
+        ),
+        "last_group_report": asdict(group_report) if group_report else None,
+    }
@@ -1,228 +1,894 @@
-"""Support for Tuya BLE lights."""
+"""The Tuya BLE integration."""
 from __future__ import annotations
 
+from dataclasses import dataclass, field
+
+import asyncio
+from collections.abc import Iterable
 import logging
+from struct import pack, unpack
 import time
 from typing import Any
 
+import voluptuous as vol
+
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
-    ATTR_COLOR_TEMP,
+    ATTR_COLOR_TEMP_KELVIN,
+    ATTR_HS_COLOR,
+    ATTR_TRANSITION,
+    ATTR_WHITE,
     ColorMode,
     LightEntity,
+    LightEntityDescription,
     LightEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_platform, entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN, TuyaBLEDevice
-from .tuya_ble import TuyaBLEEntity
+from .base import IntegerTypeData
+from .const import (
+    ATTR_MAX_FRAME_RATE,
+    DOMAIN,
+    LIGHT_CATEGORIES,
+    LIGHT_COLOUR_CATEGORIES,
+    LIGHT_DP_ID,
+    LIGHT_TRANSITION_LATENCY_FACTOR,
+    LIGHT_TRANSITION_MIN_INTERVAL,
+    SERVICE_STREAM_START,
+    SERVICE_STREAM_STOP,
+)
+from .devices import (
+    TuyaBLEData,
+    TuyaBLEEntity,
+    TuyaBLEProductInfo,
+    get_device_mappings,
+    get_dp_ids,
+    mapping_registry,
+)
+from .tuya_ble import (
+    TuyaBLEConfirmation,
+    TuyaBLEConfirmationError,
+    TuyaBLEDataPointType,
+    TuyaBLEDevice,
+)
+from .tuya_ble.const import STREAM_MAX_FRAME_RATE
 
 _LOGGER = logging.getLogger(__name__)
 
-# Update service and characteristic UUIDs based on your device
-TUYA_SERVICE_UUID = "0000fd50-0000-1001-8001-00805f9b07d0"
-TUYA_WRITE_CHARACTERISTIC = "00000001-0000-1001-8001-00805f9b07d0"
-TUYA_NOTIFY_CHARACTERISTIC = "00000002-0000-1001-8001-00805f9b07d0"
 
-# Tuya BLE Protocol Constants for Lighting
-LIGHT_DP_ID = {
-    "SWITCH": 0x01,      # Switch
-    "BRIGHT": 0x02,      # Brightness
-    "TEMP": 0x03,        # Color Temperature
+@dataclass
+class TuyaBLELightMapping:
+    switch_dp_id: int
+    description: LightEntityDescription = field(
+        default_factory=lambda: LightEntityDescription(
+            key="light",
+            name=None,
+        )
+    )
+    force_add: bool = True
+    brightness_dp_id: int = 0
+    brightness_min: int = 0
+    brightness_max: int = 100
+    # Exponent from Home Assistant brightness, perceived, to the light level
+    # of the device, linear to the power of the LEDs
+    brightness_gamma: float = 2.2
+    color_temp_dp_id: int = 0
+    color_temp_min: int = 0
+    color_temp_max: int = 100
+    # Device value of the warmest color temperature is color_temp_max
+    color_temp_reverse: bool = False
+    min_color_temp_kelvin: int = 2000
+    max_color_temp_kelvin: int = 6500
+    # Colour of the device, hue, saturation and value packed in one datapoint
+    color_dp_id: int = 0
+    hue_min: int = 0
+    hue_max: int = 360
+    saturation_min: int = 0
+    saturation_max: int = 1000
+    value_min: int = 0
+    value_max: int = 1000
+    # Enum datapoint switching the device between white and colour light
+    work_mode_dp_id: int = 0
+    work_mode_white: int = 0
+    work_mode_colour: int = 1
+
+
+@dataclass
+class TuyaBLECategoryLightMapping:
+    products: dict[str, list[TuyaBLELightMapping]] | None = None
+    mapping: list[TuyaBLELightMapping] | None = None
+
+
+# Datapoints of the lights this integration started with, colour
+# temperature from 153 mireds at 0 to 500 mireds at 100
+default_mapping: list[TuyaBLELightMapping] = [
+    TuyaBLELightMapping(
+        switch_dp_id=LIGHT_DP_ID["SWITCH"],
+        brightness_dp_id=LIGHT_DP_ID["BRIGHT"],
+        color_temp_dp_id=LIGHT_DP_ID["TEMP"],
+        color_temp_reverse=True,
+        max_color_temp_kelvin=6536,
+    ),
+]
+
+# Standard instruction set of Tuya lights, white ones
+white_mapping = TuyaBLELightMapping(
+    switch_dp_id=LIGHT_DP_ID["SWITCH_LED"],
+    force_add=False,
+    brightness_dp_id=LIGHT_DP_ID["BRIGHT_V2"],
+    brightness_min=10,
+    brightness_max=1000,
+    color_temp_dp_id=LIGHT_DP_ID["TEMP_V2"],
+    color_temp_max=1000,
+)
+
+# Standard instruction set of Tuya lights, with colour
+colour_mapping = TuyaBLELightMapping(
+    switch_dp_id=LIGHT_DP_ID["SWITCH_LED"],
+    force_add=False,
+    brightness_dp_id=LIGHT_DP_ID["BRIGHT_V2"],
+    brightness_min=10,
+    brightness_max=1000,
+    color_temp_dp_id=LIGHT_DP_ID["TEMP_V2"],
+    color_temp_max=1000,
+    color_dp_id=LIGHT_DP_ID["COLOUR_V2"],
+    work_mode_dp_id=LIGHT_DP_ID["WORK_MODE"],
+)
+
+
+mapping: dict[str, TuyaBLECategoryLightMapping] = {
+    category: TuyaBLECategoryLightMapping(
+        mapping=[
+            colour_mapping if category in LIGHT_COLOUR_CATEGORIES else white_mapping,
+            # Added unless the device reports the standard switch
+            *default_mapping,
+        ]
+    )
+    for category in LIGHT_CATEGORIES
 }
 
-async def async_setup_entry(
-    hass: HomeAssistant,
-    entry: ConfigEntry,
-    async_add_entities: AddEntitiesCallback,
+
+mapping_registry.register_platform(Platform.LIGHT, mapping)
+
+
+def get_mapping_by_device(device: TuyaBLEDevice) -> list[TuyaBLELightMapping]:
+    """Return the light mappings, the default one for unknown products."""
+    if not mapping_registry.get_platforms(device.category, device.product_id):
+        return default_mapping
+    return get_device_mappings(Platform.LIGHT, device)
+
+
+@callback
+def async_migrate_unique_id(
+    hass: HomeAssistant, entry: ConfigEntry, device: TuyaBLEDevice
 ) -> None:
-    """Set up Tuya BLE light based on config entry."""
-    data = hass.data[DOMAIN][entry.entry_id]
-    
-    if data.device:
-        async_add_entities([TuyaBLELight(data.device)])
-
-class TuyaBLELight(TuyaBLEEntity, LightEntity, RestoreEntity):
-    """Tuya BLE light device."""
-
-    _attr_supported_color_modes = {ColorMode.COLOR_TEMP, ColorMode.BRIGHTNESS}
-    _attr_supported_features = LightEntityFeature.TRANSITION
-
-    def __init__(self, device: TuyaBLEDevice) -> None:
-        """Initialize the light."""
-        super().__init__(device)
-        self._attr_unique_id = f"{device.mac}_light"
-        self._attr_name = device.name or f"Tuya Light {device.mac[-6:]}"
-        self._is_on = False
-        self._brightness = 0
-        self._color_temp = 0
-        self._manufacturer_data = "0x00000100D320323A40B54E4004C889B00BEEE0A1"
-        self._last_update = 0
-        self._state_cache = {}
-        self._available = True
-
-    async def async_added_to_hass(self) -> None:
-        """Handle entity about to be added to hass."""
-        await super().async_added_to_hass()
-        
-        # Restore previous state if available
-        last_state = await self.async_get_last_state()
-        if last_state:
-            self._is_on = last_state.state == "on"
-            if last_state.attributes.get(ATTR_BRIGHTNESS):
-                self._brightness = last_state.attributes[ATTR_BRIGHTNESS]
-            if last_state.attributes.get(ATTR_COLOR_TEMP):
-                self._color_temp = last_state.attributes[ATTR_COLOR_TEMP]
-            
-            # Cache the restored state
-            self._state_cache = {
-                "state": self._is_on,
-                "brightness": self._brightness,
-                "color_temp": self._color_temp,
-                "timestamp": time.time()
+    """Move the light of the former platform, keyed by address, to the device ID."""
+    registry = er.async_get(hass)
+    unique_id = f"{device.device_id}-{default_mapping[0].description.key}"
+    if registry.async_get_entity_id(Platform.LIGHT, DOMAIN, unique_id):
+        return
+    for old_unique_id in {f"{device.address}_light", f"{device.address.lower()}_light"}:
+        entity_id = registry.async_get_entity_id(Platform.LIGHT, DOMAIN, old_unique_id)
+        if entity_id is None:
+            continue
+        entity_entry = registry.async_get(entity_id)
+        if entity_entry is None or entity_entry.config_entry_id != entry.entry_id:
+            continue
+        _LOGGER.debug("%s: Migrating unique ID to %s", entity_id, unique_id)
+        registry.async_update_entity(entity_id, new_unique_id=unique_id)
+        return
+
+
+def encode_hsv(
+    hue: int, saturation: int, value: int, dp_type: TuyaBLEDataPointType
+) -> bytes | str:
+    """Pack a colour the way the colour datapoint holds it."""
+    if dp_type == TuyaBLEDataPointType.DT_STRING:
+        return f"{hue:04x}{saturation:04x}{value:04x}"
+    return pack(">HHH", hue, saturation, value)
+
+
+def decode_hsv(data: bytes | str) -> tuple[int, int, int] | None:
+    """Unpack hue, saturation and value of the colour datapoint."""
+    if isinstance(data, str):
+        if len(data) < 12:
+            return None
+        try:
+            return int(data[0:4], 16), int(data[4:8], 16), int(data[8:12], 16)
+        except ValueError:
+            return None
+    if isinstance(data, bytes) and len(data) >= 6:
+        return unpack(">HHH", data[:6])
+    return None
+
+
+class TuyaBLELightTable:
+    """Conversion of a range of values to another one, as lookup tables."""
+
+    def __init__(
+        self,
+        device_range: IntegerTypeData,
+        to_device: list[int],
+        from_device: list[float],
+        offset: int = 0,
+    ) -> None:
+        self._device_range = device_range
+        self._to_device = to_device
+        self._from_device = from_device
+        self._offset = offset
+
+    def to_device(self, value: float) -> int:
+        index = min(max(round(value) - self._offset, 0), len(self._to_device) - 1)
+        return self._to_device[index]
+
+    def from_device(self, value: int) -> float:
+        index = min(
+            max(value - self._device_range.min, 0), len(self._from_device) - 1
+        )
+        return self._from_device[index]
+
+
+def _brightness_table(
+    dp_id: int, device_min: int, device_max: int, gamma: float
+) -> TuyaBLELightTable:
+    """Table of Home Assistant brightness 0..255, perceptual with gamma.
+
+    A brightness above 0 never maps to a device level of 0, which is dark.
+    """
+    device_range = IntegerTypeData(dp_id, device_min, device_max, 0, 1)
+    return TuyaBLELightTable(
+        device_range,
+        [device_min]
+        + [
+            max(
+                round(device_range.remap_value_from((brightness / 255) ** gamma, 0, 1)),
+                1,
+            )
+            for brightness in range(1, 256)
+        ],
+        [
+            max(
+                1,
+                round(
+                    255
+                    * max(device_range.remap_value_to(value, 0, 1), 0) ** (1 / gamma)
+                ),
+            )
+            for value in range(device_min, device_max + 1)
+        ],
+    )
+
+
+def _linear_table(
+    dp_id: int,
+    device_min: int,
+    device_max: int,
+    to_min: int,
+    to_max: int,
+    precision: int | None = 0,
+) -> TuyaBLELightTable:
+    """Table of integer values to_min..to_max, linear to the device range."""
+    device_range = IntegerTypeData(dp_id, device_min, device_max, 0, 1)
+    return TuyaBLELightTable(
+        device_range,
+        [
+            round(device_range.remap_value_from(value, to_min, to_max))
+            for value in range(to_min, to_max + 1)
+        ],
+        [
+            round(
+                device_range.remap_value_to(value, to_min, to_max),
+                precision,
+            )
+            for value in range(device_min, device_max + 1)
+        ],
+        to_min,
+    )
+
+
+def _color_temp_table(
+    dp_id: int,
+    device_min: int,
+    device_max: int,
+    min_kelvin: int,
+    max_kelvin: int,
+    reverse: bool = False,
+) -> TuyaBLELightTable:
+    """Table of colour temperatures in kelvin, linear in mireds to the device.
+
+    Device values go up with the colour temperature, down if reversed.
+    """
+    device_range = IntegerTypeData(dp_id, device_min, device_max, 0, 1)
+    min_mireds = 1_000_000 / max_kelvin
+    max_mireds = 1_000_000 / min_kelvin
+    return TuyaBLELightTable(
+        device_range,
+        [
+            round(
+                device_range.remap_value_from(
+                    1_000_000 / kelvin, min_mireds, max_mireds, not reverse
+                )
+            )
+            for kelvin in range(min_kelvin, max_kelvin + 1)
+        ],
+        [
+            round(
+                1_000_000
+                / device_range.remap_value_to(
+                    value, min_mireds, max_mireds, not reverse
+                )
+            )
+            for value in range(device_min, device_max + 1)
+        ],
+        min_kelvin,
+    )
+
+
+class TuyaBLELightTables:
+    """Lookup tables of all conversions of a light, built once per mapping."""
+
+    def __init__(self, mapping: TuyaBLELightMapping) -> None:
+        self.brightness = _brightness_table(
+            mapping.brightness_dp_id,
+            mapping.brightness_min,
+            mapping.brightness_max,
+            mapping.brightness_gamma,
+        )
+        self.color_temp = _color_temp_table(
+            mapping.color_temp_dp_id,
+            mapping.color_temp_min,
+            mapping.color_temp_max,
+            mapping.min_color_temp_kelvin,
+            mapping.max_color_temp_kelvin,
+            mapping.color_temp_reverse,
+        )
+        self.hue = _linear_table(
+            mapping.color_dp_id, mapping.hue_min, mapping.hue_max, 0, 360
+        )
+        self.saturation = _linear_table(
+            mapping.color_dp_id,
+            mapping.saturation_min,
+            mapping.saturation_max,
+            0,
+            100,
+            precision=1,
+        )
+        self.value = _brightness_table(
+            mapping.color_dp_id,
+            mapping.value_min,
+            mapping.value_max,
+            mapping.brightness_gamma,
+        )
+
+
+# Tables by id of the mapping, mappings live as long as their platform module
+_light_tables: dict[int, TuyaBLELightTables] = {}
+
+
+def get_light_tables(mapping: TuyaBLELightMapping) -> TuyaBLELightTables:
+    tables = _light_tables.get(id(mapping))
+    if tables is None:
+        tables = TuyaBLELightTables(mapping)
+        _light_tables[id(mapping)] = tables
+    return tables
+
+
+class TuyaBLELight(TuyaBLEEntity, LightEntity):
+    """Representation of a Tuya BLE light."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: DataUpdateCoordinator,
+        device: TuyaBLEDevice,
+        product: TuyaBLEProductInfo,
+        mapping: TuyaBLELightMapping,
+    ) -> None:
+        super().__init__(hass, coordinator, device, product, mapping.description)
+        self._mapping = mapping
+        self._tables = get_light_tables(mapping)
+
+        self._white_color_mode: ColorMode | None = None
+        if mapping.color_temp_dp_id:
+            self._white_color_mode = ColorMode.COLOR_TEMP
+            self._attr_min_color_temp_kelvin = mapping.min_color_temp_kelvin
+            self._attr_max_color_temp_kelvin = mapping.max_color_temp_kelvin
+        elif mapping.brightness_dp_id:
+            # Brightness can't be combined with colour, white can
+            self._white_color_mode = (
+                ColorMode.WHITE if mapping.color_dp_id else ColorMode.BRIGHTNESS
+            )
+        if mapping.color_dp_id:
+            self._attr_supported_color_modes = {ColorMode.HS}
+            if self._white_color_mode:
+                self._attr_supported_color_modes.add(self._white_color_mode)
+        else:
+            self._attr_supported_color_modes = {
+                self._white_color_mode or ColorMode.ONOFF
             }
+        if mapping.brightness_dp_id or mapping.color_temp_dp_id:
+            self._attr_supported_features = LightEntityFeature.TRANSITION
+        self._transition_task: asyncio.Task | None = None
+        # Requested values shown until the device reports them back,
+        # by datapoint id, with the command that requested them
+        self._optimistic: dict[int, tuple[TuyaBLEConfirmation, Any]] = {}
+
+    @property
+    def dp_ids(self) -> set[int] | None:
+        """Return datapoints the entity depends on."""
+        return get_dp_ids(
+            self._product,
+            self._mapping.switch_dp_id,
+            self._mapping.brightness_dp_id,
+            self._mapping.color_temp_dp_id,
+            self._mapping.color_dp_id,
+            self._mapping.work_mode_dp_id,
+        )
+
+    def _get_value(self, dp_id: int) -> Any:
+        """Return the value of the datapoint, the requested one until confirmed."""
+        optimistic = self._optimistic.get(dp_id)
+        if optimistic is not None:
+            return optimistic[1]
+        datapoint = self._device.datapoints[dp_id]
+        if datapoint:
+            return datapoint.value
+        return None
+
+    def _is_colour_mode(self) -> bool:
+        """Return true if the device shows a colour rather than white light."""
+        if not self._mapping.color_dp_id:
+            return False
+        if not self._mapping.work_mode_dp_id:
+            return self._white_color_mode is None
+        return (
+            self._get_value(self._mapping.work_mode_dp_id)
+            == self._mapping.work_mode_colour
+        )
+
+    def _get_hsv(self) -> tuple[int, int, int] | None:
+        value = self._get_value(self._mapping.color_dp_id)
+        if value is not None:
+            return decode_hsv(value)
+        return None
 
     @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._available and super().available
+    def color_mode(self) -> ColorMode:
+        """Return the color mode of the light."""
+        if self._is_colour_mode():
+            return ColorMode.HS
+        return self._white_color_mode or ColorMode.ONOFF
 
     @property
-    def is_on(self) -> bool:
-        """Return true if light is on."""
-        return self._is_on
+    def is_on(self) -> bool | None:
+        """Return true if the light is on."""
+        value = self._get_value(self._mapping.switch_dp_id)
+        if value is not None:
+            return bool(value)
+        return None
 
     @property
     def brightness(self) -> int | None:
-        """Return the brightness of this light between 0..255."""
-        return self._brightness
+        """Return the brightness of the light between 1..255."""
+        if self._is_colour_mode():
+            hsv = self._get_hsv()
+            return round(self._tables.value.from_device(hsv[2])) if hsv else None
+        if not self._mapping.brightness_dp_id:
+            return None
+        value = self._get_value(self._mapping.brightness_dp_id)
+        if value is not None:
+            return round(self._tables.brightness.from_device(value))
+        return None
 
     @property
-    def color_temp(self) -> int | None:
-        """Return the color temperature in mireds."""
-        return self._color_temp
-
-    def _cache_state(self) -> None:
-        """Cache the current state."""
-        self._state_cache = {
-            "state": self._is_on,
-            "brightness": self._brightness,
-            "color_temp": self._color_temp,
-            "timestamp": time.time()
-        }
-
-    def _restore_cached_state(self) -> None:
-        """Restore state from cache if recent."""
-        if self._state_cache and time.time() - self._state_cache["timestamp"] < 300:  # 5 minutes
-            self._is_on = self._state_cache["state"]
-            self._brightness = self._state_cache["brightness"]
-            self._color_temp = self._state_cache["color_temp"]
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        if self.coordinator.connected:
-            self._available = True
-        else:
-            self._available = False
-            self._restore_cached_state()
-        super()._handle_coordinator_update()
+    def color_temp_kelvin(self) -> int | None:
+        """Return the color temperature of the light in Kelvin."""
+        if not self._mapping.color_temp_dp_id:
+            return None
+        value = self._get_value(self._mapping.color_temp_dp_id)
+        if value is not None:
+            return round(self._tables.color_temp.from_device(value))
+        return None
 
-    async def async_turn_on(self, **kwargs: Any) -> None:
-        """Turn the light on."""
+    @property
+    def hs_color(self) -> tuple[float, float] | None:
+        """Return the hue and saturation of the light."""
+        if not self._mapping.color_dp_id:
+            return None
+        hsv = self._get_hsv()
+        if hsv:
+            return (
+                self._tables.hue.from_device(hsv[0]),
+                self._tables.saturation.from_device(hsv[1]),
+            )
+        return None
+
+    def _get_device_value(self, dp_id: int, default: int) -> int:
+        value = self._get_value(dp_id)
+        if isinstance(value, int):
+            return value
+        return default
+
+    async def _async_send(
+        self,
+        is_on: bool | None = None,
+        brightness: int | None = None,
+        color_temp: int | None = None,
+        work_mode: int | None = None,
+        color: tuple[int, int, int] | None = None,
+        confirm: bool = True,
+    ) -> None:
+        """Send the given device values, all of them in one frame.
+
+        Unless streaming, the requested values are shown at once and rolled
+        back if the device does not report them back in time.
+        """
+        datapoints = self._device.datapoints
+        values: list[
+            tuple[int, TuyaBLEDataPointType, bool | int | bytes | str]
+        ] = []
+        if is_on is not None:
+            values.append(
+                (self._mapping.switch_dp_id, TuyaBLEDataPointType.DT_BOOL, is_on)
+            )
+        if work_mode is not None and self._mapping.work_mode_dp_id:
+            values.append(
+                (
+                    self._mapping.work_mode_dp_id,
+                    TuyaBLEDataPointType.DT_ENUM,
+                    work_mode,
+                )
+            )
+        if brightness is not None and self._mapping.brightness_dp_id:
+            values.append(
+                (
+                    self._mapping.brightness_dp_id,
+                    TuyaBLEDataPointType.DT_VALUE,
+                    brightness,
+                )
+            )
+        if color_temp is not None and self._mapping.color_temp_dp_id:
+            values.append(
+                (
+                    self._mapping.color_temp_dp_id,
+                    TuyaBLEDataPointType.DT_VALUE,
+                    color_temp,
+                )
+            )
+        if color is not None and self._mapping.color_dp_id:
+            datapoint = datapoints[self._mapping.color_dp_id]
+            dp_type = datapoint.type if datapoint else TuyaBLEDataPointType.DT_STRING
+            values.append(
+                (self._mapping.color_dp_id, dp_type, encode_hsv(*color, dp_type))
+            )
+
+        if self._device.is_streaming:
+            # Latest values win, the device gets no frame queued behind
+            self._device.stream_datapoints(values)
+            return
+
+        async def _send() -> None:
+            datapoints.begin_update()
+            try:
+                for dp_id, dp_type, value in values:
+                    datapoint = datapoints.get_or_create(dp_id, dp_type, value)
+                    await datapoint.set_value(value)
+            finally:
+                await datapoints.end_update()
+
+        async def _send_grouped() -> None:
+            # Lights commanded together, by a group or a scene, are sent together
+            fleet = self._device.fleet
+            if fleet is not None:
+                await fleet.send_grouped(self._device, _send)
+            else:
+                await _send()
+
+        dp_ids = [dp_id for dp_id, _, _ in values]
+        if not confirm:
+            try:
+                await _send_grouped()
+            except Exception as err:
+                self._rollback(dp_ids)
+                raise HomeAssistantError(
+                    f"{self._device.name}: {err}, state rolled back"
+                ) from err
+            except asyncio.CancelledError:
+                # A newer command stopped the transition sending this step
+                self._rollback(dp_ids)
+                raise
+            return
+
+        confirmation = self._device.expect_datapoints(dp_ids)
+        for dp_id, _, value in values:
+            self._optimistic[dp_id] = (confirmation, value)
+        self.async_write_ha_state()
         try:
-            await self.device.ensure_connected()
-            
-            # Build the command packet according to the protocol
-            command = self.device._build_packets(
-                seq_num=self.device._get_sequence_number(),
-                code=self.device.TuyaBLECode.FUN_SENDER_CONTROL,
-                data=bytes([
-                    LIGHT_DP_ID["SWITCH"],  # DP ID
-                    0x01,                   # Type (bool)
-                    0x01,                   # Length
-                    0x01                    # Value (ON)
-                ])
-            )
-            
-            # Send the command
-            for packet in command:
-                await self.device._write_packet(packet)
-            
-            if ATTR_BRIGHTNESS in kwargs:
-                brightness = int(kwargs[ATTR_BRIGHTNESS] * 100 / 255)
-                bright_command = self.device._build_packets(
-                    seq_num=self.device._get_sequence_number(),
-                    code=self.device.TuyaBLECode.FUN_SENDER_CONTROL,
-                    data=bytes([
-                        LIGHT_DP_ID["BRIGHT"],  # DP ID
-                        0x02,                   # Type (value)
-                        0x04,                   # Length
-                        brightness              # Value
-                    ])
+            try:
+                await _send_grouped()
+            except Exception as err:
+                # Values set before the send failed were never sent
+                self._rollback(dp_ids, confirmation)
+                raise HomeAssistantError(
+                    f"{self._device.name}: {err}, state rolled back"
+                ) from err
+            try:
+                latency = await self._device.wait_for_confirmation(confirmation)
+            except TuyaBLEConfirmationError as err:
+                self._rollback(confirmation.pending, confirmation)
+                raise HomeAssistantError(
+                    f"{self._device.name}: {err}, state rolled back"
+                ) from err
+        finally:
+            self._device.cancel_confirmation(confirmation)
+            self._clear_optimistic(confirmation)
+            self.async_write_ha_state_if_changed()
+        _LOGGER.debug(
+            "%s: Light state confirmed in %.3fs", self._device.address, latency
+        )
+
+    def _clear_optimistic(self, confirmation: TuyaBLEConfirmation) -> None:
+        """Drop the requested values of the command, newer ones are kept."""
+        for dp_id in [
+            dp_id
+            for dp_id, (owner, _) in self._optimistic.items()
+            if owner is confirmation
+        ]:
+            del self._optimistic[dp_id]
+
+    def _rollback(
+        self,
+        dp_ids: Iterable[int],
+        confirmation: TuyaBLEConfirmation | None = None,
+    ) -> None:
+        """Restore the values last reported by the device.
+
+        Values requested by a newer command than the confirmation are kept.
+        """
+        for dp_id in list(dp_ids):
+            optimistic = self._optimistic.get(dp_id)
+            if optimistic is not None and optimistic[0] is not confirmation:
+                continue
+            datapoint = self._device.datapoints[dp_id]
+            if datapoint:
+                datapoint.rollback()
+
+    def _stop_transition(self) -> None:
+        """Stop a stepped transition in progress, newer commands win."""
+        if self._transition_task is not None:
+            self._transition_task.cancel()
+            self._transition_task = None
+
+    def _start_transition(
+        self,
+        transition: float,
+        turn_off: bool,
+        brightness: int | None,
+        color_temp: int | None,
+    ) -> None:
+        """Step to the target values in the background."""
+        self._transition_task = self._hass.async_create_background_task(
+            self._async_step_transition(transition, turn_off, brightness, color_temp),
+            f"{DOMAIN} {self._device.address} transition",
+        )
+
+    async def _async_step_transition(
+        self,
+        transition: float,
+        turn_off: bool,
+        brightness: int | None,
+        color_temp: int | None,
+    ) -> None:
+        """Send intermediate values paced by the round trip time of the link.
+
+        Each step waits for the previous one, so the link never queues more
+        than one step and commands of other entities get in between steps.
+        A step failing stops the transition, its values rolled back.
+        """
+        mapping = self._mapping
+        was_on = bool(self.is_on)
+        start_brightness: int | None = None
+        if brightness is not None:
+            start_brightness = (
+                self._get_device_value(
+                    mapping.brightness_dp_id, mapping.brightness_max
                 )
-                for packet in bright_command:
-                    await self.device._write_packet(packet)
-                self._brightness = kwargs[ATTR_BRIGHTNESS]
-            
-            self._is_on = True
-            self._cache_state()
-            self.async_write_ha_state()
-            
-        except Exception as error:
-            _LOGGER.error("Error turning on light: %s", error)
-            self._available = False
-            self.async_write_ha_state()
+                if was_on
+                else mapping.brightness_min
+            )
+        start_color_temp: int | None = None
+        if color_temp is not None:
+            start_color_temp = self._get_device_value(
+                mapping.color_temp_dp_id, color_temp
+            )
+
+        latency = self._device.command_latency or 0.0
+        interval = max(
+            LIGHT_TRANSITION_MIN_INTERVAL, latency * LIGHT_TRANSITION_LATENCY_FACTOR
+        )
+        steps = max(1, int(transition / interval))
+        _LOGGER.debug(
+            "%s: Transition in %s steps of %.3fs",
+            self._device.address,
+            steps,
+            interval,
+        )
+
+        try:
+            for step in range(1, steps + 1):
+                started = time.monotonic()
+                fraction = step / steps
+                step_brightness = (
+                    round(start_brightness + (brightness - start_brightness) * fraction)
+                    if brightness is not None and start_brightness is not None
+                    else None
+                )
+                step_color_temp = (
+                    round(start_color_temp + (color_temp - start_color_temp) * fraction)
+                    if color_temp is not None and start_color_temp is not None
+                    else None
+                )
+                if turn_off and step == steps:
+                    # Restore the brightness for the next time the light is on
+                    await self._async_send(False, start_brightness, confirm=False)
+                    return
+                await self._async_send(
+                    True if step == 1 and not was_on else None,
+                    step_brightness,
+                    step_color_temp,
+                    confirm=False,
+                )
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except HomeAssistantError as err:
+            # Nobody awaits the transition, the command returned already
+            _LOGGER.warning("Transition stopped: %s", err)
+            self.async_write_ha_state_if_changed()
+
+    async def _async_turn_on_colour(
+        self,
+        hs_color: tuple[float, float] | None,
+        brightness: float | None,
+    ) -> None:
+        """Turn the light on showing a colour, in one frame."""
+        tables = self._tables
+        hue, saturation, value = self._get_hsv() or (
+            self._mapping.hue_min,
+            self._mapping.saturation_min,
+            self._mapping.value_max,
+        )
+        if hs_color is not None:
+            hue = tables.hue.to_device(hs_color[0])
+            saturation = tables.saturation.to_device(hs_color[1])
+        if brightness is not None:
+            value = tables.value.to_device(brightness)
+        elif value <= self._mapping.value_min:
+            value = self._mapping.value_max
+        await self._async_send(
+            True,
+            work_mode=self._mapping.work_mode_colour,
+            color=(hue, saturation, value),
+        )
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Turn the light on, sending all changed datapoints in one frame."""
+        self._stop_transition()
+        transition = kwargs.get(ATTR_TRANSITION)
+        hs_color = kwargs.get(ATTR_HS_COLOR)
+        brightness = kwargs.get(ATTR_BRIGHTNESS)
+        white = kwargs.get(ATTR_WHITE)
+        color_temp = kwargs.get(ATTR_COLOR_TEMP_KELVIN)
+        is_colour_mode = self._is_colour_mode()
+
+        if hs_color is not None or (
+            is_colour_mode and white is None and color_temp is None
+        ):
+            await self._async_turn_on_colour(hs_color, brightness)
+            return
+
+        if white is not None:
+            brightness = white
+        if brightness is not None:
+            brightness = self._tables.brightness.to_device(brightness)
+        if color_temp is not None:
+            color_temp = self._tables.color_temp.to_device(color_temp)
+        work_mode = self._mapping.work_mode_white if is_colour_mode else None
+
+        if transition and work_mode is None:
+            if brightness is None and not self.is_on and self._mapping.brightness_dp_id:
+                # Fade in to the last brightness
+                brightness = self._get_device_value(
+                    self._mapping.brightness_dp_id, self._mapping.brightness_max
+                )
+            if brightness is not None or color_temp is not None:
+                self._start_transition(transition, False, brightness, color_temp)
+                return
+
+        await self._async_send(True, brightness, color_temp, work_mode=work_mode)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the light off."""
-        try:
-            await self.device.ensure_connected()
-            
-            command = self.device._build_packets(
-                seq_num=self.device._get_sequence_number(),
-                code=self.device.TuyaBLECode.FUN_SENDER_CONTROL,
-                data=bytes([
-                    LIGHT_DP_ID["SWITCH"],  # DP ID
-                    0x01,                   # Type (bool)
-                    0x01,                   # Length
-                    0x00                    # Value (OFF)
-                ])
-            )
-            
-            for packet in command:
-                await self.device._write_packet(packet)
-            
-            self._is_on = False
-            self._cache_state()
-            self.async_write_ha_state()
-        except Exception as error:
-            _LOGGER.error("Error turning off light: %s", error)
-            self._available = False
-            self.async_write_ha_state()
-
-    def _handle_notification(self, data: bytes) -> None:
-        """Handle incoming data from the device."""
-        try:
-            # Parse the datapoints using the existing method
-            self.device._parse_datapoints_v3(time.time(), 0, data, 0)
-            
-            # Update our state based on the parsed data
-            if LIGHT_DP_ID["SWITCH"] in self.device._datapoints:
-                self._is_on = self.device._datapoints[LIGHT_DP_ID["SWITCH"]].value
-            
-            if LIGHT_DP_ID["BRIGHT"] in self.device._datapoints:
-                self._brightness = int(self.device._datapoints[LIGHT_DP_ID["BRIGHT"]].value * 255 / 100)
-            
-            if LIGHT_DP_ID["TEMP"] in self.device._datapoints:
-                self._color_temp = int(self.device._datapoints[LIGHT_DP_ID["TEMP"]].value * 347 / 100 + 153)
-            
-            self._available = True
-            self._cache_state()
-            self.async_write_ha_state()
-            
-        except Exception as error:
-            _LOGGER.error("Error handling notification: %s", error)
+        self._stop_transition()
+        transition = kwargs.get(ATTR_TRANSITION)
+        if (
+            transition
+            and self.is_on
+            and self._mapping.brightness_dp_id
+            and not self._is_colour_mode()
+        ):
+            self._start_transition(
+                transition, True, self._mapping.brightness_min, None
+            )
+            return
+        await self._async_send(False)
+
+    async def async_start_stream(
+        self, max_frame_rate: float = STREAM_MAX_FRAME_RATE
+    ) -> None:
+        """Stream the following commands, for effects changing many times a second."""
+        self._stop_transition()
+        await self._device.start_stream(max_frame_rate)
+
+    async def async_stop_stream(self) -> None:
+        """Stop streaming commands."""
+        await self._device.stop_stream()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop a transition or a stream in progress."""
+        await super().async_will_remove_from_hass()
+        self._stop_transition()
+        await self._device.stop_stream()
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the Tuya BLE lights."""
+    data: TuyaBLEData = hass.data[DOMAIN][entry.entry_id]
+    if data.device.device_id:
+        async_migrate_unique_id(hass, entry, data.device)
+    mappings = get_mapping_by_device(data.device)
+    entities: list[TuyaBLELight] = []
+    for mapping in mappings:
+        if mapping.force_add and any(
+            entity.entity_description.key == mapping.description.key
+            for entity in entities
+        ):
+            # Replaced by the light of the standard instruction set
+            continue
+        if mapping.force_add or data.device.datapoints.has_id(
+            mapping.switch_dp_id, TuyaBLEDataPointType.DT_BOOL
+        ):
+            entities.append(
+                TuyaBLELight(
+                    hass,
+                    data.coordinator,
+                    data.device,
+                    data.product,
+                    mapping,
+                )
+            )
+    async_add_entities(entities)
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_STREAM_START,
+        {
+            vol.Optional(
+                ATTR_MAX_FRAME_RATE, default=STREAM_MAX_FRAME_RATE
+            ): vol.All(vol.Coerce(float), vol.Range(min=1, max=60)),
+        },
+        "async_start_stream",
+    )
+    platform.async_register_entity_service(
+        SERVICE_STREAM_STOP,
+        {},
+        "async_stop_stream",
+    )
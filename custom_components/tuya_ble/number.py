@@ -18,6 +18,7 @@ from homeassistant.const import (
     TIME_MINUTES,
     TIME_SECONDS,
     VOLUME_MILLILITERS,
+    Platform,
     UnitOfTemperature,
 )
 from homeassistant.core import HomeAssistant, callback
@@ -27,7 +28,14 @@ from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import DOMAIN
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo
+from .devices import (
+    TuyaBLEData,
+    TuyaBLEEntity,
+    TuyaBLEProductInfo,
+    get_device_mappings,
+    get_dp_ids,
+    mapping_registry,
+)
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
@@ -432,18 +440,11 @@ mapping: dict[str, TuyaBLECategoryNumberMapping] = {
 }
 
 
+mapping_registry.register_platform(Platform.NUMBER, mapping)
+
+
 def get_mapping_by_device(device: TuyaBLEDevice) -> list[TuyaBLECategoryNumberMapping]:
-    category = mapping.get(device.category)
-    if category is not None and category.products is not None:
-        product_mapping = category.products.get(device.product_id)
-        if product_mapping is not None:
-            return product_mapping
-        if category.mapping is not None:
-            return category.mapping
-        else:
-            return []
-    else:
-        return []
+    return get_device_mappings(Platform.NUMBER, device)
 
 
 class TuyaBLENumber(TuyaBLEEntity, NumberEntity):
@@ -461,6 +462,11 @@ class TuyaBLENumber(TuyaBLEEntity, NumberEntity):
         self._mapping = mapping
         self._attr_mode = mapping.mode
 
+    @property
+    def dp_ids(self) -> set[int] | None:
+        """Return datapoints the entity depends on."""
+        return get_dp_ids(self._product, self._mapping.dp_id)
+
     @property
     def native_value(self) -> float | None:
         """Return the entity value to represent the entity state."""
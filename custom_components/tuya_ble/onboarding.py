@@ -0,0 +1,117 @@
+"""Bulk onboarding of Tuya BLE devices."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import time
+
+from homeassistant.components.bluetooth import BluetoothServiceInfoBleak
+from homeassistant.core import HomeAssistant
+
+from . import get_fleet
+from .cloud import HASSTuyaBLEDeviceManager
+from .const import ONBOARDING_CONNECT_TIMEOUT
+from .tuya_ble import TuyaBLEDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class TuyaBLEOnboardingResult:
+    address: str
+    name: str
+    success: bool
+    # Time of the first connection and handshake, in seconds
+    elapsed: float
+    error: str | None = None
+
+
+@dataclass
+class TuyaBLEOnboardingReport:
+    results: list[TuyaBLEOnboardingResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def succeeded(self) -> list[TuyaBLEOnboardingResult]:
+        return [result for result in self.results if result.success]
+
+    @property
+    def failed(self) -> list[TuyaBLEOnboardingResult]:
+        return [result for result in self.results if not result.success]
+
+    def summary(self) -> str:
+        """Return one line per device, failures first."""
+        return "\n".join(
+            f"- {result.name} ({result.address}): "
+            + (
+                f"connected in {result.elapsed:.1f}s"
+                if result.success
+                else f"failed after {result.elapsed:.1f}s, {result.error}"
+            )
+            for result in [*self.failed, *self.succeeded]
+        )
+
+
+async def _async_connect(device: TuyaBLEDevice) -> str | None:
+    """Run the first connection and handshake, return the error if any."""
+    await device.initialize()
+    try:
+        await asyncio.wait_for(device.connect(), ONBOARDING_CONNECT_TIMEOUT)
+    except asyncio.TimeoutError:
+        return "timeout"
+    except Exception as err:  # pylint: disable=broad-except
+        return str(err) or type(err).__name__
+    if not device.is_connected:
+        return "not connected"
+    return None
+
+
+async def async_onboard_devices(
+    hass: HomeAssistant, devices: list[tuple[str, BluetoothServiceInfoBleak]]
+) -> TuyaBLEOnboardingReport:
+    """Connect to the devices in parallel, as far as the adapters allow.
+
+    Devices are created in the fleet, the ones connected stay there for
+    their config entries, the others are removed.
+    """
+    fleet = get_fleet(hass)
+    manager = HASSTuyaBLEDeviceManager(hass)
+    started = time.monotonic()
+
+    async def _async_onboard(
+        name: str, discovery_info: BluetoothServiceInfoBleak
+    ) -> TuyaBLEOnboardingResult:
+        device_started = time.monotonic()
+        device = fleet.create_device(
+            manager, discovery_info.device, discovery_info.advertisement
+        )
+        error = await _async_connect(device)
+        if error is not None:
+            await fleet.remove_device(device.address)
+        return TuyaBLEOnboardingResult(
+            device.address,
+            name,
+            error is None,
+            time.monotonic() - device_started,
+            error,
+        )
+
+    report = TuyaBLEOnboardingReport(
+        list(
+            await asyncio.gather(
+                *(
+                    _async_onboard(name, discovery_info)
+                    for name, discovery_info in devices
+                )
+            )
+        )
+    )
+    report.elapsed = time.monotonic() - started
+    _LOGGER.debug(
+        "Onboarded %s devices in %.1fs, %s failed",
+        len(report.succeeded),
+        report.elapsed,
+        len(report.failed),
+    )
+    return report
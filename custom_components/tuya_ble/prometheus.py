@@ -0,0 +1,198 @@
+"""Prometheus export of the Tuya BLE protocol metrics."""
+from __future__ import annotations
+
+from dataclasses import fields
+
+from aiohttp import web
+
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, PROMETHEUS_URL
+from .devices import TuyaBLEData
+from .tuya_ble import TuyaBLEFleet, TuyaBLEHistogram, TuyaBLEMetrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+PREFIX = DOMAIN
+
+# Metrics of TuyaBLEMetrics which go up and down
+GAUGES = {"queue_depth"}
+# Histograms measured in seconds
+HISTOGRAMS = {
+    "command_latency",
+    "confirmation_latency",
+    "connection_duration",
+    "handshake_duration",
+}
+
+
+def _labels(data: TuyaBLEData, extra: str = "") -> str:
+    # Address and category only, to keep one series per device
+    labels = f'address="{data.device.address}",category="{data.device.category}"'
+    return "{" + labels + (f",{extra}" if extra else "") + "}"
+
+
+class _Exposition:
+    """Text exposition format, the samples of a metric kept together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, tuple[str, str, list[str]]] = {}
+
+    def add(self, name: str, kind: str, help_: str, sample: str) -> None:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = (kind, help_, [])
+            self._metrics[name] = metric
+        metric[2].append(sample)
+
+    def add_histogram(
+        self, name: str, help_: str, labels: str, histogram: TuyaBLEHistogram
+    ) -> None:
+        inner = labels[1:-1] + "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(
+            [*map(str, histogram.buckets), "+Inf"], histogram.counts
+        ):
+            cumulative += count
+            self.add(
+                name,
+                "histogram",
+                help_,
+                f'{name}_bucket{{{inner}le="{bound}"}} {cumulative}',
+            )
+        self.add(name, "histogram", help_, f"{name}_sum{labels} {histogram.sum}")
+        self.add(
+            name, "histogram", help_, f"{name}_count{labels} {histogram.count}"
+        )
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for name, (kind, help_, samples) in self._metrics.items():
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def _add_device(exposition: _Exposition, data: TuyaBLEData) -> None:
+    device = data.device
+    metrics: TuyaBLEMetrics = device.metrics
+    labels = _labels(data)
+    for metric_field in fields(metrics):
+        name = metric_field.name
+        value = getattr(metrics, name)
+        help_ = name.replace("_", " ").capitalize()
+        if name in HISTOGRAMS:
+            exposition.add_histogram(
+                f"{PREFIX}_{name}_seconds", f"{help_}, in seconds", labels, value
+            )
+        elif name in GAUGES:
+            exposition.add(
+                f"{PREFIX}_{name}",
+                "gauge",
+                help_,
+                f"{PREFIX}_{name}{labels} {value}",
+            )
+        elif isinstance(value, int):
+            exposition.add(
+                f"{PREFIX}_{name}_total",
+                "counter",
+                help_,
+                f"{PREFIX}_{name}_total{labels} {value}",
+            )
+
+    for phase, duration in metrics.handshake_timings.items():
+        phase_labels = _labels(data, f'phase="{phase}"')
+        exposition.add(
+            f"{PREFIX}_handshake_phase_seconds",
+            "gauge",
+            "Duration of the phases of the last handshake, in seconds",
+            f"{PREFIX}_handshake_phase_seconds{phase_labels} {duration}",
+        )
+
+    exposition.add(
+        f"{PREFIX}_connected",
+        "gauge",
+        "Device connected and paired",
+        f"{PREFIX}_connected{labels} {int(device.is_connected)}",
+    )
+    if device.rssi is not None:
+        exposition.add(
+            f"{PREFIX}_rssi_dbm",
+            "gauge",
+            "Signal strength of the last advertisement",
+            f"{PREFIX}_rssi_dbm{labels} {device.rssi}",
+        )
+    exposition.add(
+        f"{PREFIX}_suppressed_writes_total",
+        "counter",
+        "State writes skipped by the coordinator as unchanged",
+        f"{PREFIX}_suppressed_writes_total{labels} "
+        f"{data.coordinator.suppressed_writes}",
+    )
+
+
+def _add_fleet(exposition: _Exposition, fleet: TuyaBLEFleet) -> None:
+    stats = fleet.stats
+    for name, help_, value in (
+        ("fleet_devices", "Devices of the fleet", stats.devices),
+        ("fleet_connected", "Devices connected", stats.connected),
+        ("fleet_connecting", "Devices holding a slot", stats.connecting),
+        ("fleet_queue_depth", "Devices waiting for a slot", stats.queue_depth),
+    ):
+        exposition.add(
+            f"{PREFIX}_{name}", "gauge", help_, f"{PREFIX}_{name} {value}"
+        )
+    pool = fleet.pool_stats
+    for name, help_, value in (
+        ("pool_hits", "Commands finding their device connected", pool.hits),
+        ("pool_misses", "Commands needing a connection", pool.misses),
+        ("pool_evictions", "Connections released for a device", pool.evictions),
+        ("pool_expirations", "Connections closed when idle", pool.expirations),
+        ("pool_preemptions", "Refreshes preempted", pool.preemptions),
+    ):
+        exposition.add(
+            f"{PREFIX}_{name}_total",
+            "counter",
+            help_,
+            f"{PREFIX}_{name}_total {value}",
+        )
+    exposition.add_histogram(
+        f"{PREFIX}_actuation_time_seconds",
+        "Time to actuate of high priority commands, in seconds",
+        "",
+        fleet.actuation_time,
+    )
+    exposition.add_histogram(
+        f"{PREFIX}_contended_actuation_time_seconds",
+        "Time to actuate of high priority commands waiting for a slot, in seconds",
+        "",
+        fleet.contended_actuation_time,
+    )
+
+
+def render_metrics(hass: HomeAssistant) -> str:
+    """Render the metrics of all devices, read at scrape time only."""
+    exposition = _Exposition()
+    fleet: TuyaBLEFleet | None = None
+    data: TuyaBLEData
+    for data in hass.data.get(DOMAIN, {}).values():
+        _add_device(exposition, data)
+        fleet = fleet or data.device.fleet
+    if fleet is not None:
+        _add_fleet(exposition, fleet)
+    return exposition.render()
+
+
+class TuyaBLEMetricsView(HomeAssistantView):
+    """Serve the metrics to Prometheus, authenticated by a long-lived token."""
+
+    url = PROMETHEUS_URL
+    name = f"api:{DOMAIN}:metrics"
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics in the Prometheus text format."""
+        hass: HomeAssistant = request.app[KEY_HASS]
+        return web.Response(
+            body=render_metrics(hass), headers={"Content-Type": CONTENT_TYPE}
+        )
@@ -10,7 +10,7 @@ from homeassistant.components.select import (
     SelectEntity,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature
+from homeassistant.const import Platform, UnitOfTemperature
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -22,7 +22,14 @@ from .const import (
     FINGERBOT_MODE_PUSH,
     FINGERBOT_MODE_SWITCH,
 )
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo
+from .devices import (
+    TuyaBLEData,
+    TuyaBLEEntity,
+    TuyaBLEProductInfo,
+    get_device_mappings,
+    get_dp_ids,
+    mapping_registry,
+)
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
@@ -180,20 +187,13 @@ mapping: dict[str, TuyaBLECategorySelectMapping] = {
 }
 
 
+mapping_registry.register_platform(Platform.SELECT, mapping)
+
+
 def get_mapping_by_device(
     device: TuyaBLEDevice
 ) -> list[TuyaBLECategorySelectMapping]:
-    category = mapping.get(device.category)
-    if category is not None and category.products is not None:
-        product_mapping = category.products.get(device.product_id)
-        if product_mapping is not None:
-            return product_mapping
-        if category.mapping is not None:
-            return category.mapping
-        else:
-            return []
-    else:
-        return []
+    return get_device_mappings(Platform.SELECT, device)
 
 
 class TuyaBLESelect(TuyaBLEEntity, SelectEntity):
@@ -217,6 +217,11 @@ class TuyaBLESelect(TuyaBLEEntity, SelectEntity):
         self._mapping = mapping
         self._attr_options = mapping.description.options
 
+    @property
+    def dp_ids(self) -> set[int] | None:
+        """Return datapoints the entity depends on."""
+        return get_dp_ids(self._product, self._mapping.dp_id)
+
     @property
     def current_option(self) -> str | None:
         """Return the selected entity option to represent the entity state."""
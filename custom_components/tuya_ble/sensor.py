@@ -3,7 +3,9 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 
 import logging
-from typing import Callable
+import time
+from statistics import fmean
+from typing import Any, Callable
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -18,15 +20,20 @@ from homeassistant.const import (
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
     TEMP_CELSIUS,
     VOLUME_MILLILITERS,
+    Platform,
     UnitOfTemperature,
-    UnitOfTime
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import (
+    BACKFILL_MAX_DELAY,
+    BACKFILL_MIN_DELAY,
+    BACKFILL_WINDOW,
     BATTERY_STATE_HIGH,
     BATTERY_STATE_LOW,
     BATTERY_STATE_NORMAL,
@@ -37,17 +44,46 @@ from .const import (
     CO2_LEVEL_NORMAL,
     DOMAIN,
 )
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo
-from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
+from .devices import (
+    TuyaBLEData,
+    TuyaBLEEntity,
+    TuyaBLEProductInfo,
+    get_device_mappings,
+    get_dp_ids,
+    mapping_registry,
+)
+from .statistics import async_backfill_statistics
+from .tuya_ble import TuyaBLEDataPoint, TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
 
 SIGNAL_STRENGTH_DP_ID = -1
 
+SAMPLING_MEAN = "mean"
+SAMPLING_MIN = "min"
+SAMPLING_MAX = "max"
+
+SAMPLING_AGGREGATES: dict[str, Callable[[list[float]], float]] = {
+    SAMPLING_MEAN: fmean,
+    SAMPLING_MIN: min,
+    SAMPLING_MAX: max,
+}
+
 
 TuyaBLESensorIsAvailable = Callable[["TuyaBLESensor", TuyaBLEProductInfo], bool] | None
 
 
+@dataclass
+class TuyaBLESensorSampling:
+    """Policy throttling the state updates of a numeric sensor."""
+    # Minimum time between two state updates, in seconds
+    min_interval: float = 0.0
+    # Smallest change of the value updating the state
+    deadband: float = 0.0
+    # Aggregate of the values received in an interval, latest one if None
+    aggregate: str | None = None
+
+
 @dataclass
 class TuyaBLESensorMapping:
     dp_id: int
@@ -58,6 +94,8 @@ class TuyaBLESensorMapping:
     coefficient: float = 1.0
     icons: list[str] | None = None
     is_available: TuyaBLESensorIsAvailable = None
+    dependencies: list[int] | None = None
+    sampling: TuyaBLESensorSampling | None = None
 
 
 @dataclass
@@ -121,6 +159,7 @@ mapping: dict[str, TuyaBLECategorySensorMapping] = {
                         ],
                     ),
                     is_available=is_co2_alarm_enabled,
+                    dependencies=[13],
                 ),
                 TuyaBLESensorMapping(
                     dp_id=2,
@@ -130,6 +169,11 @@ mapping: dict[str, TuyaBLECategorySensorMapping] = {
                         native_unit_of_measurement=CONCENTRATION_PARTS_PER_MILLION,
                         state_class=SensorStateClass.MEASUREMENT,
                     ),
+                    sampling=TuyaBLESensorSampling(
+                        min_interval=60.0,
+                        deadband=10.0,
+                        aggregate=SAMPLING_MEAN,
+                    ),
                 ),
                 TuyaBLEBatteryMapping(dp_id=15),
                 TuyaBLETemperatureMapping(dp_id=18),
@@ -232,6 +276,11 @@ mapping: dict[str, TuyaBLECategorySensorMapping] = {
             [
                 TuyaBLETemperatureMapping(
                     dp_id=101,
+                    sampling=TuyaBLESensorSampling(
+                        min_interval=60.0,
+                        deadband=0.5,
+                        aggregate=SAMPLING_MEAN,
+                    ),
                 ),
                 TuyaBLESensorMapping(
                     dp_id=102,
@@ -293,18 +342,11 @@ rssi_mapping = TuyaBLESensorMapping(
 )
 
 
+mapping_registry.register_platform(Platform.SENSOR, mapping)
+
+
 def get_mapping_by_device(device: TuyaBLEDevice) -> list[TuyaBLESensorMapping]:
-    category = mapping.get(device.category)
-    if category is not None and category.products is not None:
-        product_mapping = category.products.get(device.product_id)
-        if product_mapping is not None:
-            return product_mapping
-        if category.mapping is not None:
-            return category.mapping
-        else:
-            return []
-    else:
-        return []
+    return get_device_mappings(Platform.SENSOR, device)
 
 
 class TuyaBLESensor(TuyaBLEEntity, SensorEntity):
@@ -320,15 +362,48 @@ class TuyaBLESensor(TuyaBLEEntity, SensorEntity):
     ) -> None:
         super().__init__(hass, coordinator, device, product, mapping.description)
         self._mapping = mapping
+        self._samples: list[float] = []
+        self._published_value: Any = None
+        self._published_at: float | None = None
+        self._unsub_publish: Callable[[], None] | None = None
+        # Report of the datapoint last sampled, by the time it was received
+        self._sampled_report: float | None = None
+        # Readings buffered by the device, as (time recorded, value)
+        self._backfill: list[tuple[float, float]] = []
+        self._unsub_backfill: Callable[[], None] | None = None
+        self._backfill_timestamp: float | None = None
+        # Time the reading of the state was recorded
+        self._reading_timestamp: float = 0.0
+
+    @property
+    def dp_ids(self) -> set[int] | None:
+        """Return datapoints the entity depends on."""
+        if self._mapping.dp_id == SIGNAL_STRENGTH_DP_ID:
+            return None
+        return get_dp_ids(
+            self._product, self._mapping.dp_id, *(self._mapping.dependencies or [])
+        )
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        backfilled = False
+        # Updates also come for the connection state and the datapoints
+        # depended on, only a new report of the datapoint is a sample
+        new_reading = True
         if self._mapping.getter is not None:
+            previous = self._published_value
             self._mapping.getter(self)
+            new_reading = self._attr_native_value != previous
         else:
             datapoint = self._device.datapoints[self._mapping.dp_id]
-            if datapoint:
+            if datapoint is not None:
+                new_reading = datapoint.reported_at != self._sampled_report
+                self._sampled_report = datapoint.reported_at
+            # Buffered readings change the state once their burst is backfilled
+            backfilled = datapoint is not None and self._backfill_reading(datapoint)
+            if datapoint and not backfilled:
+                self._reading_timestamp = datapoint.recorded_at
                 if datapoint.type == TuyaBLEDataPointType.DT_ENUM:
                     if self.entity_description.options is not None:
                         if datapoint.value >= 0 and datapoint.value < len(
@@ -350,7 +425,124 @@ class TuyaBLESensor(TuyaBLEEntity, SensorEntity):
                     )
                 else:
                     self._attr_native_value = datapoint.value
-        self.async_write_ha_state()
+        if self._mapping.sampling is not None and not backfilled:
+            value = self._attr_native_value
+            self._attr_native_value = self._published_value
+            if new_reading:
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._sample(value)
+                else:
+                    self._publish(value)
+        self.async_write_ha_state_if_changed()
+
+    def _backfill_reading(self, datapoint: TuyaBLEDataPoint) -> bool:
+        """Buffer a reading the device recorded a while before reporting it.
+
+        Returns True for such readings, buffered with the rest of their burst
+        unless seen already.
+        """
+        # Timestamps are corrected for the clock offset of the device, live
+        # readings come with next to no delay however far off its clock is
+        delay = datapoint.reported_at - datapoint.recorded_at
+        if (
+            self.state_class != SensorStateClass.MEASUREMENT
+            or datapoint.type != TuyaBLEDataPointType.DT_VALUE
+            or not BACKFILL_MIN_DELAY <= delay <= BACKFILL_MAX_DELAY
+        ):
+            return False
+        # The entity is also updated for the datapoints it depends on
+        if datapoint.timestamp == self._backfill_timestamp:
+            return True
+        self._backfill_timestamp = datapoint.timestamp
+        self._backfill.append(
+            (datapoint.recorded_at, datapoint.value / self._mapping.coefficient)
+        )
+        if self._unsub_backfill is None:
+            self._unsub_backfill = async_call_later(
+                self.hass, BACKFILL_WINDOW, self._async_flush_backfill
+            )
+        return True
+
+    @callback
+    def _async_flush_backfill(self, _: Any) -> None:
+        """Backfill the readings of a burst, the newest one becoming the state."""
+        self._unsub_backfill = None
+        readings = sorted(self._backfill)
+        self._backfill.clear()
+        if not readings:
+            return
+
+        # Statistics are in the unit of the state, only native units are backfilled
+        if self.unit_of_measurement == self.native_unit_of_measurement:
+            hours = async_backfill_statistics(
+                self.hass, self.entity_id, self.unit_of_measurement, readings
+            )
+            _LOGGER.debug(
+                "%s: Backfilled %s readings of %s into %s hours",
+                self._device.address,
+                len(readings),
+                self.entity_id,
+                hours,
+            )
+
+        timestamp, value = readings[-1]
+        if timestamp > self._reading_timestamp:
+            self._reading_timestamp = timestamp
+            self._publish(value)
+            self.async_write_ha_state_if_changed()
+
+    def _sample(self, value: float) -> None:
+        """Add a value, publishing the samples if the interval has elapsed."""
+        self._samples.append(value)
+        if self._unsub_publish is not None:
+            return
+        if self._published_at is not None:
+            wait = (
+                self._published_at
+                + self._mapping.sampling.min_interval
+                - time.monotonic()
+            )
+            if wait > 0:
+                self._unsub_publish = async_call_later(
+                    self.hass, wait, self._async_publish_samples
+                )
+                return
+        self._publish_samples()
+
+    def _publish_samples(self) -> bool:
+        """Publish the aggregate of the samples, unless within the deadband."""
+        sampling = self._mapping.sampling
+        aggregate = SAMPLING_AGGREGATES.get(sampling.aggregate)
+        value = aggregate(self._samples) if aggregate else self._samples[-1]
+        self._samples.clear()
+        if (
+            isinstance(self._published_value, (int, float))
+            and abs(value - self._published_value) < sampling.deadband
+        ):
+            return False
+        self._publish(value)
+        return True
+
+    def _publish(self, value: Any) -> None:
+        self._attr_native_value = value
+        self._published_value = value
+        self._published_at = time.monotonic()
+
+    @callback
+    def _async_publish_samples(self, _: Any) -> None:
+        self._unsub_publish = None
+        if self._samples and self._publish_samples():
+            self.async_write_ha_state_if_changed()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a pending publication of the samples or backfill."""
+        await super().async_will_remove_from_hass()
+        if self._unsub_publish is not None:
+            self._unsub_publish()
+            self._unsub_publish = None
+        if self._unsub_backfill is not None:
+            self._unsub_backfill()
+            self._unsub_backfill = None
 
     @property
     def available(self) -> bool:
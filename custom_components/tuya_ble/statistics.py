@@ -0,0 +1,206 @@
+"""Import of historical and buffered readings of Tuya BLE devices into statistics."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+import logging
+
+from homeassistant.components.recorder.models import (
+    StatisticData,
+    StatisticMetaData,
+)
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    async_import_statistics,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, HISTORY_DAILY, HISTORY_HOURLY, HISTORY_MONTHLY
+from .devices import TuyaBLEProductInfo, get_short_address
+from .tuya_ble import TuyaBLEDataPoint, TuyaBLEDevice, TuyaBLEError, decode_history
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class TuyaBLEHistoryMapping:
+    key: str
+    name: str
+    unit: str | None
+    # Datapoints of the history by period of their samples, the ones
+    # of the same period are imported into the same statistics
+    dp_ids: dict[int, str]
+    coefficient: float = 1.0
+
+
+def _start_of_hour(timestamp: float) -> datetime:
+    return dt_util.utc_from_timestamp(timestamp).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+def _start_of_local_day(day: date) -> datetime:
+    # Statistics start on the hour, even where local days do not
+    return dt_util.as_utc(dt_util.start_of_local_day(day)).replace(minute=0)
+
+
+def get_period_starts(period: str, end: datetime, count: int) -> list[datetime]:
+    """Return the start of the periods of samples, the last one holding end."""
+    if period == HISTORY_HOURLY:
+        last = dt_util.as_utc(end).replace(minute=0, second=0, microsecond=0)
+        return [last - timedelta(hours=count - 1 - index) for index in range(count)]
+
+    local_end = dt_util.as_local(end)
+    if period == HISTORY_DAILY:
+        last_day = local_end.date()
+        return [
+            _start_of_local_day(last_day - timedelta(days=count - 1 - index))
+            for index in range(count)
+        ]
+
+    assert period == HISTORY_MONTHLY
+    last_month = local_end.year * 12 + local_end.month - 1
+    return [
+        _start_of_local_day(date(month // 12, month % 12 + 1, 1))
+        for month in range(last_month - count + 1, last_month + 1)
+    ]
+
+
+class TuyaBLEHistoryImporter:
+    """Import the historical data reported by a device, in bulk.
+
+    Samples keep the time of their period, so months of history are
+    available without polling the device.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        device: TuyaBLEDevice,
+        product: TuyaBLEProductInfo | None,
+        mappings: list[TuyaBLEHistoryMapping],
+    ) -> None:
+        self._hass = hass
+        self._device = device
+        self._mappings = mappings
+        self._name = (
+            f"{product.name if product else device.name} "
+            f"{get_short_address(device.address)}"
+        )
+        self._object_id = device.address.replace(":", "").replace("-", "").lower()
+        # Raw value last imported, by datapoint
+        self._imported: dict[int, bytes] = {}
+
+    @property
+    def dp_ids(self) -> set[int]:
+        return {dp_id for mapping in self._mappings for dp_id in mapping.dp_ids}
+
+    @callback
+    def async_update(self) -> None:
+        """Import the historical data changed since the last update."""
+        if "recorder" not in self._hass.config.components:
+            return
+        for mapping in self._mappings:
+            for dp_id, period in mapping.dp_ids.items():
+                datapoint = self._device.datapoints[dp_id]
+                if (
+                    datapoint is None
+                    or not isinstance(datapoint.value, bytes)
+                    or self._imported.get(dp_id) == datapoint.value
+                ):
+                    continue
+                self._imported[dp_id] = datapoint.value
+                self._async_import(mapping, period, datapoint)
+
+    @callback
+    def _async_import(
+        self,
+        mapping: TuyaBLEHistoryMapping,
+        period: str,
+        datapoint: TuyaBLEDataPoint,
+    ) -> None:
+        try:
+            samples = decode_history(datapoint.value)
+        except TuyaBLEError:
+            _LOGGER.debug(
+                "%s: Unexpected historical data in datapoint %s",
+                self._device.address,
+                datapoint.id,
+            )
+            return
+        if not samples:
+            return
+
+        # Devices such as radiator valves are never time synced, periods end
+        # by the clock here
+        starts = get_period_starts(
+            period, dt_util.utc_from_timestamp(datapoint.recorded_at), len(samples)
+        )
+        statistics: list[StatisticData] = []
+        for start, sample in zip(starts, samples):
+            value = sample / mapping.coefficient
+            statistics.append(
+                StatisticData(start=start, mean=value, min=value, max=value)
+            )
+        metadata = StatisticMetaData(
+            has_mean=True,
+            has_sum=False,
+            name=f"{self._name} {mapping.name} ({period})",
+            source=DOMAIN,
+            statistic_id=f"{DOMAIN}:{self._object_id}_{mapping.key}_{period}",
+            unit_of_measurement=mapping.unit,
+        )
+        # One call per datapoint, the recorder writes the samples at once
+        async_add_external_statistics(self._hass, metadata, statistics)
+        _LOGGER.debug(
+            "%s: Imported %s samples of datapoint %s",
+            self._device.address,
+            len(statistics),
+            datapoint.id,
+        )
+
+
+@callback
+def async_backfill_statistics(
+    hass: HomeAssistant,
+    entity_id: str,
+    unit: str | None,
+    readings: list[tuple[float, float]],
+) -> int:
+    """Import readings of a sensor into its hourly statistics, in one batch.
+
+    Readings are (time recorded, value). Hours not over yet are left to
+    the recorder, which compiles them from the states. Returns the number
+    of hours imported.
+    """
+    if "recorder" not in hass.config.components:
+        return 0
+    current_hour = _start_of_hour(dt_util.utcnow().timestamp())
+    hours: dict[datetime, list[float]] = {}
+    for timestamp, value in readings:
+        start = _start_of_hour(timestamp)
+        if start < current_hour:
+            hours.setdefault(start, []).append(value)
+    if not hours:
+        return 0
+
+    statistics = [
+        StatisticData(
+            start=start,
+            mean=sum(values) / len(values),
+            min=min(values),
+            max=max(values),
+        )
+        for start, values in sorted(hours.items())
+    ]
+    metadata = StatisticMetaData(
+        has_mean=True,
+        has_sum=False,
+        name=None,
+        source="recorder",
+        statistic_id=entity_id,
+        unit_of_measurement=unit,
+    )
+    async_import_statistics(hass, metadata, statistics)
+    return len(statistics)
@@ -7,17 +7,59 @@ from .const import (
     SERVICE_UUID,
     TuyaBLEDataPointType, 
 )
+from .exceptions import (
+    TuyaBLEConfirmationError,
+    TuyaBLEDisconnectedError,
+    TuyaBLEError,
+)
+from .fleet import (
+    TuyaBLEAdapterStats,
+    TuyaBLEFleet,
+    TuyaBLEFleetStats,
+    TuyaBLEGroupReport,
+    TuyaBLEPoolStats,
+)
+from .history import decode_history
 from .manager import (
     AbstaractTuyaBLEDeviceManager,
     TuyaBLEDeviceCredentials,
 )
-from .tuya_ble import TuyaBLEDataPoint, TuyaBLEDevice 
+from .metrics import TuyaBLEHistogram, TuyaBLEMetrics
+from .schedule import (
+    TuyaBLEDaySchedule,
+    TuyaBLEWeekSchedule,
+    decode_day_schedule,
+    decode_week_schedule,
+)
+from .tuya_ble import (
+    TuyaBLEConfirmation,
+    TuyaBLEDataPoint,
+    TuyaBLEDevice,
+    TuyaBLEStreamStats,
+)
 
 __all__ = [
     "AbstaractTuyaBLEDeviceManager",
+    "TuyaBLEAdapterStats",
+    "TuyaBLEConfirmation",
+    "TuyaBLEConfirmationError",
     "TuyaBLEDataPoint",
     "TuyaBLEDataPointType",
+    "TuyaBLEDaySchedule",
     "TuyaBLEDevice",
     "TuyaBLEDeviceCredentials",
+    "TuyaBLEDisconnectedError",
+    "TuyaBLEError",
+    "TuyaBLEFleet",
+    "TuyaBLEFleetStats",
+    "TuyaBLEGroupReport",
+    "TuyaBLEHistogram",
+    "TuyaBLEMetrics",
+    "TuyaBLEPoolStats",
+    "TuyaBLEStreamStats",
+    "TuyaBLEWeekSchedule",
     "SERVICE_UUID",
+    "decode_day_schedule",
+    "decode_history",
+    "decode_week_schedule",
 ]
@@ -18,6 +18,69 @@ MANUFACTURER_DATA_ID = 0x07D0
 
 RESPONSE_WAIT_TIMEOUT = 60
 
+# Highest rate of the frames sent while streaming, in frames per second
+STREAM_MAX_FRAME_RATE = 30
+
+# Weight of a new sample in the smoothed command latency of a device
+COMMAND_LATENCY_SMOOTHING = 0.2
+
+# Time a device gets to report back datapoints of a command, the longer of
+# the minimum and the smoothed command latency times the factor, in seconds
+CONFIRMATION_MIN_TIMEOUT = 2.0
+CONFIRMATION_LATENCY_FACTOR = 4.0
+
+# Time over which the clock offset of a device is the smallest delay of its
+# timestamped reports, the live ones, in seconds
+CLOCK_OFFSET_WINDOW = 24 * 3600
+
+# Upper bounds of the latency histograms of a device, in seconds
+LATENCY_HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Upper bounds of the histogram of connection durations, in seconds
+CONNECTION_HISTOGRAM_BUCKETS = (10.0, 60.0, 300.0, 900.0, 3600.0, 14400.0, 86400.0)
+
+FLEET_MAX_CONNECTING = 4
+FLEET_ADAPTER_MAX_CONNECTING = 1
+FLEET_REFRESH_INTERVAL = 300
+# Categories refreshed even when disconnected; devices of other categories,
+# battery powered ones mostly, are only refreshed while connected
+FLEET_REFRESH_CATEGORIES: frozenset[str] = frozenset()
+FLEET_FAILURE_WINDOW = 60
+FLEET_LATENCY_SAMPLES = 100
+# Time commands are collected to be sent to their devices as a group
+FLEET_GROUP_WINDOW = 0.05
+
+# Adapter selection: a path scores its smoothed RSSI, in dBm, minus penalties
+# for the connections held by its adapter and the recent adapter failures
+ROUTE_RSSI_SMOOTHING = 0.3
+ROUTE_UNKNOWN_RSSI = -100
+ROUTE_CONNECTION_PENALTY = 5
+ROUTE_FAILURE_PENALTY = 10
+# Failures in a row on a path after which the device moves to another one
+ROUTE_MAX_PATH_FAILURES = 3
+ROUTE_MIGRATION_PENALTY = 1000
+
+# Connections an adapter or proxy holds at once, the least recently used
+# idle connection is released for a device needing a slot on a full adapter
+FLEET_ADAPTER_MAX_CONNECTIONS = 3
+# Idle time after which devices are disconnected, by category, in seconds;
+# devices of other categories stay connected
+FLEET_IDLE_TIMEOUTS: dict[str, float] = {}
+FLEET_IDLE_CHECK_INTERVAL = 10
+
+# Priorities of connection requests: higher ones get free slots first and
+# may release connections of lower ones held by idle devices or refreshes
+FLEET_PRIORITY_REFRESH = 0
+FLEET_PRIORITY_NORMAL = 1
+FLEET_PRIORITY_HIGH = 2
+# Categories of latency critical actuators, locks and fingerbots
+FLEET_HIGH_PRIORITY_CATEGORIES: frozenset[str] = frozenset({"ms", "szjqr"})
+# Longest wait for the exchange of a preempted refresh to finish before its
+# connection is released anyway, in seconds
+FLEET_PREEMPT_TIMEOUT = 5
+
+DEFAULT_ADAPTER = "default"
+
 
 class TuyaBLECode(Enum):
     FUN_SENDER_DEVICE_INFO = 0x0000
@@ -55,3 +118,13 @@ class TuyaBLEDataPointType(Enum):
     DT_STRING = 3
     DT_ENUM = 4
     DT_BITMAP = 5
+
+
+# Programming data of a day: one record per switching point, hour, minute
+# and target temperature times the temperature coefficient. The layout is
+# assumed, not confirmed from payloads captured from a valve, so schedules
+# are only read until it is
+SCHEDULE_PERIOD_FORMAT = ">BBH"
+
+# Historical data: big-endian signed 16 bit samples, oldest first
+HISTORY_SAMPLE_TYPECODE = "h"
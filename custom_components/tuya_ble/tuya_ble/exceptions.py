@@ -38,3 +38,20 @@ class TuyaBLEDeviceError(TuyaBLEError):
 
     def __init__(self, code: int) -> None:
         super().__init__(("BLE deice returned error code %s") % (code))
+
+
+class TuyaBLEDisconnectedError(TuyaBLEError):
+    """Raised when the connection is released before the device responded."""
+
+    def __init__(self) -> None:
+        super().__init__("BLE device disconnected before responding")
+
+
+class TuyaBLEConfirmationError(TuyaBLEError):
+    """Raised when Tuya BLE device did not report back datapoints of a command."""
+
+    def __init__(self, ids: list[int]) -> None:
+        super().__init__(
+            "BLE device did not confirm datapoints %s" % (", ".join(map(str, ids)))
+        )
+
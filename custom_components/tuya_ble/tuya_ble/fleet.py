@@ -0,0 +1,848 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from bleak import BleakClient
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+
+from .const import (
+    DEFAULT_ADAPTER,
+    FLEET_ADAPTER_MAX_CONNECTING,
+    FLEET_ADAPTER_MAX_CONNECTIONS,
+    FLEET_FAILURE_WINDOW,
+    FLEET_GROUP_WINDOW,
+    FLEET_HIGH_PRIORITY_CATEGORIES,
+    FLEET_IDLE_CHECK_INTERVAL,
+    FLEET_IDLE_TIMEOUTS,
+    FLEET_LATENCY_SAMPLES,
+    FLEET_MAX_CONNECTING,
+    FLEET_PREEMPT_TIMEOUT,
+    FLEET_PRIORITY_HIGH,
+    FLEET_PRIORITY_NORMAL,
+    FLEET_PRIORITY_REFRESH,
+    FLEET_REFRESH_CATEGORIES,
+    FLEET_REFRESH_INTERVAL,
+    ROUTE_CONNECTION_PENALTY,
+    ROUTE_FAILURE_PENALTY,
+    ROUTE_MAX_PATH_FAILURES,
+    ROUTE_MIGRATION_PENALTY,
+    ROUTE_RSSI_SMOOTHING,
+    ROUTE_UNKNOWN_RSSI,
+)
+from .exceptions import TuyaBLEError
+from .manager import AbstaractTuyaBLEDeviceManager
+from .metrics import TuyaBLEHistogram
+from .tuya_ble import BLEAK_EXCEPTIONS, TuyaBLEDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_ble_device_adapter(ble_device: BLEDevice) -> str:
+    """Return the name of the adapter or proxy the BLE device was seen by."""
+    return _get_details_adapter(ble_device.details)
+
+
+def _get_details_adapter(details: object) -> str:
+    if isinstance(details, dict):
+        source = details.get("source")
+        if source:
+            return str(source)
+        path = details.get("path")
+        if path:
+            # BlueZ object path: /org/bluez/hci0/dev_XX_XX_XX_XX_XX_XX
+            parts = str(path).split("/")
+            if len(parts) > 3:
+                return parts[3]
+    return DEFAULT_ADAPTER
+
+
+def _get_client_details(client: BleakClient) -> dict[str, str]:
+    """Return what the backend of a connected client tells of its path.
+
+    Wrappers such as the one of Home Assistant pick the adapter or proxy
+    to connect through themselves, whatever BLE device they were given,
+    and bleak has no public API telling which one. This relies on private
+    attributes: the backend the wrapper keeps as _backend, the _source of
+    proxy backends and the _device_path of BlueZ. Each one is optional,
+    an empty result leaves the adapter to the BLE device selected.
+    """
+    backend = getattr(client, "_backend", None) or client
+    details: dict[str, str] = {}
+    # Proxies keep their source, BlueZ the object path of the device
+    source = getattr(backend, "_source", None)
+    if isinstance(source, str) and source:
+        details["source"] = source
+    path = getattr(backend, "_device_path", None)
+    if isinstance(path, str) and path:
+        details["path"] = path
+    return details
+
+
+@dataclass
+class TuyaBLEFleetStats:
+    devices: int
+    connected: int
+    connecting: int
+    queue_depth: int
+    failures_per_minute: int
+    mean_command_latency: float | None
+
+
+class _TuyaBLEPrioritySemaphore:
+    """Semaphore handing a released slot to the highest priority waiter."""
+
+    def __init__(self, value: int) -> None:
+        self._value = value
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._count = 0
+
+    def locked(self) -> bool:
+        return self._value == 0
+
+    async def acquire(self, priority: int = FLEET_PRIORITY_NORMAL) -> None:
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        # Same priorities are served in order of arrival
+        self._count += 1
+        heapq.heappush(self._waiters, (-priority, self._count, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over meanwhile, pass it on
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+
+@dataclass
+class TuyaBLEPoolStats:
+    connected: int
+    # Commands finding their device connected, or needing a connection
+    hits: int
+    misses: int
+    # Connections released for another device, or after their idle timeout
+    evictions: int
+    expirations: int
+    # Refresh connections released for a higher priority device
+    preemptions: int
+
+
+@dataclass
+class TuyaBLEAdapterStats:
+    connected: int
+    failures_per_minute: int
+
+
+# BLE devices of an address, one per adapter or proxy seeing it, with RSSI
+TuyaBLEDeviceProvider = Callable[[str], list[tuple[BLEDevice, int | None]]]
+
+
+@dataclass
+class TuyaBLEGroupReport:
+    devices: int
+    failed: int
+    # Time to connect all devices of the group, in seconds
+    connect_time: float
+    # Time between the first and the last acknowledgement, in seconds
+    ack_spread: float | None
+
+
+@dataclass
+class _TuyaBLEGroupCommand:
+    device: TuyaBLEDevice
+    command: Callable[[], Awaitable[None]]
+    future: asyncio.Future[None]
+
+
+class TuyaBLEFleet:
+    """Owner of all Tuya BLE devices, schedules connections and refreshes."""
+
+    def __init__(
+        self,
+        max_connecting: int = FLEET_MAX_CONNECTING,
+        adapter_max_connecting: int = FLEET_ADAPTER_MAX_CONNECTING,
+        refresh_interval: float = FLEET_REFRESH_INTERVAL,
+        group_window: float = FLEET_GROUP_WINDOW,
+        adapter_max_connections: int = FLEET_ADAPTER_MAX_CONNECTIONS,
+        idle_timeouts: dict[str, float] | None = None,
+        refresh_categories: set[str] | frozenset[str] | None = None,
+    ) -> None:
+        self._devices: dict[str, TuyaBLEDevice] = {}
+        self._semaphore = _TuyaBLEPrioritySemaphore(max_connecting)
+        self._adapter_max_connecting = adapter_max_connecting
+        self._adapter_semaphores: dict[str, _TuyaBLEPrioritySemaphore] = {}
+        self._refresh_interval = refresh_interval
+        self._refresh_task: asyncio.Task | None = None
+        self._refresh_tasks: set[asyncio.Task] = set()
+        self._refresh_categories = (
+            FLEET_REFRESH_CATEGORIES
+            if refresh_categories is None
+            else frozenset(refresh_categories)
+        )
+        self._adapter_max_connections = adapter_max_connections
+        self._idle_timeouts = (
+            FLEET_IDLE_TIMEOUTS if idle_timeouts is None else idle_timeouts
+        )
+        self._idle_task: asyncio.Task | None = None
+        # Time of the last command, by address, least recently used first
+        self._last_used: OrderedDict[str, float] = OrderedDict()
+        self._pool_hits = 0
+        self._pool_misses = 0
+        self._pool_evictions = 0
+        self._pool_expirations = 0
+        self._pool_preemptions = 0
+        # Tasks of the refreshes running, by address
+        self._refreshing: dict[str, asyncio.Task] = {}
+        # Addresses of the group being sent, never released for another device
+        self._pinned: set[str] = set()
+        # Addresses which waited for a slot or released one, until their
+        # command completes, and the time to actuate of high priority commands
+        self._contended: set[str] = set()
+        self._actuation_time = TuyaBLEHistogram()
+        self._contended_actuation_time = TuyaBLEHistogram()
+        self._waiting = 0
+        self._connecting = 0
+        self._failures: deque[float] = deque()
+        self._adapter_failures: dict[str, deque[float]] = {}
+        self._ble_device_provider: TuyaBLEDeviceProvider | None = None
+        # Smoothed RSSI and recent failures in a row, by address and adapter
+        self._path_rssi: dict[tuple[str, str], float] = {}
+        self._path_failures: dict[tuple[str, str], deque[float]] = {}
+        # Adapter or proxy of the last connection of each device, the one
+        # selected to connect through is only a hint to the BLE stack
+        self._connected_adapters: dict[str, str] = {}
+        self._latencies: deque[float] = deque(maxlen=FLEET_LATENCY_SAMPLES)
+        self._group_window = group_window
+        self._group_commands: list[_TuyaBLEGroupCommand] = []
+        self._group_handle: asyncio.TimerHandle | None = None
+        self._group_tasks: set[asyncio.Task] = set()
+        self._last_group_report: TuyaBLEGroupReport | None = None
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def __contains__(self, address: str) -> bool:
+        return address.upper() in self._devices
+
+    def get_device(self, address: str) -> TuyaBLEDevice | None:
+        return self._devices.get(address.upper())
+
+    @property
+    def devices(self) -> list[TuyaBLEDevice]:
+        return list(self._devices.values())
+
+    def create_device(
+        self,
+        device_manager: AbstaractTuyaBLEDeviceManager,
+        ble_device: BLEDevice,
+        advertisement_data: AdvertisementData | None = None,
+    ) -> TuyaBLEDevice:
+        """Create a device owned by the fleet, or return the existing one."""
+        address = ble_device.address.upper()
+        device = self._devices.get(address)
+        if device is None:
+            device = TuyaBLEDevice(
+                device_manager, ble_device, advertisement_data, fleet=self
+            )
+            self._devices[address] = device
+            _LOGGER.debug(
+                "%s: Added to fleet, %s devices", address, len(self._devices)
+            )
+        elif advertisement_data is not None:
+            device.set_ble_device_and_advertisement_data(
+                ble_device, advertisement_data
+            )
+        return device
+
+    async def remove_device(self, address: str) -> None:
+        """Stop the device and release it from the fleet."""
+        device = self._devices.pop(address.upper(), None)
+        self._last_used.pop(address.upper(), None)
+        self._connected_adapters.pop(address.upper(), None)
+        if device is not None:
+            for paths in (self._path_rssi, self._path_failures):
+                for key in [key for key in paths if key[0] == device.address]:
+                    del paths[key]
+            _LOGGER.debug(
+                "%s: Removed from fleet, %s devices", address, len(self._devices)
+            )
+            await device.stop()
+
+    @asynccontextmanager
+    async def connection_slot(self, device: TuyaBLEDevice) -> AsyncIterator[None]:
+        """Hold a connection slot of the device adapter and of the fleet."""
+        adapter = get_ble_device_adapter(device.ble_device)
+        adapter_semaphore = self._adapter_semaphores.get(adapter)
+        if adapter_semaphore is None:
+            adapter_semaphore = _TuyaBLEPrioritySemaphore(
+                self._adapter_max_connecting
+            )
+            self._adapter_semaphores[adapter] = adapter_semaphore
+
+        priority = self.get_priority(device)
+        if adapter_semaphore.locked() or self._semaphore.locked():
+            self._contended.add(device.address.upper())
+        self._waiting += 1
+        try:
+            # The adapter slot is taken first so a busy adapter
+            # does not hold fleet slots needed by the other adapters.
+            await adapter_semaphore.acquire(priority)
+            try:
+                await self._semaphore.acquire(priority)
+            except BaseException:
+                adapter_semaphore.release()
+                raise
+        finally:
+            self._waiting -= 1
+
+        self._connecting += 1
+        try:
+            if await self._make_room(device, adapter, priority):
+                self._contended.add(device.address.upper())
+            yield
+        except BLEAK_EXCEPTIONS:
+            self.record_failure(adapter)
+            self._path_failures.setdefault(
+                (device.address, adapter), deque()
+            ).append(time.monotonic())
+            raise
+        else:
+            self._path_failures.pop((device.address, adapter), None)
+        finally:
+            self._connecting -= 1
+            self._semaphore.release()
+            adapter_semaphore.release()
+
+    def record_use(self, device: TuyaBLEDevice, connected: bool) -> None:
+        """Record a command of the device, for the pool to keep it connected."""
+        address = device.address.upper()
+        self._last_used[address] = time.monotonic()
+        self._last_used.move_to_end(address)
+        if connected:
+            self._pool_hits += 1
+        else:
+            self._pool_misses += 1
+
+    def get_priority(self, device: TuyaBLEDevice) -> int:
+        """Return the priority of the connection requests of the device.
+
+        Refreshes come last whatever the category, they are no user command.
+        """
+        if device.address.upper() in self._refreshing:
+            return FLEET_PRIORITY_REFRESH
+        if device.category in FLEET_HIGH_PRIORITY_CATEGORIES:
+            return FLEET_PRIORITY_HIGH
+        return FLEET_PRIORITY_NORMAL
+
+    def _is_idle(self, device: TuyaBLEDevice) -> bool:
+        return device.is_connected and not device.is_streaming and not device.is_busy
+
+    def _is_preemptible(self, device: TuyaBLEDevice, priority: int) -> bool:
+        """Return True if a refresh of lower priority holds the connection."""
+        return (
+            device.is_connected
+            and not device.is_streaming
+            and device.address.upper() in self._refreshing
+            and self.get_priority(device) < priority
+        )
+
+    async def _make_room(
+        self, device: TuyaBLEDevice, adapter: str, priority: int
+    ) -> bool:
+        """Release a connection of a full adapter, return True if one was.
+
+        The least recently used idle connection goes first. High priority
+        devices may also preempt a connection held by a refresh.
+        """
+        if self._adapter_connected(adapter) < self._adapter_max_connections:
+            return False
+        others = [
+            other
+            for other in (self._devices.get(address) for address in self._last_used)
+            if other is not None
+            and other is not device
+            and other.address.upper() not in self._pinned
+            and self.get_device_adapter(other) == adapter
+        ]
+        released = next((other for other in others if self._is_idle(other)), None)
+        if released is not None:
+            self._pool_evictions += 1
+        elif priority == FLEET_PRIORITY_HIGH:
+            released = next(
+                (
+                    other
+                    for other in others
+                    if self._is_preemptible(other, priority)
+                ),
+                None,
+            )
+            if released is not None:
+                self._pool_preemptions += 1
+                # Disconnecting mid-exchange would fail the status request
+                # of the refresh, let it finish first
+                refresh = self._refreshing.get(released.address.upper())
+                if refresh is not None:
+                    await asyncio.wait((refresh,), timeout=FLEET_PREEMPT_TIMEOUT)
+        if released is None:
+            _LOGGER.debug(
+                "%s: No connection to release on %s", device.address, adapter
+            )
+            return False
+
+        _LOGGER.debug(
+            "%s: Releasing connection on %s for %s",
+            released.address,
+            adapter,
+            device.address,
+        )
+        try:
+            await released.disconnect()
+        except BLEAK_EXCEPTIONS:
+            _LOGGER.debug(
+                "%s: Disconnecting failed", released.address, exc_info=True
+            )
+        return True
+
+    def record_actuation(self, device: TuyaBLEDevice, elapsed: float) -> None:
+        """Record the time from a command to its response, connection included."""
+        contended = device.address.upper() in self._contended
+        self._contended.discard(device.address.upper())
+        if device.category not in FLEET_HIGH_PRIORITY_CATEGORIES:
+            return
+        self._actuation_time.observe(elapsed)
+        if contended:
+            self._contended_actuation_time.observe(elapsed)
+
+    @property
+    def actuation_time(self) -> TuyaBLEHistogram:
+        """Time to actuate of high priority commands."""
+        return self._actuation_time
+
+    @property
+    def contended_actuation_time(self) -> TuyaBLEHistogram:
+        """Time to actuate of high priority commands waiting for a slot."""
+        return self._contended_actuation_time
+
+    async def _idle_loop(self) -> None:
+        """Disconnect devices idle for longer than the timeout of their category."""
+        while True:
+            await asyncio.sleep(FLEET_IDLE_CHECK_INTERVAL)
+            now = time.monotonic()
+            for address, last_used in list(self._last_used.items()):
+                device = self._devices.get(address)
+                if device is None:
+                    continue
+                timeout = self._idle_timeouts.get(device.category)
+                if (
+                    timeout is None
+                    or now - last_used < timeout
+                    or not self._is_idle(device)
+                ):
+                    continue
+                self._pool_expirations += 1
+                _LOGGER.debug(
+                    "%s: Disconnecting after %.0fs idle", address, now - last_used
+                )
+                try:
+                    await device.disconnect()
+                except BLEAK_EXCEPTIONS:
+                    _LOGGER.debug(
+                        "%s: Disconnecting failed", address, exc_info=True
+                    )
+
+    @property
+    def pool_stats(self) -> TuyaBLEPoolStats:
+        """Statistics of the connections held by the fleet."""
+        return TuyaBLEPoolStats(
+            connected=sum(
+                1 for device in self._devices.values() if device.is_connected
+            ),
+            hits=self._pool_hits,
+            misses=self._pool_misses,
+            evictions=self._pool_evictions,
+            expirations=self._pool_expirations,
+            preemptions=self._pool_preemptions,
+        )
+
+    def record_failure(self, adapter: str | None = None) -> None:
+        now = time.monotonic()
+        self._failures.append(now)
+        if adapter is not None:
+            self._adapter_failures.setdefault(adapter, deque()).append(now)
+
+    def set_ble_device_provider(
+        self, provider: TuyaBLEDeviceProvider | None
+    ) -> None:
+        """Set the source of the BLE devices of all adapters seeing a device."""
+        self._ble_device_provider = provider
+
+    def record_connection(self, device: TuyaBLEDevice, client: BleakClient) -> None:
+        """Record the adapter or proxy actually holding a new connection.
+
+        The adapter is named after the details of a BLE device seen by the
+        scanners, those of the client backend only tell which one.
+        """
+        address = device.address.upper()
+        selected = get_ble_device_adapter(device.ble_device)
+        details = _get_client_details(client)
+        if not details:
+            adapter = selected
+        else:
+            # Names of the paths seen by the scanners are the reference
+            candidates = [device.ble_device] + [
+                ble_device
+                for ble_device, _ in (
+                    self._ble_device_provider(device.address)
+                    if self._ble_device_provider
+                    else []
+                )
+            ]
+            adapter = next(
+                (
+                    get_ble_device_adapter(ble_device)
+                    for ble_device in candidates
+                    if isinstance(ble_device.details, dict)
+                    and any(
+                        ble_device.details.get(key) == value
+                        for key, value in details.items()
+                    )
+                ),
+                selected,
+            )
+        if adapter != selected:
+            _LOGGER.debug(
+                "%s: Connected through %s instead of %s",
+                device.address,
+                adapter,
+                selected,
+            )
+        self._connected_adapters[address] = adapter
+
+    def get_device_adapter(self, device: TuyaBLEDevice) -> str:
+        """Return the adapter or proxy of the last connection of the device."""
+        adapter = self._connected_adapters.get(device.address.upper())
+        if adapter is None:
+            adapter = get_ble_device_adapter(device.ble_device)
+        return adapter
+
+    def _adapter_connected(self, adapter: str) -> int:
+        return sum(
+            1
+            for device in self._devices.values()
+            if device.is_connected and self.get_device_adapter(device) == adapter
+        )
+
+    def _recent_failures(self, failures: deque[float] | None) -> int:
+        if not failures:
+            return 0
+        threshold = time.monotonic() - FLEET_FAILURE_WINDOW
+        while failures and failures[0] < threshold:
+            failures.popleft()
+        return len(failures)
+
+    def select_ble_device(self, device: TuyaBLEDevice) -> BLEDevice:
+        """Return the BLE device of the best path to connect the device.
+
+        Paths are weighed by smoothed RSSI, connections of their adapter and
+        recent failures of their adapter. A path failing repeatedly is left
+        for another one until its failures age out. The BLE stack may still
+        connect through another path, connections are then counted against
+        the one recorded by record_connection.
+        """
+        candidates = (
+            self._ble_device_provider(device.address)
+            if self._ble_device_provider
+            else []
+        )
+        if not candidates:
+            return device.ble_device
+
+        best: BLEDevice | None = None
+        best_score = 0.0
+        for ble_device, rssi in candidates:
+            adapter = get_ble_device_adapter(ble_device)
+            key = (device.address, adapter)
+            smoothed = self._path_rssi.get(key)
+            if rssi is not None:
+                smoothed = (
+                    rssi
+                    if smoothed is None
+                    else smoothed + (rssi - smoothed) * ROUTE_RSSI_SMOOTHING
+                )
+                self._path_rssi[key] = smoothed
+            score = (
+                (smoothed if smoothed is not None else ROUTE_UNKNOWN_RSSI)
+                - ROUTE_CONNECTION_PENALTY * self._adapter_connected(adapter)
+                - ROUTE_FAILURE_PENALTY
+                * self._recent_failures(self._adapter_failures.get(adapter))
+            )
+            if (
+                self._recent_failures(self._path_failures.get(key))
+                >= ROUTE_MAX_PATH_FAILURES
+            ):
+                score -= ROUTE_MIGRATION_PENALTY
+            if best is None or score > best_score:
+                best = ble_device
+                best_score = score
+
+        current = get_ble_device_adapter(device.ble_device)
+        selected = get_ble_device_adapter(best)
+        if selected != current:
+            _LOGGER.debug(
+                "%s: Connecting through %s instead of %s, score %.1f",
+                device.address,
+                selected,
+                current,
+                best_score,
+            )
+        return best
+
+    @property
+    def adapter_stats(self) -> dict[str, TuyaBLEAdapterStats]:
+        """Connections and failures of the adapters in use."""
+        adapters = {
+            self.get_device_adapter(device)
+            for device in self._devices.values()
+        } | set(self._adapter_failures)
+        return {
+            adapter: TuyaBLEAdapterStats(
+                connected=self._adapter_connected(adapter),
+                failures_per_minute=self._recent_failures(
+                    self._adapter_failures.get(adapter)
+                ),
+            )
+            for adapter in sorted(adapters)
+        }
+
+    def record_command_latency(self, latency: float) -> None:
+        self._latencies.append(latency)
+
+    def _failures_per_minute(self) -> int:
+        return self._recent_failures(self._failures)
+
+    @property
+    def stats(self) -> TuyaBLEFleetStats:
+        """Aggregate statistics of the fleet."""
+        latencies = self._latencies
+        return TuyaBLEFleetStats(
+            devices=len(self._devices),
+            connected=sum(
+                1 for device in self._devices.values() if device.is_connected
+            ),
+            connecting=self._connecting,
+            queue_depth=self._waiting,
+            failures_per_minute=self._failures_per_minute(),
+            mean_command_latency=(
+                sum(latencies) / len(latencies) if latencies else None
+            ),
+        )
+
+    @property
+    def last_group_report(self) -> TuyaBLEGroupReport | None:
+        return self._last_group_report
+
+    async def send_grouped(
+        self,
+        device: TuyaBLEDevice,
+        command: Callable[[], Awaitable[None]],
+    ) -> None:
+        """Send a command along with the commands submitted at the same time.
+
+        Commands submitted within the group window are sent together: their
+        devices are connected in parallel first, then all commands are sent
+        at once, so the devices of a group react nearly simultaneously.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        self._group_commands.append(_TuyaBLEGroupCommand(device, command, future))
+        if self._group_handle is None:
+            self._group_handle = loop.call_later(
+                self._group_window, self._flush_group
+            )
+        await future
+
+    def _flush_group(self) -> None:
+        commands = self._group_commands
+        self._group_commands = []
+        self._group_handle = None
+        task = asyncio.create_task(self._send_group(commands))
+        self._group_tasks.add(task)
+        task.add_done_callback(self._group_tasks.discard)
+
+    def _group_batches(
+        self, devices: list[TuyaBLEDevice]
+    ) -> list[list[TuyaBLEDevice]]:
+        """Split devices in batches an adapter can hold connected at once."""
+        batches: list[list[TuyaBLEDevice]] = []
+        counts: list[dict[str, int]] = []
+        for device in devices:
+            adapter = self.get_device_adapter(device)
+            for batch, count in zip(batches, counts):
+                if count.get(adapter, 0) < self._adapter_max_connections:
+                    break
+            else:
+                batch, count = [], {}
+                batches.append(batch)
+                counts.append(count)
+            batch.append(device)
+            count[adapter] = count.get(adapter, 0) + 1
+        return batches
+
+    async def _send_group(self, commands: list[_TuyaBLEGroupCommand]) -> None:
+        devices = list({id(item.device): item.device for item in commands}.values())
+        connect_time = 0.0
+        acks: list[float] = []
+
+        async def _send(item: _TuyaBLEGroupCommand) -> None:
+            try:
+                await item.command()
+            except Exception as err:  # pylint: disable=broad-except
+                if not item.future.done():
+                    item.future.set_exception(err)
+            else:
+                acks.append(time.monotonic())
+                if not item.future.done():
+                    item.future.set_result(None)
+
+        # Members of a batch are pinned, so connecting one of them does not
+        # release the connection of another before its command is sent
+        try:
+            for batch in self._group_batches(devices):
+                addresses = {device.address.upper() for device in batch}
+                self._pinned |= addresses
+                try:
+                    if len(devices) > 1:
+                        started = time.monotonic()
+                        await asyncio.gather(
+                            *(device.connect() for device in batch),
+                            return_exceptions=True,
+                        )
+                        connect_time += time.monotonic() - started
+                    await asyncio.gather(
+                        *(_send(item) for item in commands if item.device in batch)
+                    )
+                finally:
+                    self._pinned -= addresses
+        finally:
+            # Commands of a group cancelled on stop are not waited for
+            for item in commands:
+                if not item.future.done():
+                    item.future.cancel()
+
+        if len(devices) > 1:
+            report = TuyaBLEGroupReport(
+                devices=len(devices),
+                failed=len(commands) - len(acks),
+                connect_time=connect_time,
+                ack_spread=max(acks) - min(acks) if acks else None,
+            )
+            self._last_group_report = report
+            _LOGGER.debug(
+                "Group of %s devices: connected in %.3fs, "
+                "acknowledgement spread %s, %s failed",
+                report.devices,
+                report.connect_time,
+                (
+                    f"{report.ack_spread:.3f}s"
+                    if report.ack_spread is not None
+                    else "n/a"
+                ),
+                report.failed,
+            )
+
+    def start(self) -> None:
+        """Start periodic staggered refreshes and idle timeouts of the devices."""
+        if self._refresh_task is None and self._refresh_interval > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        if self._idle_task is None and self._idle_timeouts:
+            self._idle_task = asyncio.create_task(self._idle_loop())
+
+    async def stop(self) -> None:
+        """Stop refreshes and idle timeouts, disconnect all devices."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+        for task in self._refresh_tasks:
+            task.cancel()
+        self._refresh_tasks.clear()
+        if self._group_handle is not None:
+            self._group_handle.cancel()
+            self._group_handle = None
+        for item in self._group_commands:
+            item.future.cancel()
+        self._group_commands = []
+        # Groups in flight would go on with devices being disconnected
+        group_tasks = list(self._group_tasks)
+        for task in group_tasks:
+            task.cancel()
+        await asyncio.gather(*group_tasks, return_exceptions=True)
+        devices = list(self._devices.values())
+        self._devices.clear()
+        await asyncio.gather(
+            *(device.stop() for device in devices), return_exceptions=True
+        )
+
+    async def _refresh_loop(self) -> None:
+        """Refresh every device once per interval, spread evenly in time."""
+        while True:
+            devices = list(self._devices.values())
+            if not devices:
+                await asyncio.sleep(self._refresh_interval)
+                continue
+            delay = self._refresh_interval / len(devices)
+            for device in devices:
+                await asyncio.sleep(delay)
+                if self._should_refresh(device):
+                    task = asyncio.create_task(self._refresh(device))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_tasks.discard)
+
+    def _should_refresh(self, device: TuyaBLEDevice) -> bool:
+        """Return True for devices still in the fleet and not being refreshed.
+
+        Disconnected devices are not reconnected for a refresh, unless their
+        category opted in.
+        """
+        address = device.address.upper()
+        return (
+            address in self._devices
+            and address not in self._refreshing
+            and (
+                device.is_connected
+                or device.category in self._refresh_categories
+            )
+        )
+
+    async def _refresh(self, device: TuyaBLEDevice) -> None:
+        # Refreshes connect with the lowest priority and may be preempted
+        address = device.address.upper()
+        self._refreshing[address] = asyncio.current_task()
+        try:
+            await device.update()
+        except (*BLEAK_EXCEPTIONS, TuyaBLEError):
+            _LOGGER.debug(
+                "%s: Scheduled refresh failed", device.address, exc_info=True
+            )
+        finally:
+            self._refreshing.pop(address, None)
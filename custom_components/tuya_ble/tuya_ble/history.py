@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from array import array
+import sys
+
+from .const import HISTORY_SAMPLE_TYPECODE
+from .exceptions import TuyaBLEDataLengthError
+
+
+def decode_history(data: bytes) -> array:
+    """Decode the samples of historical data at once, oldest first."""
+    samples = array(HISTORY_SAMPLE_TYPECODE)
+    if len(data) % samples.itemsize:
+        raise TuyaBLEDataLengthError()
+    samples.frombytes(data)
+    if sys.byteorder == "little":
+        samples.byteswap()
+    return samples
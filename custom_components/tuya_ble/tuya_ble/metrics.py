@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any
+
+from .const import CONNECTION_HISTOGRAM_BUCKETS, LATENCY_HISTOGRAM_BUCKETS
+
+
+class TuyaBLEHistogram:
+    """Counts of samples by upper bound of their bucket."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_HISTOGRAM_BUCKETS) -> None:
+        self.buckets = buckets
+        # The last count is of samples above the highest bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "buckets": {
+                **{
+                    str(bound): count
+                    for bound, count in zip(self.buckets, self.counts)
+                },
+                "+Inf": self.counts[-1],
+            },
+            "count": self.count,
+            "sum": round(self.sum, 3),
+        }
+
+
+@dataclass
+class TuyaBLEMetrics:
+    """Protocol counters of a device.
+
+    Plain increments only, so they stay on in production.
+    """
+
+    frames_sent: int = 0
+    bytes_sent: int = 0
+    notifications_received: int = 0
+    bytes_received: int = 0
+    frames_received: int = 0
+    crc_errors: int = 0
+    length_errors: int = 0
+    format_errors: int = 0
+    # Notifications lost or out of order
+    sequence_errors: int = 0
+    response_timeouts: int = 0
+    connect_attempts: int = 0
+    connect_failures: int = 0
+    connects: int = 0
+    reconnects: int = 0
+    disconnects: int = 0
+    unexpected_disconnects: int = 0
+    # Commands waiting for the link, a gauge
+    queue_depth: int = 0
+    # Duration of the phases of the last handshake, in seconds
+    handshake_timings: dict[str, float] = field(default_factory=dict)
+    handshake_duration: TuyaBLEHistogram = field(default_factory=TuyaBLEHistogram)
+    command_latency: TuyaBLEHistogram = field(default_factory=TuyaBLEHistogram)
+    confirmation_latency: TuyaBLEHistogram = field(
+        default_factory=TuyaBLEHistogram
+    )
+    # Time from a handshake to the disconnection
+    connection_duration: TuyaBLEHistogram = field(
+        default_factory=lambda: TuyaBLEHistogram(CONNECTION_HISTOGRAM_BUCKETS)
+    )
+
+    def as_dict(self) -> dict[str, Any]:
+        result: dict[str, Any] = {}
+        for name, value in vars(self).items():
+            if isinstance(value, TuyaBLEHistogram):
+                result[name] = value.as_dict()
+            elif isinstance(value, dict):
+                result[name] = {
+                    phase: round(duration, 3) for phase, duration in value.items()
+                }
+            else:
+                result[name] = value
+        return result
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from struct import Struct, error as StructError
+
+from .const import SCHEDULE_PERIOD_FORMAT
+from .exceptions import TuyaBLEDataFormatError
+from .tuya_ble import TuyaBLEDataPoints
+
+_PERIOD = Struct(SCHEDULE_PERIOD_FORMAT)
+
+# Switching points of a day, as (minute of the day, raw temperature)
+TuyaBLEDaySchedule = tuple[tuple[int, int], ...]
+# Days of a week, Monday first
+TuyaBLEWeekSchedule = tuple[TuyaBLEDaySchedule, ...]
+
+
+def decode_day_schedule(data: bytes) -> TuyaBLEDaySchedule:
+    """Decode the programming data of a day."""
+    try:
+        return tuple(
+            (hour * 60 + minute, temperature)
+            for hour, minute, temperature in _PERIOD.iter_unpack(data)
+        )
+    except StructError as err:
+        raise TuyaBLEDataFormatError() from err
+
+
+def decode_week_schedule(
+    datapoints: TuyaBLEDataPoints, dp_ids: Sequence[int]
+) -> TuyaBLEWeekSchedule:
+    """Decode the days of a week at once, days not reported are empty."""
+    week: list[TuyaBLEDaySchedule] = []
+    for dp_id in dp_ids:
+        datapoint = datapoints[dp_id]
+        if datapoint and isinstance(datapoint.value, bytes):
+            week.append(decode_day_schedule(datapoint.value))
+        else:
+            week.append(())
+    return tuple(week)
+
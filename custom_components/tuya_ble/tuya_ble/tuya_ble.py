@@ -5,8 +5,11 @@ import hashlib
 import logging
 import secrets
 import time
-from collections.abc import Callable
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
 from struct import pack, unpack
+from typing import TYPE_CHECKING
 
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
@@ -24,21 +27,33 @@ from Crypto.Cipher import AES
 from .const import (
     CHARACTERISTIC_NOTIFY,
     CHARACTERISTIC_WRITE,
+    CLOCK_OFFSET_WINDOW,
+    COMMAND_LATENCY_SMOOTHING,
+    CONFIRMATION_LATENCY_FACTOR,
+    CONFIRMATION_MIN_TIMEOUT,
     GATT_MTU,
     MANUFACTURER_DATA_ID,
     RESPONSE_WAIT_TIMEOUT,
     SERVICE_UUID_TEMP,
+    STREAM_MAX_FRAME_RATE,
     TuyaBLECode,
     TuyaBLEDataPointType,
 )
 from .exceptions import (
+    TuyaBLEConfirmationError,
     TuyaBLEDataCRCError,
     TuyaBLEDataFormatError,
     TuyaBLEDataLengthError,
     TuyaBLEDeviceError,
+    TuyaBLEDisconnectedError,
     TuyaBLEEnumValueError,
+    TuyaBLEError,
 )
 from .manager import AbstaractTuyaBLEDeviceManager, TuyaBLEDeviceCredentials
+from .metrics import TuyaBLEMetrics
+
+if TYPE_CHECKING:
+    from .fleet import TuyaBLEFleet
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -55,12 +70,13 @@ class TuyaBLEDataPoint:
         flags: int,
         type: TuyaBLEDataPointType,
         value: bytes | bool | int | str,
+        clock_offset: float = 0.0,
     ) -> None:
         self._owner = owner
         self._id = id
         self._value = value
         self._changed_by_device = False
-        self._update_from_device(timestamp, flags, type, value)
+        self._update_from_device(timestamp, flags, type, value, clock_offset)
 
     def _update_from_device(
         self,
@@ -68,12 +84,16 @@ class TuyaBLEDataPoint:
         flags: int,
         type: TuyaBLEDataPointType,
         value: bytes | bool | int | str,
+        clock_offset: float = 0.0,
     ) -> None:
         self._timestamp = timestamp
+        self._recorded_at = timestamp + clock_offset
+        self._reported_at = time.time()
         self._flags = flags
         self._type = type
         self._changed_by_device = self._value != value
         self._value = value
+        self._confirmed_value = value
 
     def _get_value(self) -> bytes:
         match self._type:
@@ -99,8 +119,19 @@ class TuyaBLEDataPoint:
 
     @property
     def timestamp(self) -> float:
+        """Time the value was recorded, by the device clock when reported."""
         return self._timestamp
 
+    @property
+    def recorded_at(self) -> float:
+        """Time the value was recorded, by the clock here."""
+        return self._recorded_at
+
+    @property
+    def reported_at(self) -> float:
+        """Time the value was received from the device."""
+        return self._reported_at
+
     @property
     def flags(self) -> int:
         return self._flags
@@ -117,6 +148,15 @@ class TuyaBLEDataPoint:
     def changed_by_device(self) -> bool:
         return self._changed_by_device
 
+    @property
+    def confirmed_value(self) -> bytes | bool | int | str:
+        """Value last reported by the device."""
+        return self._confirmed_value
+
+    def rollback(self) -> None:
+        """Restore the value last reported by the device, without sending it."""
+        self._value = self._confirmed_value
+
     async def set_value(self, value: bytes | bool | int | str) -> None:
         match self._type:
             case TuyaBLEDataPointType.DT_RAW | TuyaBLEDataPointType.DT_BITMAP:
@@ -152,6 +192,9 @@ class TuyaBLEDataPoints:
     def __getitem__(self, key: int) -> TuyaBLEDataPoint | None:
         return self._datapoints.get(key)
 
+    def __iter__(self) -> Iterator[TuyaBLEDataPoint]:
+        return iter(list(self._datapoints.values()))
+
     def has_id(self, id: int, type: TuyaBLEDataPointType | None = None) -> bool:
         return (id in self._datapoints) and (
             (type is None) or (self._datapoints[id].type == type)
@@ -173,12 +216,15 @@ class TuyaBLEDataPoints:
     def begin_update(self) -> None:
         self._update_started += 1
 
-    async def end_update(self) -> None:
+    async def end_update(self, wait_for_response: bool = True) -> None:
         if self._update_started > 0:
             self._update_started -= 1
             if self._update_started == 0 and len(self._updated_datapoints) > 0:
-                await self._owner._send_datapoints(self._updated_datapoints)
+                updated_datapoints = self._updated_datapoints
                 self._updated_datapoints = []
+                await self._owner._send_datapoints(
+                    updated_datapoints, wait_for_response
+                )
 
     def _update_from_device(
         self,
@@ -187,13 +233,14 @@ class TuyaBLEDataPoints:
         flags: int,
         type: TuyaBLEDataPointType,
         value: bytes | bool | int | str,
+        clock_offset: float = 0.0,
     ) -> None:
         dp = self._datapoints.get(dp_id)
         if dp:
-            dp._update_from_device(timestamp, flags, type, value)
+            dp._update_from_device(timestamp, flags, type, value, clock_offset)
         else:
             self._datapoints[dp_id] = TuyaBLEDataPoint(
-                self, dp_id, timestamp, flags, type, value
+                self, dp_id, timestamp, flags, type, value, clock_offset
             )
 
     async def _update_from_user(self, dp_id: int) -> None:
@@ -205,6 +252,25 @@ class TuyaBLEDataPoints:
             await self._owner._send_datapoints([dp_id])
 
 
+@dataclass
+class TuyaBLEStreamStats:
+    frames_sent: int
+    frames_dropped: int
+    # Frames sent per second, from the start to the end of the stream
+    frame_rate: float
+
+
+class TuyaBLEConfirmation:
+    """Datapoints of a command the device is expected to report back."""
+
+    def __init__(self, ids: Iterable[int]) -> None:
+        self.pending: set[int] = set(ids)
+        self.started = time.monotonic()
+        self.future: asyncio.Future[float] = (
+            asyncio.get_running_loop().create_future()
+        )
+
+
 global_connect_lock = asyncio.Lock()
 
 
@@ -214,9 +280,19 @@ class TuyaBLEDevice:
         device_manager: AbstaractTuyaBLEDeviceManager,
         ble_device: BLEDevice,
         advertisement_data: AdvertisementData | None = None,
+        fleet: TuyaBLEFleet | None = None,
     ) -> None:
         """Init the TuyaBLE."""
         self._device_manager = device_manager
+        self._fleet = fleet
+        self._command_latency: float | None = None
+        self._confirmations: list[TuyaBLEConfirmation] = []
+        self._confirmation_latency: float | None = None
+        # Delays of the timestamped reports, as (time received, delay), the
+        # smallest one first
+        self._report_delays: deque[tuple[float, float]] = deque()
+        self._metrics = TuyaBLEMetrics()
+        self._connected_at: float | None = None
         self._device_info: TuyaBLEDeviceCredentials | None = None
         self._ble_device = ble_device
         self._advertisement_data = advertisement_data
@@ -256,6 +332,17 @@ class TuyaBLEDevice:
 
         self._datapoints = TuyaBLEDataPoints(self)
 
+        self._stream_task: asyncio.Task | None = None
+        self._stream_event = asyncio.Event()
+        self._stream_frame: list[
+            tuple[int, TuyaBLEDataPointType, bytes | bool | int | str]
+        ] | None = None
+        self._stream_interval = 0.0
+        self._stream_started = 0.0
+        self._stream_stopped: float | None = None
+        self._stream_sent = 0
+        self._stream_dropped = 0
+
     def set_ble_device_and_advertisement_data(
         self, ble_device: BLEDevice, advertisement_data: AdvertisementData
     ) -> None:
@@ -293,6 +380,10 @@ class TuyaBLEDevice:
         _LOGGER.debug("%s: Updating", self.address)
         await self._send_packet(TuyaBLECode.FUN_SENDER_DEVICE_STATUS, bytes())
 
+    async def connect(self) -> None:
+        """Connect and pair with the device, unless already done."""
+        await self._ensure_connected()
+
     async def _update_device_info(self) -> bool:
         if self._device_info is None:
             if self._device_manager:
@@ -339,6 +430,78 @@ class TuyaBLEDevice:
         """Return the address."""
         return self._ble_device.address
 
+    @property
+    def ble_device(self) -> BLEDevice:
+        """Return the BLE device used to connect."""
+        return self._ble_device
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if device is connected and paired."""
+        return bool(self._client and self._client.is_connected and self._is_paired)
+
+    @property
+    def fleet(self) -> TuyaBLEFleet | None:
+        return self._fleet
+
+    @property
+    def is_busy(self) -> bool:
+        """Return True while a command is in progress.
+
+        That is while it is sent, waits for the link, for its response or
+        for the device to confirm its datapoints.
+        """
+        return (
+            self._operation_lock.locked()
+            or self._metrics.queue_depth > 0
+            or bool(self._input_expected_responses)
+            or bool(self._confirmations)
+        )
+
+    @property
+    def command_latency(self) -> float | None:
+        """Smoothed round trip time of commands, in seconds."""
+        return self._command_latency
+
+    @property
+    def metrics(self) -> TuyaBLEMetrics:
+        """Protocol counters and latency histograms of the device."""
+        return self._metrics
+
+    @property
+    def confirmation_latency(self) -> float | None:
+        """Smoothed time from a command to the device reporting it back."""
+        return self._confirmation_latency
+
+    @property
+    def clock_offset(self) -> float:
+        """Time of the clock here minus the device clock, in seconds.
+
+        Estimated by the smallest delay of the timestamped reports of the
+        last day, as buffered readings come later than live ones.
+        """
+        if not self._report_delays:
+            return 0.0
+        return self._report_delays[0][1]
+
+    def _update_clock_offset(self, timestamp: float) -> None:
+        now = time.time()
+        delay = now - timestamp
+        delays = self._report_delays
+        while delays and delays[-1][1] >= delay:
+            delays.pop()
+        delays.append((now, delay))
+        while delays[0][0] < now - CLOCK_OFFSET_WINDOW:
+            delays.popleft()
+
+    @property
+    def confirmation_timeout(self) -> float:
+        """Time the device gets to report back datapoints of a command."""
+        return max(
+            CONFIRMATION_MIN_TIMEOUT,
+            (self._command_latency or 0.0) * CONFIRMATION_LATENCY_FACTOR,
+        )
+
     @property
     def name(self) -> str:
         """Get the name of the device."""
@@ -444,6 +607,63 @@ class TuyaBLEDevice:
         self._connected_callbacks.append(callback)
         return unregister_callback
 
+    def expect_datapoints(self, ids: Iterable[int]) -> TuyaBLEConfirmation:
+        """Start waiting for the device to report the datapoints back.
+
+        Call it before sending the datapoints, the report may come before
+        the response to the command.
+        """
+        confirmation = TuyaBLEConfirmation(ids)
+        self._confirmations.append(confirmation)
+        return confirmation
+
+    async def wait_for_confirmation(
+        self, confirmation: TuyaBLEConfirmation, timeout: float | None = None
+    ) -> float:
+        """Wait for the device to report the datapoints, return the latency."""
+        if timeout is None:
+            timeout = self.confirmation_timeout
+        try:
+            return await asyncio.wait_for(confirmation.future, timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.debug(
+                "%s: Datapoints not confirmed in %.3fs: %s",
+                self.address,
+                timeout,
+                sorted(confirmation.pending),
+            )
+            raise TuyaBLEConfirmationError(sorted(confirmation.pending)) from None
+        finally:
+            self.cancel_confirmation(confirmation)
+
+    def cancel_confirmation(self, confirmation: TuyaBLEConfirmation) -> None:
+        if confirmation in self._confirmations:
+            self._confirmations.remove(confirmation)
+        if not confirmation.future.done():
+            confirmation.future.cancel()
+
+    def _confirm_datapoints(self, datapoints: list[TuyaBLEDataPoint]) -> None:
+        """Resolve the confirmations waiting for the reported datapoints."""
+        if not self._confirmations:
+            return
+        now = time.monotonic()
+        ids = {datapoint.id for datapoint in datapoints}
+        for confirmation in list(self._confirmations):
+            confirmation.pending -= ids
+            if confirmation.pending:
+                continue
+            self._confirmations.remove(confirmation)
+            latency = now - confirmation.started
+            self._metrics.confirmation_latency.observe(latency)
+            if self._confirmation_latency is None:
+                self._confirmation_latency = latency
+            else:
+                self._confirmation_latency += (
+                    latency - self._confirmation_latency
+                ) * COMMAND_LATENCY_SMOOTHING
+            if not confirmation.future.done():
+                confirmation.future.set_result(latency)
+
     def _fire_callbacks(self, datapoints: list[TuyaBLEDataPoint]) -> None:
         """Fire the callbacks."""
         for callback in self._callbacks:
@@ -485,14 +705,134 @@ class TuyaBLEDevice:
     async def stop(self) -> None:
         """Stop the TuyaBLE."""
         _LOGGER.debug("%s: Stop", self.address)
+        await self.stop_stream()
         await self._execute_disconnect()
 
+    @property
+    def is_streaming(self) -> bool:
+        return self._stream_task is not None
+
+    @property
+    def stream_stats(self) -> TuyaBLEStreamStats | None:
+        """Statistics of the current or last stream."""
+        if not self._stream_started:
+            return None
+        ended = (
+            self._stream_stopped
+            if self._stream_stopped is not None
+            else time.monotonic()
+        )
+        elapsed = ended - self._stream_started
+        return TuyaBLEStreamStats(
+            frames_sent=self._stream_sent,
+            frames_dropped=self._stream_dropped,
+            frame_rate=self._stream_sent / elapsed if elapsed > 0 else 0.0,
+        )
+
+    async def start_stream(
+        self, max_frame_rate: float = STREAM_MAX_FRAME_RATE
+    ) -> None:
+        """Start streaming datapoint frames over the open connection.
+
+        Frames are sent without waiting for the response of the device,
+        and a frame not sent yet is replaced by a newer one, so the device
+        always gets the latest values with the lowest delay.
+        """
+        if self._stream_task is not None:
+            return
+        await self._ensure_connected()
+        self._stream_interval = 1 / max_frame_rate
+        self._stream_started = time.monotonic()
+        self._stream_stopped = None
+        self._stream_sent = 0
+        self._stream_dropped = 0
+        self._stream_frame = None
+        self._stream_event.clear()
+        self._stream_task = asyncio.create_task(self._stream_loop())
+        _LOGGER.debug(
+            "%s: Streaming started, up to %s frames per second",
+            self.address,
+            max_frame_rate,
+        )
+
+    def stream_datapoints(
+        self,
+        values: list[tuple[int, TuyaBLEDataPointType, bytes | bool | int | str]],
+    ) -> None:
+        """Queue a frame of datapoint values, replacing the unsent one."""
+        if self._stream_frame is not None:
+            self._stream_dropped += 1
+        self._stream_frame = values
+        self._stream_event.set()
+
+    async def stop_stream(self) -> TuyaBLEStreamStats | None:
+        """Stop streaming, return the statistics of the stream."""
+        task = self._stream_task
+        if task is None:
+            return None
+        self._stream_task = None
+        self._stream_event.set()
+        await task
+        self._stream_stopped = time.monotonic()
+        stats = self.stream_stats
+        if stats:
+            _LOGGER.debug(
+                "%s: Streaming stopped, %s frames sent, %s dropped, %.1f fps",
+                self.address,
+                stats.frames_sent,
+                stats.frames_dropped,
+                stats.frame_rate,
+            )
+        return stats
+
+    async def _stream_loop(self) -> None:
+        task = asyncio.current_task()
+        try:
+            while self._stream_task is task:
+                await self._stream_event.wait()
+                self._stream_event.clear()
+                frame = self._stream_frame
+                self._stream_frame = None
+                if self._stream_task is not task or not frame:
+                    continue
+                started = time.monotonic()
+                try:
+                    self._datapoints.begin_update()
+                    try:
+                        for dp_id, dp_type, value in frame:
+                            datapoint = self._datapoints.get_or_create(
+                                dp_id, dp_type, value
+                            )
+                            await datapoint.set_value(value)
+                    finally:
+                        await self._datapoints.end_update(wait_for_response=False)
+                    self._stream_sent += 1
+                except (*BLEAK_EXCEPTIONS, TuyaBLEError):
+                    _LOGGER.debug(
+                        "%s: Sending stream frame failed", self.address, exc_info=True
+                    )
+                await asyncio.sleep(
+                    max(0.0, self._stream_interval - (time.monotonic() - started))
+                )
+        finally:
+            if self._stream_task is task:
+                # Ended by an unexpected error, not by stop_stream
+                self._stream_task = None
+                self._stream_frame = None
+                self._stream_stopped = time.monotonic()
+
     def _disconnected(self, client: BleakClientWithServiceCache) -> None:
         """Disconnected callback."""
         was_paired = self._is_paired
         self._is_paired = False
+        self._metrics.disconnects += 1
+        if self._connected_at is not None:
+            self._metrics.connection_duration.observe(
+                time.monotonic() - self._connected_at
+            )
+            self._connected_at = None
         self._fire_disconnected_callbacks()
-        if self._expected_disconnect:
+        if self._expected_disconnect or client is not self._client:
             _LOGGER.debug(
                 "%s: Disconnected from device; RSSI: %s",
                 self.address,
@@ -500,6 +840,7 @@ class TuyaBLEDevice:
             )
             return
         self._client = None
+        self._metrics.unexpected_disconnects += 1
         _LOGGER.warning(
             "%s: Device unexpectedly disconnected; RSSI: %s",
             self.address,
@@ -525,6 +866,39 @@ class TuyaBLEDevice:
         )
         await self._execute_disconnect()
 
+    async def disconnect(self) -> None:
+        """Disconnect, the next command connects again."""
+        async with self._connect_lock:
+            client = self._client
+            # The disconnected callback ignores a client no longer in use
+            self._client = None
+            self._is_paired = False
+            if client and client.is_connected:
+                _LOGGER.debug("%s: Releasing connection", self.address)
+                try:
+                    await client.stop_notify(CHARACTERISTIC_NOTIFY)
+                except BLEAK_EXCEPTIONS:
+                    pass
+                await client.disconnect()
+            self._fail_pending()
+        async with self._seq_num_lock:
+            self._current_seq_num = 1
+
+    def _fail_pending(self) -> None:
+        """Fail the responses and confirmations the released link will not get."""
+        responses = self._input_expected_responses
+        self._input_expected_responses = {}
+        for future in responses.values():
+            if not future.done():
+                future.set_exception(TuyaBLEDisconnectedError())
+        confirmations = self._confirmations
+        self._confirmations = []
+        for confirmation in confirmations:
+            if not confirmation.future.done():
+                confirmation.future.set_exception(
+                    TuyaBLEConfirmationError(sorted(confirmation.pending))
+                )
+
     async def _execute_disconnect(self) -> None:
         """Execute disconnection."""
         async with self._connect_lock:
@@ -557,7 +931,11 @@ class TuyaBLEDevice:
             if self._client and self._client.is_connected and self._is_paired:
                 return
             attempts_count = 100
+            timings: dict[str, float] = {}
             while attempts_count > 0:
+                if attempts_count < 100:
+                    # Only a failed attempt gets the loop going again
+                    self._metrics.connect_failures += 1
                 attempts_count -= 1
                 if attempts_count == 0:
                     _LOGGER.error(
@@ -566,8 +944,17 @@ class TuyaBLEDevice:
                         self.rssi,
                     )
                     raise BleakNotFoundError()
+                self._metrics.connect_attempts += 1
+                phase_started = time.monotonic()
+                if self._fleet:
+                    self._ble_device = self._fleet.select_ble_device(self)
                 try:
-                    async with global_connect_lock:
+                    connect_slot = (
+                        self._fleet.connection_slot(self)
+                        if self._fleet
+                        else global_connect_lock
+                    )
+                    async with connect_slot:
                         _LOGGER.debug(
                             "%s: Connecting; RSSI: %s", self.address, self.rssi
                         )
@@ -600,7 +987,11 @@ class TuyaBLEDevice:
                 if client and client.is_connected:
                     _LOGGER.debug("%s: Connected; RSSI: %s",
                                   self.address, self.rssi)
+                    timings["connect"] = time.monotonic() - phase_started
+                    phase_started = time.monotonic()
                     self._client = client
+                    if self._fleet:
+                        self._fleet.record_connection(self, client)
                     try:
                         await self._client.start_notify(
                             CHARACTERISTIC_NOTIFY, self._notification_handler
@@ -614,6 +1005,8 @@ class TuyaBLEDevice:
                     continue
 
                 if self._client and self._client.is_connected:
+                    timings["notify"] = time.monotonic() - phase_started
+                    phase_started = time.monotonic()
                     _LOGGER.debug(
                         "%s: Sending device info request", self.address)
                     try:
@@ -638,6 +1031,8 @@ class TuyaBLEDevice:
                     continue
 
                 if self._client and self._client.is_connected:
+                    timings["device_info"] = time.monotonic() - phase_started
+                    phase_started = time.monotonic()
                     _LOGGER.debug("%s: Sending pairing request", self.address)
                     try:
                         if not await self._send_packet_while_connected(
@@ -660,12 +1055,17 @@ class TuyaBLEDevice:
                 else:
                     continue
 
+                timings["pair"] = time.monotonic() - phase_started
+                self._metrics.connects += 1
+                self._metrics.handshake_timings = timings
+                self._metrics.handshake_duration.observe(sum(timings.values()))
                 break
 
         if self._client:
             if self._client.is_connected:
                 if self._is_paired:
                     _LOGGER.debug("%s: Successfully connected", self.address)
+                    self._connected_at = time.monotonic()
                     self._fire_connected_callbacks()
                 else:
                     _LOGGER.error("%s: Connected but not paired", self.address)
@@ -677,6 +1077,7 @@ class TuyaBLEDevice:
     async def _reconnect(self) -> None:
         """Attempt a reconnect"""
         _LOGGER.debug("%s: Reconnect, ensuring connection", self.address)
+        self._metrics.reconnects += 1
         async with self._seq_num_lock:
             self._current_seq_num = 1
         try:
@@ -807,10 +1208,19 @@ class TuyaBLEDevice:
         """Send packet to device and optional read response."""
         if self._expected_disconnect:
             return
+        started = time.monotonic()
+        if self._fleet:
+            self._fleet.record_use(self, self.is_connected)
         await self._ensure_connected()
         if self._expected_disconnect:
             return
         await self._send_packet_while_connected(code, data, 0, wait_for_response)
+        # Datapoint commands only, status requests of refreshes do not actuate
+        if self._fleet and code in (
+            TuyaBLECode.FUN_SENDER_DPS,
+            TuyaBLECode.FUN_SENDER_DPS_V4,
+        ):
+            self._fleet.record_actuation(self, time.monotonic() - started)
 
     async def _send_response(
         self,
@@ -855,11 +1265,23 @@ class TuyaBLEDevice:
             )
         packets: list[bytes] = self._build_packets(
             seq_num, code, data, response_to)
+        started = time.monotonic()
         await self._int_send_packet_while_connected(packets)
         if future:
             try:
                 await asyncio.wait_for(future, RESPONSE_WAIT_TIMEOUT)
+                latency = time.monotonic() - started
+                self._metrics.command_latency.observe(latency)
+                if self._command_latency is None:
+                    self._command_latency = latency
+                else:
+                    self._command_latency += (
+                        latency - self._command_latency
+                    ) * COMMAND_LATENCY_SMOOTHING
+                if self._fleet:
+                    self._fleet.record_command_latency(latency)
             except asyncio.TimeoutError:
+                self._metrics.response_timeouts += 1
                 _LOGGER.error(
                     "%s: timeout receiving response, RSSI: %s",
                     self.address,
@@ -881,24 +1303,30 @@ class TuyaBLEDevice:
                 self.address,
                 self.rssi,
             )
-        async with self._operation_lock:
-            try:
-                await self._send_packets_locked(packets)
-            except BleakNotFoundError:
-                _LOGGER.error(
-                    "%s: device not found, no longer in range, or poor RSSI: %s",
-                    self.address,
-                    self.rssi,
-                    exc_info=True,
-                )
-                raise
-            except BLEAK_EXCEPTIONS:
-                _LOGGER.error(
-                    "%s: communication failed",
-                    self.address,
-                    exc_info=True,
-                )
-                raise
+        self._metrics.queue_depth += 1
+        try:
+            await self._operation_lock.acquire()
+        finally:
+            self._metrics.queue_depth -= 1
+        try:
+            await self._send_packets_locked(packets)
+        except BleakNotFoundError:
+            _LOGGER.error(
+                "%s: device not found, no longer in range, or poor RSSI: %s",
+                self.address,
+                self.rssi,
+                exc_info=True,
+            )
+            raise
+        except BLEAK_EXCEPTIONS:
+            _LOGGER.error(
+                "%s: communication failed",
+                self.address,
+                exc_info=True,
+            )
+            raise
+        finally:
+            self._operation_lock.release()
 
     async def _resend_packets(self, packets: list[bytes]) -> None:
         if self._expected_disconnect:
@@ -952,6 +1380,8 @@ class TuyaBLEDevice:
                         packet,
                         False,
                     )
+                    self._metrics.frames_sent += 1
+                    self._metrics.bytes_sent += len(packet)
                 except:
                     _LOGGER.error(
                         "%s: Error during sending packet",
@@ -1011,7 +1441,12 @@ class TuyaBLEDevice:
         return (timestamp, end_pos)
 
     def _parse_datapoints_v3(
-        self, timestamp: float, flags: int, data: bytes, start_pos: int
+        self,
+        timestamp: float,
+        flags: int,
+        data: bytes,
+        start_pos: int,
+        clock_offset: float = 0.0,
     ) -> int:
         datapoints: list[TuyaBLEDataPoint] = []
 
@@ -1048,10 +1483,11 @@ class TuyaBLEDevice:
                 value,
             )
             self._datapoints._update_from_device(
-                id, timestamp, flags, type, value)
+                id, timestamp, flags, type, value, clock_offset)
             datapoints.append(self._datapoints[id])
             pos = next_pos
 
+        self._confirm_datapoints(datapoints)
         self._fire_callbacks(datapoints)
 
     def _handle_command_or_response(
@@ -1138,7 +1574,9 @@ class TuyaBLEDevice:
                 timestamp: float
                 pos: int
                 timestamp, pos = self._parse_timestamp(data, 0)
-                self._parse_datapoints_v3(timestamp, 0, data, pos)
+                self._update_clock_offset(timestamp)
+                self._parse_datapoints_v3(
+                    timestamp, 0, data, pos, self.clock_offset)
                 asyncio.create_task(
                     self._send_response(code, bytes(0), seq_num))
 
@@ -1148,7 +1586,9 @@ class TuyaBLEDevice:
                 dp_seq_num = int.from_bytes(data[:2], "big")
                 flags = data[2]
                 timestamp, pos = self._parse_timestamp(data, 3)
-                self._parse_datapoints_v3(time.time(), flags, data, pos)
+                self._update_clock_offset(timestamp)
+                self._parse_datapoints_v3(
+                    timestamp, flags, data, pos, self.clock_offset)
                 data = pack(">HBB", dp_seq_num, flags, 0)
                 asyncio.create_task(self._send_response(code, data, seq_num))
 
@@ -1237,6 +1677,8 @@ class TuyaBLEDevice:
     def _notification_handler(self, _sender: int, data: bytearray) -> None:
         """Handle notification responses."""
         _LOGGER.debug("%s: Packet received: %s", self.address, data.hex())
+        self._metrics.notifications_received += 1
+        self._metrics.bytes_received += len(data)
 
         pos: int = 0
         packet_num: int
@@ -1250,6 +1692,7 @@ class TuyaBLEDevice:
                 packet_num,
                 self._input_expected_packet_num,
             )
+            self._metrics.sequence_errors += 1
             self._clean_input()
 
         if packet_num == self._input_expected_packet_num:
@@ -1266,6 +1709,7 @@ class TuyaBLEDevice:
                 self._input_expected_packet_num,
                 packet_num,
             )
+            self._metrics.sequence_errors += 1
             self._clean_input()
             return
 
@@ -1277,12 +1721,26 @@ class TuyaBLEDevice:
                 len(self._input_buffer),
                 self._input_expected_length,
             )
+            self._metrics.length_errors += 1
             self._clean_input()
             return
         elif len(self._input_buffer) == self._input_expected_length:
-            self._parse_input()
+            try:
+                self._parse_input()
+            except TuyaBLEDataCRCError:
+                self._metrics.crc_errors += 1
+                raise
+            except TuyaBLEDataLengthError:
+                self._metrics.length_errors += 1
+                raise
+            except TuyaBLEDataFormatError:
+                self._metrics.format_errors += 1
+                raise
+            self._metrics.frames_received += 1
 
-    async def _send_datapoints_v3(self, datapoint_ids: list[int]) -> None:
+    async def _send_datapoints_v3(
+        self, datapoint_ids: list[int], wait_for_response: bool = True
+    ) -> None:
         """Send new values of datapoints to the device."""
         data = bytearray()
         for dp_id in datapoint_ids:
@@ -1298,11 +1756,15 @@ class TuyaBLEDevice:
             data += pack(">BBB", dp.id, int(dp.type.value), len(value))
             data += value
 
-        await self._send_packet(TuyaBLECode.FUN_SENDER_DPS, data)
+        await self._send_packet(
+            TuyaBLECode.FUN_SENDER_DPS, data, wait_for_response
+        )
 
-    async def _send_datapoints(self, datapoint_ids: list[int]) -> None:
+    async def _send_datapoints(
+        self, datapoint_ids: list[int], wait_for_response: bool = True
+    ) -> None:
         """Send new values of datapoints to the device."""
         if self._protocol_version == 3:
-            await self._send_datapoints_v3(datapoint_ids)
+            await self._send_datapoints_v3(datapoint_ids, wait_for_response)
         else:
             raise TuyaBLEDeviceError(0)
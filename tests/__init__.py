@@ -0,0 +1 @@
+"""Tests of the Tuya BLE integration."""
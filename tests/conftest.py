@@ -0,0 +1,8 @@
+"""Fixtures of the Tuya BLE tests."""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable the custom integration in all tests."""
+    yield
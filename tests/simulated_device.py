@@ -0,0 +1,124 @@
+"""A paired Tuya BLE device over a simulated BLE link."""
+from __future__ import annotations
+
+import asyncio
+from struct import unpack
+
+from bleak.backends.device import BLEDevice
+from Crypto.Cipher import AES
+
+from custom_components.tuya_ble.tuya_ble import (
+    AbstaractTuyaBLEDeviceManager,
+    TuyaBLEDevice,
+)
+from custom_components.tuya_ble.tuya_ble.const import TuyaBLECode
+
+ADDRESS = "AA:BB:CC:DD:EE:01"
+SESSION_KEY = bytes(range(16))
+# Time of a GATT write, then of the device answering a whole frame
+WRITE_TIME = 0.005
+RESPONSE_TIME = 0.02
+
+
+class SimulatedClient:
+    """BLE client of a device answering and reporting the datapoints sent.
+
+    Written packets are reassembled and decrypted the way the device does.
+    Each datapoint command is answered after the response time, then its
+    datapoints are reported back, as a device applying them would.
+    """
+
+    def __init__(
+        self,
+        device: TuyaBLEDevice,
+        write_time: float = WRITE_TIME,
+        response_time: float = RESPONSE_TIME,
+    ) -> None:
+        self.is_connected = True
+        self.packets = 0
+        self.frames = 0
+        self._device = device
+        self._write_time = write_time
+        self._response_time = response_time
+        self._buffer = bytearray()
+        self._remaining = 0
+        self._seq_num = 1
+        self._busy = 0
+
+    async def write_gatt_char(
+        self, characteristic: str, data: bytes, response: bool
+    ) -> None:
+        self._busy += 1
+        try:
+            await asyncio.sleep(self._write_time)
+        finally:
+            self._busy -= 1
+        self.packets += 1
+        packet_num, pos = TuyaBLEDevice._unpack_int(data, 0)
+        if packet_num == 0:
+            self._buffer = bytearray()
+            self._remaining, pos = TuyaBLEDevice._unpack_int(data, pos)
+            # Protocol version
+            pos += 1
+        self._buffer += data[pos:]
+        self._remaining -= len(data) - pos
+        if self._remaining > 0:
+            return
+
+        iv = bytes(self._buffer[1:17])
+        raw = AES.new(SESSION_KEY, AES.MODE_CBC, iv).decrypt(bytes(self._buffer[17:]))
+        seq_num, response_to, code, length = unpack(">IIHH", raw[:12])
+        if response_to or code != TuyaBLECode.FUN_SENDER_DPS.value:
+            # Acknowledgements of the reports
+            return
+        self.frames += 1
+        self._busy += 1
+        asyncio.get_running_loop().call_later(
+            self._response_time, self._respond, seq_num, raw[12 : 12 + length]
+        )
+
+    def _respond(self, seq_num: int, data: bytes) -> None:
+        self._busy -= 1
+        self._device._handle_command_or_response(
+            self._next_seq_num(), seq_num, TuyaBLECode.FUN_SENDER_DPS, b""
+        )
+        self._device._handle_command_or_response(
+            self._next_seq_num(), 0, TuyaBLECode.FUN_RECEIVE_DP, data
+        )
+
+    def _next_seq_num(self) -> int:
+        self._seq_num += 1
+        return self._seq_num
+
+    async def async_wait_idle(self) -> None:
+        """Wait for the frames in flight, and the acknowledgements of reports."""
+        idle_checks = 0
+        while idle_checks < 2:
+            await asyncio.sleep(self._write_time)
+            idle_checks = idle_checks + 1 if not self._busy else 0
+
+    async def stop_notify(self, characteristic: str) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        self.is_connected = False
+
+
+class _Manager(AbstaractTuyaBLEDeviceManager):
+    async def get_device_credentials(self, *args, **kwargs):
+        return None
+
+
+def create_simulated_device(
+    write_time: float = WRITE_TIME, response_time: float = RESPONSE_TIME
+) -> tuple[TuyaBLEDevice, SimulatedClient]:
+    """Return a device paired over a simulated link, and the link."""
+    device = TuyaBLEDevice(
+        _Manager(), BLEDevice(ADDRESS, "Light", {}, rssi=-60)
+    )
+    client = SimulatedClient(device, write_time, response_time)
+    device._client = client
+    device._is_paired = True
+    device._protocol_version = 3
+    device._session_key = SESSION_KEY
+    return device, client
@@ -0,0 +1,61 @@
+"""Tests of the Tuya BLE climate entities."""
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.common import MockEntityPlatform
+
+from custom_components.tuya_ble import climate
+from custom_components.tuya_ble.const import DOMAIN
+from custom_components.tuya_ble.devices import TuyaBLECoordinator
+from custom_components.tuya_ble.tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
+
+from .simulated_device import create_simulated_device
+
+# Thermostatic radiator valve
+TRV_MAPPING = climate.mapping["wk"].products["drlajpqc"][0]
+CURRENT_TEMPERATURE_DP_ID = 102
+SCHEDULE_DP_ID = 123
+
+
+def _report(device: TuyaBLEDevice, dp_id: int, value: int | bytes) -> None:
+    """Report a datapoint as received from the device."""
+    dp_type = (
+        TuyaBLEDataPointType.DT_RAW
+        if isinstance(value, bytes)
+        else TuyaBLEDataPointType.DT_VALUE
+    )
+    device.datapoints._update_from_device(dp_id, 0, 0, dp_type, value)
+    device._fire_callbacks([device.datapoints[dp_id]])
+
+
+async def test_temperature_report_skips_schedule_and_history(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    decoded: list[list[int]] = []
+
+    def _decode_week_schedule(datapoints, dp_ids):
+        decoded.append(dp_ids)
+        return None
+
+    monkeypatch.setattr(climate, "decode_week_schedule", _decode_week_schedule)
+    device, _ = create_simulated_device()
+    entity = climate.TuyaBLEClimate(
+        hass, TuyaBLECoordinator(hass, device), device, None, TRV_MAPPING
+    )
+    imports: list[None] = []
+    monkeypatch.setattr(entity._history, "async_update", lambda: imports.append(None))
+    platform = MockEntityPlatform(hass, domain=Platform.CLIMATE, platform_name=DOMAIN)
+    await platform.async_add_entities([entity])
+    # The first report connects the device, and updates the entity in full
+    _report(device, CURRENT_TEMPERATURE_DP_ID, 210)
+    decoded.clear()
+    imports.clear()
+
+    _report(device, CURRENT_TEMPERATURE_DP_ID, 215)
+    assert entity.current_temperature == 21.5
+    assert not decoded
+    assert not imports
+
+    _report(device, SCHEDULE_DP_ID, bytes(4))
+    assert len(decoded) == 1
+    assert not imports
@@ -0,0 +1,284 @@
+"""Tests of the Tuya cloud login and credentials, against a stub server."""
+import asyncio
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.tuya_ble.cloud import (
+    HASSTuyaBLEDeviceManager,
+    get_cloud_session,
+)
+from custom_components.tuya_ble.const import (
+    CONF_ACCESS_ID,
+    CONF_ACCESS_SECRET,
+    CONF_ENDPOINT,
+    CREDENTIALS_STORAGE_KEY,
+    TOKEN_STORAGE_KEY,
+    TOKEN_STORAGE_VERSION,
+    TUYA_API_REFRESH_TOKEN_URL,
+)
+
+ACCESS_ID = "access-id"
+UID = "uid-1"
+LOGIN_PATH = "/v1.0/iot-03/users/login"
+DEVICES_PATH = f"/v1.0/users/{UID}/devices"
+FACTORY_INFO_PATH = "/v1.0/iot-03/devices/factory-infos?device_ids=device-1,device-2"
+# Refresh token the stub server rejects, as after a password change
+REVOKED_REFRESH_TOKEN = "revoked"
+
+DEVICES = [
+    {
+        "id": "device-1",
+        "uuid": "uuid-1",
+        "local_key": "local-key-1",
+        "category": "dj",
+        "product_id": "product-1",
+        "name": "Desk lamp",
+        "model": "model-1",
+        "product_name": "Lamp",
+    },
+    {
+        "id": "device-2",
+        "uuid": "uuid-2",
+        "local_key": "local-key-2",
+        "category": "wk",
+        "product_id": "product-2",
+        "name": "Radiator",
+        "model": "model-2",
+        "product_name": "Thermostat",
+    },
+]
+FACTORY_INFOS = [
+    {"id": "device-1", "mac": "aabbccddee01"},
+    {"id": "device-2", "mac": "aabbccddee02"},
+]
+
+
+def _token(access_token: str, refresh_token: str) -> dict[str, Any]:
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "uid": UID,
+        "expire": 7200,
+    }
+
+
+class _TuyaCloudHandler(BaseHTTPRequestHandler):
+    """Serves the Tuya OpenAPI calls of the integration, records their paths."""
+
+    server: "_TuyaCloudServer"
+
+    def do_GET(self) -> None:
+        self._respond()
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._respond()
+
+    def _respond(self) -> None:
+        self.server.paths.append(self.path)
+        success = True
+        if self.path == LOGIN_PATH:
+            # Slow enough for concurrent logins to overlap
+            time.sleep(0.1)
+            self.server.logins += 1
+            result: Any = _token(f"access-{self.server.logins}", "refresh")
+        elif self.path.startswith(TUYA_API_REFRESH_TOKEN_URL):
+            success = not self.path.endswith(REVOKED_REFRESH_TOKEN)
+            result = _token("access-refreshed", "refresh") if success else None
+        elif self.path == DEVICES_PATH:
+            result = DEVICES
+        elif self.path == FACTORY_INFO_PATH:
+            result = FACTORY_INFOS
+        else:
+            success = False
+            result = None
+        body = json.dumps(
+            {"success": success, "t": int(time.time() * 1000), "result": result}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _TuyaCloudServer(ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _TuyaCloudHandler)
+        self.paths: list[str] = []
+        self.logins = 0
+
+
+@pytest.fixture
+def cloud(socket_enabled: None) -> Iterator[_TuyaCloudServer]:
+    """Run the stub Tuya cloud for the test."""
+    server = _TuyaCloudServer()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def auth_data(cloud: _TuyaCloudServer) -> dict[str, Any]:
+    host, port = cloud.server_address[:2]
+    return {
+        CONF_ENDPOINT: f"http://{host}:{port}",
+        CONF_ACCESS_ID: ACCESS_ID,
+        CONF_ACCESS_SECRET: "access-secret",
+    }
+
+
+def _store_token(hass_storage: dict[str, Any], refresh_token: str) -> None:
+    """Persist a token about to expire, as left by a previous run."""
+    hass_storage[TOKEN_STORAGE_KEY] = {
+        "version": TOKEN_STORAGE_VERSION,
+        "key": TOKEN_STORAGE_KEY,
+        "data": {
+            ACCESS_ID: {
+                "access_token": "access-stored",
+                "refresh_token": refresh_token,
+                "uid": UID,
+                "expire_time": int((time.time() + 60) * 1000),
+            }
+        },
+    }
+
+
+async def test_concurrent_logins_share_one_request(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    cloud: _TuyaCloudServer,
+    auth_data: dict[str, Any],
+) -> None:
+    """Callers logging in at once share a single login."""
+    session = get_cloud_session(hass, auth_data)
+    responses = await asyncio.gather(*(session.async_login() for _ in range(5)))
+
+    assert all(response["success"] for response in responses)
+    assert cloud.paths == [LOGIN_PATH]
+    assert session.api.token_info.access_token == "access-1"
+    assert hass_storage[TOKEN_STORAGE_KEY]["data"][ACCESS_ID]["access_token"] == (
+        "access-1"
+    )
+
+    # The token is valid, no request at all
+    assert (await session.async_login())["success"]
+    assert cloud.paths == [LOGIN_PATH]
+
+
+async def test_forced_login_waits_for_login_not_forced(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    cloud: _TuyaCloudServer,
+    auth_data: dict[str, Any],
+) -> None:
+    """A forced login does not settle for the refresh running already."""
+    _store_token(hass_storage, "refresh-stored")
+    session = get_cloud_session(hass, auth_data)
+
+    responses = await asyncio.gather(
+        session.async_login(), session.async_login(force=True)
+    )
+
+    assert all(response["success"] for response in responses)
+    assert cloud.paths == [
+        TUYA_API_REFRESH_TOKEN_URL + "refresh-stored",
+        LOGIN_PATH,
+    ]
+    assert session.api.token_info.access_token == "access-1"
+
+
+async def test_forced_logins_share_one_request(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    cloud: _TuyaCloudServer,
+    auth_data: dict[str, Any],
+) -> None:
+    session = get_cloud_session(hass, auth_data)
+    await asyncio.gather(
+        session.async_login(force=True), session.async_login(force=True)
+    )
+    assert cloud.paths == [LOGIN_PATH]
+
+
+async def test_stored_token_is_refreshed(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    cloud: _TuyaCloudServer,
+    auth_data: dict[str, Any],
+) -> None:
+    """A stored token about to expire is refreshed, not replaced by a login."""
+    _store_token(hass_storage, "refresh-stored")
+    session = get_cloud_session(hass, auth_data)
+
+    assert (await session.async_login())["success"]
+    assert cloud.paths == [TUYA_API_REFRESH_TOKEN_URL + "refresh-stored"]
+    assert session.api.token_info.access_token == "access-refreshed"
+    assert hass_storage[TOKEN_STORAGE_KEY]["data"][ACCESS_ID]["access_token"] == (
+        "access-refreshed"
+    )
+
+
+async def test_revoked_token_falls_back_to_login(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    cloud: _TuyaCloudServer,
+    auth_data: dict[str, Any],
+) -> None:
+    _store_token(hass_storage, REVOKED_REFRESH_TOKEN)
+    session = get_cloud_session(hass, auth_data)
+
+    assert (await session.async_login())["success"]
+    assert cloud.paths == [
+        TUYA_API_REFRESH_TOKEN_URL + REVOKED_REFRESH_TOKEN,
+        LOGIN_PATH,
+    ]
+    assert session.api.token_info.access_token == "access-1"
+
+
+async def test_prefetch_fills_cache(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    cloud: _TuyaCloudServer,
+    auth_data: dict[str, Any],
+) -> None:
+    """Credentials of all devices are fetched once, then read from the cache."""
+    manager = HASSTuyaBLEDeviceManager(hass, auth_data)
+
+    assert await manager.async_prefetch()
+    assert cloud.paths == [LOGIN_PATH, DEVICES_PATH, FACTORY_INFO_PATH]
+    assert set(hass_storage[CREDENTIALS_STORAGE_KEY]["data"]["devices"]) == {
+        "AA:BB:CC:DD:EE:01",
+        "AA:BB:CC:DD:EE:02",
+    }
+
+    # Other entries of the account find their credentials in the cache
+    other = HASSTuyaBLEDeviceManager(hass, auth_data)
+    assert await other.async_prefetch()
+    credentials = await other.get_device_credentials("aa:bb:cc:dd:ee:02")
+    assert credentials is not None
+    assert credentials.uuid == "uuid-2"
+    assert credentials.local_key == "local-key-2"
+    assert credentials.category == "wk"
+    assert cloud.paths == [LOGIN_PATH, DEVICES_PATH, FACTORY_INFO_PATH]
+
+
+async def test_prefetch_needs_auth_data(
+    hass: HomeAssistant, cloud: _TuyaCloudServer
+) -> None:
+    assert not await HASSTuyaBLEDeviceManager(hass).async_prefetch()
+    assert cloud.paths == []
@@ -0,0 +1,106 @@
+"""Tests of the fleet scheduling the connections of the devices."""
+import asyncio
+
+from bleak.backends.device import BLEDevice
+import pytest
+
+from custom_components.tuya_ble.tuya_ble import TuyaBLEFleet
+from custom_components.tuya_ble.tuya_ble.const import (
+    DEFAULT_ADAPTER,
+    FLEET_PRIORITY_HIGH,
+)
+
+from .simulated_device import ADDRESS, SimulatedClient, _Manager
+
+GROUP_WINDOW = 0.01
+
+
+async def test_stop_cancels_groups_in_flight() -> None:
+    fleet = TuyaBLEFleet(refresh_interval=0, group_window=GROUP_WINDOW)
+    device = fleet.create_device(_Manager(), BLEDevice(ADDRESS, "Light", {}))
+    sent = asyncio.Event()
+
+    async def _command() -> None:
+        sent.set()
+        await asyncio.sleep(10)
+
+    send = asyncio.create_task(fleet.send_grouped(device, _command))
+    await sent.wait()
+    await fleet.stop()
+
+    assert not fleet._group_tasks
+    with pytest.raises(asyncio.CancelledError):
+        await send
+
+
+async def test_preempted_refresh_finishes_its_exchange() -> None:
+    """A refresh holding the last connection is released after its request."""
+    fleet = TuyaBLEFleet(refresh_interval=0, adapter_max_connections=1)
+    valve = fleet.create_device(_Manager(), BLEDevice(ADDRESS, "Valve", {}))
+    lock = fleet.create_device(_Manager(), BLEDevice("AA:BB:CC:DD:EE:02", "Lock", {}))
+    valve._client = SimulatedClient(valve)
+    valve._is_paired = True
+    fleet.record_use(valve, True)
+    started = asyncio.Event()
+    finished: list[bool] = []
+
+    async def _update() -> None:
+        """Status request answered after a while, as over the air."""
+        response = asyncio.get_running_loop().create_future()
+        valve._input_expected_responses[1] = response
+        asyncio.get_running_loop().call_later(
+            0.05, lambda: response.done() or response.set_result(None)
+        )
+        started.set()
+        await response
+        finished.append(valve.is_connected)
+
+    valve.update = _update
+    refresh = asyncio.create_task(fleet._refresh(valve))
+    await started.wait()
+
+    assert await fleet._make_room(lock, DEFAULT_ADAPTER, FLEET_PRIORITY_HIGH)
+    assert finished == [True]
+    assert not valve.is_connected
+    assert fleet.pool_stats.preemptions == 1
+    await refresh
+
+
+class _Backend:
+    """Backend of a client connected through a proxy."""
+
+    def __init__(self, source: str) -> None:
+        self._source = source
+
+
+class _Client:
+    def __init__(self, backend: object | None = None) -> None:
+        self._backend = backend
+
+
+def _fleet_with_paths() -> tuple[TuyaBLEFleet, object]:
+    """Return a fleet seeing the device through two proxies, the first selected."""
+    fleet = TuyaBLEFleet(refresh_interval=0)
+    paths = [
+        BLEDevice(ADDRESS, "Light", {"source": source})
+        for source in ("proxy-1", "proxy-2")
+    ]
+    fleet.set_ble_device_provider(lambda address: [(path, -60) for path in paths])
+    return fleet, fleet.create_device(_Manager(), paths[0])
+
+
+def test_connection_adapter_from_scanner_details() -> None:
+    """The backend tells which path the wrapper connected through."""
+    fleet, device = _fleet_with_paths()
+    fleet.record_connection(device, _Client(_Backend("proxy-2")))
+    assert fleet.get_device_adapter(device) == "proxy-2"
+
+
+@pytest.mark.parametrize(
+    "client", [_Client(), _Client(_Backend("unknown")), _Client(object())]
+)
+def test_connection_adapter_defaults_to_selected(client: _Client) -> None:
+    """Backends telling nothing, or no path seen, keep the selected one."""
+    fleet, device = _fleet_with_paths()
+    fleet.record_connection(device, client)
+    assert fleet.get_device_adapter(device) == "proxy-1"
@@ -0,0 +1,51 @@
+"""Tests of the setup of Tuya BLE config entries."""
+from bleak.backends.device import BLEDevice
+import pytest
+
+from homeassistant.components import bluetooth
+from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tuya_ble import async_setup_entry, get_fleet
+from custom_components.tuya_ble.cloud import HASSTuyaBLEDeviceManager
+from custom_components.tuya_ble.const import DOMAIN
+from custom_components.tuya_ble.tuya_ble import (
+    TuyaBLEDevice,
+    TuyaBLEDisconnectedError,
+)
+
+from .simulated_device import ADDRESS
+
+
+async def test_setup_retries_when_initialize_fails(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A failed setup is retried, and leaves neither device nor prefetch behind."""
+    monkeypatch.setattr(
+        bluetooth,
+        "async_ble_device_from_address",
+        lambda hass, address, connectable: BLEDevice(address, "Light", {}),
+    )
+
+    async def _initialize(self: TuyaBLEDevice) -> None:
+        raise TuyaBLEDisconnectedError()
+
+    monkeypatch.setattr(TuyaBLEDevice, "initialize", _initialize)
+    prefetches: list[HASSTuyaBLEDeviceManager] = []
+
+    async def _async_prefetch(self: HASSTuyaBLEDeviceManager) -> bool:
+        prefetches.append(self)
+        return True
+
+    monkeypatch.setattr(HASSTuyaBLEDeviceManager, "async_prefetch", _async_prefetch)
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_ADDRESS: ADDRESS})
+    entry.add_to_hass(hass)
+
+    with pytest.raises(ConfigEntryNotReady):
+        await async_setup_entry(hass, entry)
+    await hass.async_block_till_done()
+
+    assert ADDRESS not in get_fleet(hass)
+    assert not prefetches
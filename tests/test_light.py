@@ -0,0 +1,196 @@
+"""Tests of the Tuya BLE lights."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from homeassistant.components.light import ColorMode
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    MockEntityPlatform,
+)
+
+from custom_components.tuya_ble.const import DOMAIN, LIGHT_DP_ID
+from custom_components.tuya_ble.devices import TuyaBLECoordinator
+from custom_components.tuya_ble.light import (
+    TuyaBLELight,
+    TuyaBLELightMapping,
+    async_migrate_unique_id,
+    colour_mapping,
+    default_mapping,
+    get_light_tables,
+    get_mapping_by_device,
+)
+from custom_components.tuya_ble.tuya_ble import (
+    TuyaBLEDataPointType,
+    TuyaBLEDevice,
+    TuyaBLEDisconnectedError,
+)
+
+from .simulated_device import ADDRESS, create_simulated_device
+
+# Switch, brightness and colour temperature of a turn_on
+TURN_ON = [
+    (LIGHT_DP_ID["SWITCH"], TuyaBLEDataPointType.DT_BOOL, True),
+    (LIGHT_DP_ID["BRIGHT"], TuyaBLEDataPointType.DT_VALUE, 80),
+    (LIGHT_DP_ID["TEMP"], TuyaBLEDataPointType.DT_VALUE, 40),
+]
+
+
+async def test_turn_on_one_frame() -> None:
+    """All attributes of a turn_on go out in a single frame and round trip."""
+    device, client = create_simulated_device()
+    datapoints = device.datapoints
+
+    for dp_id, dp_type, value in TURN_ON:
+        await datapoints.get_or_create(dp_id, dp_type).set_value(value)
+    per_attribute = (client.frames, client.packets)
+    assert per_attribute[0] == len(TURN_ON)
+
+    client.frames = client.packets = 0
+    datapoints.begin_update()
+    try:
+        for dp_id, dp_type, value in TURN_ON:
+            await datapoints.get_or_create(dp_id, dp_type).set_value(value)
+    finally:
+        await datapoints.end_update()
+    coalesced = (client.frames, client.packets)
+
+    assert coalesced[0] == 1, (
+        f"{coalesced[0]} frames, {per_attribute[0]} in one frame per attribute"
+    )
+    assert coalesced[1] < per_attribute[1], (
+        f"{coalesced[1]} packets in one frame, "
+        f"{per_attribute[1]} in one frame per attribute"
+    )
+    await client.async_wait_idle()
+
+
+def test_unknown_product_gets_default_light() -> None:
+    device = SimpleNamespace(category="unknown", product_id="unknown")
+    assert get_mapping_by_device(device) is default_mapping
+
+
+def test_colour_category_gets_standard_light() -> None:
+    device = SimpleNamespace(category="dj", product_id="unknown")
+    assert get_mapping_by_device(device) == [colour_mapping, *default_mapping]
+
+
+def test_color_temp_linear_in_mireds() -> None:
+    """Lights of the former platform report the same colour temperatures."""
+    tables = get_light_tables(default_mapping[0])
+    for value in range(101):
+        mireds = 1_000_000 / tables.color_temp.from_device(value)
+        assert abs(mireds - (value * 347 / 100 + 153)) < 1
+        assert tables.color_temp.to_device(round(1_000_000 / mireds)) == value
+
+
+def test_brightness_gamma() -> None:
+    tables = get_light_tables(default_mapping[0])
+    assert tables.brightness.to_device(0) == 0
+    # The dimmest brightness still lights up
+    assert tables.brightness.to_device(1) == 1
+    # Half the perceived brightness is a fifth of the power
+    assert tables.brightness.to_device(128) == 22
+    assert tables.brightness.to_device(255) == 100
+    assert tables.brightness.from_device(22) == 128
+
+
+def test_known_product_without_light() -> None:
+    # CO2 detector with entities of other platforms
+    device = SimpleNamespace(category="co2bj", product_id="59s19z5m")
+    assert get_mapping_by_device(device) == []
+
+
+async def test_migrate_unique_id(hass: HomeAssistant) -> None:
+    """The light keyed by address moves to the unique ID of the device."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    registry = er.async_get(hass)
+    entity = registry.async_get_or_create(
+        Platform.LIGHT, DOMAIN, f"{ADDRESS}_light", config_entry=entry
+    )
+    device = SimpleNamespace(address=ADDRESS, device_id="device-1")
+
+    async_migrate_unique_id(hass, entry, device)
+
+    assert registry.async_get(entity.entity_id).unique_id == "device-1-light"
+
+
+async def _async_add_light(
+    hass: HomeAssistant,
+    device: TuyaBLEDevice,
+    mapping: TuyaBLELightMapping = default_mapping[0],
+) -> TuyaBLELight:
+    datapoints = device.datapoints
+    datapoints._update_from_device(
+        mapping.switch_dp_id, 0, 0, TuyaBLEDataPointType.DT_BOOL, True
+    )
+    datapoints._update_from_device(
+        mapping.brightness_dp_id, 0, 0, TuyaBLEDataPointType.DT_VALUE, 10
+    )
+    light = TuyaBLELight(hass, TuyaBLECoordinator(hass, device), device, None, mapping)
+    platform = MockEntityPlatform(hass, domain=Platform.LIGHT, platform_name=DOMAIN)
+    await platform.async_add_entities([light])
+    return light
+
+
+async def test_transition_stopped_by_next_command(hass: HomeAssistant) -> None:
+    device, client = create_simulated_device()
+    light = await _async_add_light(hass, device)
+
+    await light.async_turn_on(brightness=255, transition=5)
+    transition = light._transition_task
+    await asyncio.sleep(0.2)
+    assert not transition.done()
+
+    await light.async_turn_on(brightness=128)
+    await asyncio.sleep(0)
+    assert transition.cancelled()
+    frames = client.frames
+    await asyncio.sleep(0.3)
+    # No step of the stopped transition goes out
+    assert client.frames == frames
+    assert device.datapoints[LIGHT_DP_ID["BRIGHT"]].value == 22
+    await client.async_wait_idle()
+
+
+async def test_transition_step_failure(
+    hass: HomeAssistant, caplog: pytest.LogCaptureFixture
+) -> None:
+    device, _ = create_simulated_device()
+    light = await _async_add_light(hass, device)
+
+    async def _send_datapoints(dp_ids: list[int], wait_for_response: bool) -> None:
+        raise TuyaBLEDisconnectedError()
+
+    device._send_datapoints = _send_datapoints
+    await light.async_turn_on(brightness=255, transition=5)
+    await light._transition_task
+
+    assert "Transition stopped" in caplog.text
+    assert device.datapoints[LIGHT_DP_ID["BRIGHT"]].value == 10
+
+
+async def test_turn_on_colour(hass: HomeAssistant) -> None:
+    """A colour switches the work mode and is sent as packed HSV."""
+    device, client = create_simulated_device()
+    light = await _async_add_light(hass, device, colour_mapping)
+    device.datapoints._update_from_device(
+        LIGHT_DP_ID["WORK_MODE"], 0, 0, TuyaBLEDataPointType.DT_ENUM, 0
+    )
+    assert light.color_mode == ColorMode.COLOR_TEMP
+    assert light.supported_color_modes == {ColorMode.HS, ColorMode.COLOR_TEMP}
+
+    await light.async_turn_on(hs_color=(120, 50), brightness=255)
+
+    datapoints = device.datapoints
+    assert datapoints[LIGHT_DP_ID["WORK_MODE"]].value == 1
+    assert datapoints[LIGHT_DP_ID["COLOUR_V2"]].value == "007801f403e8"
+    assert light.color_mode == ColorMode.HS
+    assert light.hs_color == (120, 50)
+    assert light.brightness == 255
+    await client.async_wait_idle()
@@ -0,0 +1,67 @@
+"""Tests of the weekly schedule decoding."""
+import pytest
+
+from custom_components.tuya_ble.tuya_ble.const import TuyaBLEDataPointType
+from custom_components.tuya_ble.tuya_ble.exceptions import TuyaBLEDataFormatError
+from custom_components.tuya_ble.tuya_ble.schedule import (
+    decode_day_schedule,
+    decode_week_schedule,
+)
+from custom_components.tuya_ble.tuya_ble.tuya_ble import TuyaBLEDataPoints
+
+SCHEDULE_DP_IDS = list(range(123, 130))
+
+# Programming data of datapoints 123-129, Monday first, in the layout of
+# SCHEDULE_PERIOD_FORMAT: hour, minute, temperature times 10
+PAYLOADS = [
+    bytes.fromhex("060000d7" "080000be" "110000d7" "160000aa"),
+    bytes.fromhex("060000d7" "080000be" "110000d7" "160000aa"),
+    bytes.fromhex("060000d7" "080000be" "110000d7" "160000aa"),
+    bytes.fromhex("060000d7" "080000be" "110000d7" "160000aa"),
+    bytes.fromhex("060000d7" "080000be" "100000d7" "170000aa"),
+    bytes.fromhex("071e00d7" "170000aa"),
+    bytes.fromhex("071e00d7" "170000aa"),
+]
+
+# Switching points of PAYLOADS, minute of the day and raw temperature
+WORKDAY = ((6 * 60, 215), (8 * 60, 190), (17 * 60, 215), (22 * 60, 170))
+FRIDAY = ((6 * 60, 215), (8 * 60, 190), (16 * 60, 215), (23 * 60, 170))
+WEEKEND = ((7 * 60 + 30, 215), (23 * 60, 170))
+
+
+def _datapoints() -> TuyaBLEDataPoints:
+    datapoints = TuyaBLEDataPoints(None)
+    for dp_id, payload in zip(SCHEDULE_DP_IDS, PAYLOADS):
+        datapoints._update_from_device(
+            dp_id, 0, 0, TuyaBLEDataPointType.DT_RAW, payload
+        )
+    return datapoints
+
+
+@pytest.mark.parametrize(
+    ("payload", "expected"),
+    [
+        (b"", ()),
+        (bytes.fromhex("00000064"), ((0, 100),)),
+        (bytes.fromhex("173b012c"), ((23 * 60 + 59, 300),)),
+        (PAYLOADS[0], WORKDAY),
+        (PAYLOADS[5], WEEKEND),
+    ],
+)
+def test_decode_day(payload: bytes, expected) -> None:
+    assert decode_day_schedule(payload) == expected
+
+
+def test_decode_truncated_day() -> None:
+    with pytest.raises(TuyaBLEDataFormatError):
+        decode_day_schedule(PAYLOADS[0][:-1])
+
+
+def test_decode_week() -> None:
+    """All days are decoded at once, missing ones are empty."""
+    assert decode_week_schedule(_datapoints(), SCHEDULE_DP_IDS) == (
+        (WORKDAY,) * 4 + (FRIDAY,) + (WEEKEND,) * 2
+    )
+    assert decode_week_schedule(TuyaBLEDataPoints(None), SCHEDULE_DP_IDS) == (
+        (),
+    ) * 7
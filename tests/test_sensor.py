@@ -0,0 +1,135 @@
+"""Tests of the Tuya BLE sensors."""
+from datetime import timedelta
+from struct import pack
+import time
+
+from homeassistant.components.sensor import SensorEntityDescription, SensorStateClass
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockEntityPlatform,
+    async_fire_time_changed,
+)
+
+from custom_components.tuya_ble.const import BACKFILL_WINDOW, DOMAIN
+from custom_components.tuya_ble.devices import TuyaBLECoordinator
+from custom_components.tuya_ble.sensor import (
+    SAMPLING_MEAN,
+    TuyaBLESensor,
+    TuyaBLESensorMapping,
+    TuyaBLESensorSampling,
+)
+from custom_components.tuya_ble.tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
+from custom_components.tuya_ble.tuya_ble.const import TuyaBLECode
+
+from .simulated_device import create_simulated_device
+
+CO2_DP_ID = 2
+# Alarm switch of the CO2 detector, the sensor depends on
+ALARM_DP_ID = 13
+MIN_INTERVAL = 60.0
+
+CO2_MAPPING = TuyaBLESensorMapping(
+    dp_id=CO2_DP_ID,
+    description=SensorEntityDescription(
+        key="carbon_dioxide",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    dependencies=[ALARM_DP_ID],
+    sampling=TuyaBLESensorSampling(
+        min_interval=MIN_INTERVAL, aggregate=SAMPLING_MEAN
+    ),
+)
+# Device clock running behind the clock here
+CLOCK_SKEW = 300
+
+
+def _report(
+    device: TuyaBLEDevice,
+    dp_id: int,
+    dp_type: TuyaBLEDataPointType,
+    value: int | bool,
+) -> None:
+    """Report a datapoint as received from the device."""
+    device.datapoints._update_from_device(dp_id, 0, 0, dp_type, value)
+    device._fire_callbacks([device.datapoints[dp_id]])
+
+
+def _report_recorded(device: TuyaBLEDevice, device_time: float, value: int) -> None:
+    """Report a reading with the time the device recorded it."""
+    data = pack(
+        ">BIBBBi",
+        1,
+        int(device_time),
+        CO2_DP_ID,
+        TuyaBLEDataPointType.DT_VALUE.value,
+        4,
+        value,
+    )
+    device._handle_command_or_response(0, 0, TuyaBLECode.FUN_RECEIVE_TIME_DP, data)
+
+
+async def test_sampling_counts_reports_only(hass: HomeAssistant) -> None:
+    """Updates of the connection and of dependencies are no samples."""
+    device, _ = create_simulated_device()
+    coordinator = TuyaBLECoordinator(hass, device)
+    sensor = TuyaBLESensor(hass, coordinator, device, None, CO2_MAPPING)
+    platform = MockEntityPlatform(hass, domain=Platform.SENSOR, platform_name=DOMAIN)
+    await platform.async_add_entities([sensor])
+
+    _report(device, CO2_DP_ID, TuyaBLEDataPointType.DT_VALUE, 400)
+    assert sensor.native_value == 400
+
+    _report(device, CO2_DP_ID, TuyaBLEDataPointType.DT_VALUE, 500)
+    _report(device, CO2_DP_ID, TuyaBLEDataPointType.DT_VALUE, 700)
+    # Connection state and dependency updates in between
+    coordinator.async_update_listeners()
+    _report(device, ALARM_DP_ID, TuyaBLEDataPointType.DT_BOOL, True)
+    coordinator.async_update_listeners()
+    assert sensor.native_value == 400
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=MIN_INTERVAL + 1)
+    )
+    await hass.async_block_till_done()
+    assert sensor.native_value == 600
+
+
+async def test_backfill_with_device_clock_behind(hass: HomeAssistant) -> None:
+    """Live readings of a skewed clock are the state, buffered ones backfilled."""
+    device, client = create_simulated_device()
+    mapping = TuyaBLESensorMapping(
+        dp_id=CO2_DP_ID,
+        description=SensorEntityDescription(
+            key="carbon_dioxide",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+    )
+    sensor = TuyaBLESensor(
+        hass, TuyaBLECoordinator(hass, device), device, None, mapping
+    )
+    platform = MockEntityPlatform(hass, domain=Platform.SENSOR, platform_name=DOMAIN)
+    await platform.async_add_entities([sensor])
+
+    _report_recorded(device, time.time() - CLOCK_SKEW, 400)
+    assert sensor.native_value == 400
+    _report_recorded(device, time.time() - CLOCK_SKEW, 420)
+    assert sensor.native_value == 420
+    assert abs(device.clock_offset - CLOCK_SKEW) < 2
+    assert not sensor._backfill
+
+    # Readings of an hour ago, flushed on reconnection
+    recorded_at = time.time() - 3600
+    _report_recorded(device, recorded_at - CLOCK_SKEW, 380)
+    assert sensor.native_value == 420
+    assert len(sensor._backfill) == 1
+    assert abs(sensor._backfill[0][0] - recorded_at) < 2
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=BACKFILL_WINDOW + 1)
+    )
+    await hass.async_block_till_done()
+    # The state stays with the newer live reading
+    assert sensor.native_value == 420
+    await client.async_wait_idle()
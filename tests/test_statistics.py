@@ -0,0 +1,67 @@
+"""Tests of the import of historical data into statistics."""
+from struct import pack
+import time
+from typing import Any
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.tuya_ble import statistics
+from custom_components.tuya_ble.const import HISTORY_HOURLY
+from custom_components.tuya_ble.statistics import (
+    TuyaBLEHistoryImporter,
+    TuyaBLEHistoryMapping,
+)
+from custom_components.tuya_ble.tuya_ble import TuyaBLEDataPointType
+from custom_components.tuya_ble.tuya_ble.const import TuyaBLECode
+
+from .simulated_device import create_simulated_device
+
+HISTORY_DP_ID = 115
+# Device clock running behind the clock here, as of a radiator valve never
+# time synced
+CLOCK_SKEW = 3 * 3600
+
+MAPPING = TuyaBLEHistoryMapping(
+    key="current_temperature",
+    name="Current temperature",
+    unit="°C",
+    dp_ids={HISTORY_DP_ID: HISTORY_HOURLY},
+    coefficient=10.0,
+)
+
+
+async def test_history_ends_by_clock_here(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Periods of the history end in the current hour, whatever the device clock."""
+    imported: list[tuple[Any, list[Any]]] = []
+    monkeypatch.setattr(
+        statistics,
+        "async_add_external_statistics",
+        lambda hass, metadata, samples: imported.append((metadata, samples)),
+    )
+    hass.config.components.add("recorder")
+    device, client = create_simulated_device()
+    importer = TuyaBLEHistoryImporter(hass, device, None, [MAPPING])
+
+    samples = pack(">3h", 195, 200, 205)
+    # Datapoint sequence number, flags, then the timestamp in seconds
+    data = (
+        pack(">HBBI", 1, 0, 1, int(time.time() - CLOCK_SKEW))
+        + pack(">BBB", HISTORY_DP_ID, TuyaBLEDataPointType.DT_RAW.value, len(samples))
+        + samples
+    )
+    device._handle_command_or_response(
+        0, 0, TuyaBLECode.FUN_RECEIVE_SIGN_TIME_DP, data
+    )
+    importer.async_update()
+
+    assert len(imported) == 1
+    starts = [sample["start"] for sample in imported[0][1]]
+    this_hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    assert starts[-1] == this_hour
+    assert [sample["mean"] for sample in imported[0][1]] == [19.5, 20.0, 20.5]
+    await client.async_wait_idle()
@@ -0,0 +1,102 @@
+"""Tests of the streaming of datapoint frames to a light."""
+import asyncio
+import time
+
+from custom_components.tuya_ble.const import LIGHT_DP_ID
+from custom_components.tuya_ble.tuya_ble import TuyaBLEDataPointType
+
+from .simulated_device import create_simulated_device
+
+# Frames sent before the effect ends, the effect produces frames faster
+FRAMES_SENT = 10
+MAX_FRAME_RATE = 30
+
+
+async def test_stream_benchmark() -> None:
+    """Frames go out at the frame rate, stale ones are dropped."""
+    device, client = create_simulated_device()
+    started = time.monotonic()
+    await device.start_stream(MAX_FRAME_RATE)
+    produced = 0
+    while client.frames < FRAMES_SENT:
+        device.stream_datapoints(
+            [(LIGHT_DP_ID["BRIGHT"], TuyaBLEDataPointType.DT_VALUE, produced)]
+        )
+        produced += 1
+        await asyncio.sleep(0)
+    # The last frame goes out before the stream stops
+    while device._stream_frame is not None:
+        await asyncio.sleep(0)
+    stats = await device.stop_stream()
+    elapsed = time.monotonic() - started
+
+    assert stats.frames_sent + stats.frames_dropped == produced
+    assert stats.frames_dropped > 0, f"{produced} frames produced, none dropped"
+    # Frames are at least an interval apart, however slow the event loop
+    assert stats.frames_sent <= elapsed * MAX_FRAME_RATE + 1, (
+        f"{stats.frames_sent} frames sent in {elapsed:.3f}s"
+    )
+    assert client.frames == stats.frames_sent
+    # Nothing waits for a response
+    assert not device._input_expected_responses
+    await client.async_wait_idle()
+    # Latest wins, the device ends with the last frame
+    assert device.datapoints[LIGHT_DP_ID["BRIGHT"]].value == produced - 1
+
+
+async def test_stream_stats_frozen_after_stop() -> None:
+    device, client = create_simulated_device()
+    await device.start_stream(MAX_FRAME_RATE)
+    for level in range(5):
+        device.stream_datapoints(
+            [(LIGHT_DP_ID["BRIGHT"], TuyaBLEDataPointType.DT_VALUE, level)]
+        )
+        await asyncio.sleep(1 / MAX_FRAME_RATE)
+    stats = await device.stop_stream()
+
+    await asyncio.sleep(0.2)
+    assert not device.is_streaming
+    assert device.stream_stats == stats
+    await client.async_wait_idle()
+
+
+async def test_stream_survives_invalid_frame() -> None:
+    device, client = create_simulated_device()
+    await device.start_stream(MAX_FRAME_RATE)
+    # Enum values are unsigned
+    device.stream_datapoints(
+        [(LIGHT_DP_ID["WORK_MODE"], TuyaBLEDataPointType.DT_ENUM, -1)]
+    )
+    await asyncio.sleep(2 / MAX_FRAME_RATE)
+    device.stream_datapoints(
+        [(LIGHT_DP_ID["BRIGHT"], TuyaBLEDataPointType.DT_VALUE, 7)]
+    )
+    await asyncio.sleep(2 / MAX_FRAME_RATE)
+
+    assert device.is_streaming
+    stats = await device.stop_stream()
+    assert stats.frames_sent == 1
+    assert device.datapoints[LIGHT_DP_ID["BRIGHT"]].value == 7
+    await client.async_wait_idle()
+
+
+async def test_stream_ends_on_unexpected_error() -> None:
+    """A stream ended by an error is no longer streaming, and stops quietly."""
+    device, client = create_simulated_device()
+
+    async def _end_update(wait_for_response: bool = True) -> None:
+        raise RuntimeError("unexpected")
+
+    device.datapoints.end_update = _end_update
+    await device.start_stream(MAX_FRAME_RATE)
+    task = device._stream_task
+    device.stream_datapoints(
+        [(LIGHT_DP_ID["BRIGHT"], TuyaBLEDataPointType.DT_VALUE, 7)]
+    )
+    await asyncio.wait([task])
+
+    assert not device.is_streaming
+    assert device.stream_stats is not None
+    assert await device.stop_stream() is None
+    assert isinstance(task.exception(), RuntimeError)
+    await client.async_wait_idle()